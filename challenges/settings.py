@@ -41,6 +41,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'steps.middleware.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -73,13 +74,98 @@ WSGI_APPLICATION = 'challenges.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
+# SQLite is tuned for many concurrent writers (the end-of-day rush):
+# - WAL journaling lets readers carry on while one connection writes;
+#   synchronous=NORMAL is durable in WAL mode apart from the last
+#   transactions on power loss, and avoids an fsync per commit
+# - IMMEDIATE transactions take the write lock when they start, so
+#   writers queue for up to `timeout` seconds instead of failing with
+#   "database is locked" when a read transaction tries to upgrade
+# - a 64 MB page cache and 256 MB of memory-mapped I/O per connection,
+#   kept open between requests by CONN_MAX_AGE
+# `manage.py stress_entries` compares this with Django's defaults.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -64000,  # KiB
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'init_command': ';'.join(
+                f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()
+            ),
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,  # seconds a writer waits for the lock
+        },
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+# locmem is per process: with several workers use a shared backend, e.g.
+# 'django.core.cache.backends.filebased.FileBasedCache' with a LOCATION dir.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'step-challenges',
     }
 }
 
+# Leaderboard cache (see steps/caching.py). Set to False to always
+# recompute rankings, e.g. while debugging.
+STEPS_LEADERBOARD_CACHE = True
+STEPS_LEADERBOARD_CACHE_TIMEOUT = 60 * 60  # seconds
+
+# Leaderboard rows per page, and rows shown above/below "my position"
+STEPS_LEADERBOARD_PAGE_SIZE = 50
+STEPS_LEADERBOARD_AROUND = 5
+
+# Largest batch accepted by the JSON sync endpoint (api/entries/sync/)
+STEPS_SYNC_MAX_ITEMS = 500
+
+# Entries per challenge shown on the add-entry page before "Load more"
+STEPS_ENTRY_HISTORY_SIZE = 10
+
+# Entries per page on "My entries"
+STEPS_ENTRIES_PAGE_SIZE = 50
+
+# Write-behind entry form: submissions are queued and acknowledged at
+# once, and `manage.py drain_submissions` saves them in batches
+STEPS_WRITE_BEHIND = False
+
+# Admin changelists of StepEntry and Participant show the planner's
+# row estimate instead of running COUNT(*) once a table is larger
+# than this (SQLite needs ANALYZE to have an estimate)
+STEPS_ADMIN_EXACT_COUNT_LIMIT = 100_000
+
+# Request timing (see steps/middleware.py): a Server-Timing header with
+# database, template and total time, and a log line for a sample of
+# requests on the "steps.profiling" logger. With both off the
+# middleware is skipped entirely.
+STEPS_SERVER_TIMING = DEBUG
+STEPS_PROFILE_SAMPLE_RATE = 0  # e.g. 0.01 to log 1% of requests
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'steps.profiling': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
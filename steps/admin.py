@@ -1,6 +1,81 @@
-from django.contrib import admin
+import io
+import time
+
+from django.conf import settings
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.core.paginator import Paginator
+from django.db import connections
+from django.shortcuts import get_object_or_404, redirect
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils.functional import cached_property
+
+from .exports import export_response
 from .models import StepChallenge, Team, Participant, StepEntry
-from .forms import TeamAdminForm
+from .forms import RosterUploadForm, StepEntryAdminForm, TeamAdminForm
+from .roster import import_roster, parse_roster
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that skips ``COUNT(*)`` on huge unfiltered tables.
+
+    The admin counts the whole table for every changelist page. When the
+    changelist is not filtered, the row count comes from the database's
+    planner statistics instead (``pg_class`` on PostgreSQL, ``ANALYZE``
+    results in ``sqlite_stat1`` on SQLite) once they report more than
+    ``STEPS_ADMIN_EXACT_COUNT_LIMIT`` rows; filtered or small tables, and
+    tables without statistics, are counted exactly.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_row_count(queryset.model, queryset.db)
+            limit = getattr(settings, "STEPS_ADMIN_EXACT_COUNT_LIMIT", 100_000)
+            if estimate and estimate > limit:
+                return estimate
+        return super().count
+
+
+def estimated_row_count(model, using="default"):
+    """Planner estimate of a table's size, or None if there is none."""
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [table],
+            )
+            row = cursor.fetchone()
+            return row[0] if row and row[0] > 0 else None
+        if connection.vendor == "sqlite":
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE name = 'sqlite_stat1'"
+            )
+            if cursor.fetchone() is None:
+                return None  # Never analyzed
+            # Each index's stat starts with the number of rows it covers
+            cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s", [table])
+            counts = [int(stat.split()[0]) for stat, in cursor.fetchall()]
+            return max(counts) if counts else None
+    return None
+
+
+class TeamListFilter(admin.RelatedFieldListFilter):
+    """Team filter whose labels ("Team (Challenge)") load in one query."""
+
+    def field_choices(self, field, request, model_admin):
+        return [
+            (team.pk, str(team))
+            for team in Team.objects.select_related("challenge").order_by(
+                "challenge__name", "name"
+            )
+        ]
+
 
 @admin.register(StepChallenge)
 class StepChallengeAdmin(admin.ModelAdmin):
@@ -27,12 +102,83 @@ class StepChallengeAdmin(admin.ModelAdmin):
             "fields": ("start_date", "end_date")
         }),
         ("Metadata", {
-            "fields": ("created_at",),
+            "fields": ("created_at", "archived_at"),
             "classes": ("collapse",),
         }),
     )
 
-    readonly_fields = ("created_at",)
+    readonly_fields = ("created_at", "archived_at")
+
+    actions = ("export_standings", "export_entries", "export_entries_gzip")
+
+    def get_urls(self):
+        return [
+            path(
+                "<int:challenge_id>/roster/",
+                self.admin_site.admin_view(self.roster_view),
+                name="steps_stepchallenge_roster",
+            ),
+        ] + super().get_urls()
+
+    def roster_view(self, request, challenge_id):
+        """Upload a roster CSV and enroll it (see steps/roster.py)."""
+        challenge = get_object_or_404(StepChallenge, pk=challenge_id)
+        if not self.has_change_permission(request, challenge):
+            raise PermissionDenied
+
+        form = RosterUploadForm(request.POST or None, request.FILES or None)
+        if form.is_valid():
+            started = time.perf_counter()
+            stream = io.TextIOWrapper(form.cleaned_data["roster"], encoding="utf-8-sig")
+            try:
+                rows, rejected = parse_roster(stream)
+                counts = import_roster(
+                    challenge, rows, dry_run=form.cleaned_data["dry_run"]
+                )
+            except (UnicodeDecodeError, ValueError) as exc:
+                form.add_error("roster", str(exc))
+            else:
+                verb = "Would enroll" if form.cleaned_data["dry_run"] else "Enrolled"
+                self.message_user(
+                    request,
+                    f"{verb} {counts['participants_created']} participants: "
+                    f"{counts['users_created']} new users, "
+                    f"{counts['teams_created']} new teams, "
+                    f"{counts['already_enrolled']} already enrolled "
+                    f"({time.perf_counter() - started:.2f}s).",
+                    messages.SUCCESS,
+                )
+                for line, reason in rejected[:20]:
+                    self.message_user(request, f"Line {line}: {reason}", messages.WARNING)
+                if len(rejected) > 20:
+                    self.message_user(
+                        request,
+                        f"…and {len(rejected) - 20} more rejected rows.",
+                        messages.WARNING,
+                    )
+                return redirect(
+                    reverse("admin:steps_stepchallenge_change", args=[challenge.pk])
+                )
+
+        return TemplateResponse(request, "admin/steps/stepchallenge/roster.html", {
+            **self.admin_site.each_context(request),
+            "title": f"Import roster into {challenge.name}",
+            "opts": self.opts,
+            "original": challenge,
+            "form": form,
+        })
+
+    @admin.action(description="Export standings of selected challenges (CSV)")
+    def export_standings(self, request, queryset):
+        return export_response("standings", queryset.order_by("pk"))
+
+    @admin.action(description="Export step entries of selected challenges (CSV)")
+    def export_entries(self, request, queryset):
+        return export_response("entries", queryset.order_by("pk"))
+
+    @admin.action(description="Export step entries of selected challenges (CSV, gzip)")
+    def export_entries_gzip(self, request, queryset):
+        return export_response("entries", queryset.order_by("pk"), compress=True)
 
 
 class TeamInline(admin.TabularInline):
@@ -40,9 +186,34 @@ class TeamInline(admin.TabularInline):
     form = TeamAdminForm
     extra = 1
 
+    def get_queryset(self, request):
+        # Each row is labelled with Team.__str__, which names the challenge
+        return super().get_queryset(request).select_related("challenge")
+
 
 StepChallengeAdmin.inlines = [TeamInline]
 
+
+@admin.register(Team)
+class TeamAdmin(admin.ModelAdmin):
+    """Mostly edited inline on challenges; registered for autocomplete."""
+
+    form = TeamAdminForm
+    list_display = ("name", "challenge", "color")
+    list_filter = ("challenge",)
+    list_select_related = ("challenge",)
+    search_fields = ("name", "challenge__name")
+    ordering = ("challenge", "name")
+    autocomplete_fields = ("challenge",)
+
+    def get_search_results(self, request, queryset, search_term):
+        # Autocomplete labels show the challenge name
+        queryset, may_have_duplicates = super().get_search_results(
+            request, queryset, search_term
+        )
+        return queryset.select_related("challenge"), may_have_duplicates
+
+
 @admin.register(Participant)
 class ParticipantAdmin(admin.ModelAdmin):
     list_display = (
@@ -54,7 +225,7 @@ class ParticipantAdmin(admin.ModelAdmin):
 
     list_filter = (
         "team__challenge",
-        "team",
+        ("team", TeamListFilter),
     )
 
     search_fields = (
@@ -67,11 +238,27 @@ class ParticipantAdmin(admin.ModelAdmin):
 
     readonly_fields = ("joined_at",)
 
+    list_select_related = ("user", "team__challenge")
+    autocomplete_fields = ("user", "team")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    @admin.display(ordering="team__challenge")
     def challenge(self, obj):
         return obj.team.challenge
 
+    def get_search_results(self, request, queryset, search_term):
+        # Autocomplete labels are the user's name
+        queryset, may_have_duplicates = super().get_search_results(
+            request, queryset, search_term
+        )
+        return queryset.select_related("user"), may_have_duplicates
+
+
 @admin.register(StepEntry)
 class StepEntryAdmin(admin.ModelAdmin):
+    form = StepEntryAdminForm
+
     list_display = (
         "participant",
         "challenge",
@@ -82,7 +269,7 @@ class StepEntryAdmin(admin.ModelAdmin):
 
     list_filter = (
         "challenge",
-        "participant__team",
+        ("participant__team", TeamListFilter),
     )
 
     search_fields = (
@@ -97,6 +284,17 @@ class StepEntryAdmin(admin.ModelAdmin):
 
     readonly_fields = ("created_at",)
 
+    list_select_related = ("participant__user", "challenge")
+    autocomplete_fields = ("participant", "challenge")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def save_model(self, request, obj, form, change):
+        if change:
+            obj.save()
+        else:
+            obj.upsert()  # Replaces the participant's entry on that date
+
     def get_readonly_fields(self, request, obj=None):
         """
         Optional safety: prevent edits if challenge is closed,
@@ -105,4 +303,3 @@ class StepEntryAdmin(admin.ModelAdmin):
         if obj and not obj.challenge.is_active and not request.user.is_superuser:
             return self.readonly_fields + ("participant", "challenge", "date", "total_steps")
         return self.readonly_fields
-
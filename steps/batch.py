@@ -0,0 +1,231 @@
+"""
+Validate and write many step entries at once.
+
+``StepEntry.save()`` runs ``full_clean()``, which costs a challenge
+lookup and a "previous entry" query per row. For imports, client
+syncs and the write-behind queue this module applies the same rules to a whole batch in memory:
+one query for the challenges, one for the entries already stored, then
+a single pass per participant with rows sorted by date.
+"""
+import bisect
+from collections import defaultdict
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils.timezone import now
+
+from .caching import invalidate_challenge
+from .live import publish_on_commit
+from .models import (
+    ChallengeDailyStats,
+    CLOSED_CHALLENGE_ERROR,
+    DATE_OUTSIDE_CHALLENGE_ERROR,
+    DECREASING_STEPS_ERROR,
+    EXCEEDS_NEXT_ENTRY_ERROR,
+    ParticipantStanding,
+    PendingSubmission,
+    StandingSnapshot,
+    StepChallenge,
+    StepEntry,
+)
+
+
+DUPLICATE_DATE_ERROR = "An entry for this date already exists."
+DUPLICATE_IN_BATCH_ERROR = "This date appears more than once for the participant."
+NEGATIVE_STEPS_ERROR = "Total steps cannot be negative."
+UNKNOWN_CHALLENGE_ERROR = "Unknown challenge."
+
+# Keep IN (...) lists well below SQLite's bound-parameter limit
+QUERY_CHUNK_SIZE = 500
+
+
+def chunked(values, size=QUERY_CHUNK_SIZE):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def validate_entries(rows):
+    """
+    Check candidate entries against the StepEntry.clean() rules.
+
+    ``rows`` is an iterable of ``(ref, participant_id, challenge_id, date,
+    total_steps)`` tuples, where ``ref`` is anything that identifies the
+    row to the caller (a line number, a list index...). Callers are
+    responsible for checking that each participant belongs to the
+    challenge.
+
+    Returns ``(accepted, rejected)``: unsaved StepEntry instances (each
+    with a ``ref`` attribute) and a list of ``(ref, reason)`` pairs.
+    """
+    groups = defaultdict(list)
+    for row in rows:
+        ref, participant_id, challenge_id, day, total_steps = row
+        groups[(participant_id, challenge_id)].append((day, ref, total_steps))
+
+    challenges = StepChallenge.objects.in_bulk(
+        {challenge_id for _, challenge_id in groups}
+    )
+
+    # Existing (date, total) per participant/challenge, sorted by date
+    existing = defaultdict(list)
+    participant_ids = {participant_id for participant_id, _ in groups}
+    for chunk in chunked(participant_ids):
+        stored = (
+            StepEntry.objects
+            .filter(participant_id__in=chunk, challenge_id__in=list(challenges))
+            .order_by("date")
+            .values_list("participant_id", "challenge_id", "date", "total_steps")
+        )
+        for participant_id, challenge_id, day, total_steps in stored:
+            existing[(participant_id, challenge_id)].append((day, total_steps))
+
+    accepted, rejected = [], []
+    for (participant_id, challenge_id), candidates in groups.items():
+        challenge = challenges.get(challenge_id)
+        if challenge is None:
+            rejected += [(ref, UNKNOWN_CHALLENGE_ERROR) for _, ref, _ in candidates]
+            continue
+        stored = existing[(participant_id, challenge_id)]
+        stored_dates = [day for day, _ in stored]
+        previous_accepted = None  # (date, total) of the last row we kept
+
+        candidates.sort(key=lambda candidate: candidate[0])
+        for day, ref, total_steps in candidates:
+            if not challenge.is_active:
+                rejected.append((ref, CLOSED_CHALLENGE_ERROR))
+                continue
+            if not (challenge.start_date <= day <= challenge.end_date):
+                rejected.append((ref, DATE_OUTSIDE_CHALLENGE_ERROR))
+                continue
+            if total_steps < 0:
+                rejected.append((ref, NEGATIVE_STEPS_ERROR))
+                continue
+
+            position = bisect.bisect_left(stored_dates, day)
+            if position < len(stored_dates) and stored_dates[position] == day:
+                rejected.append((ref, DUPLICATE_DATE_ERROR))
+                continue
+            if previous_accepted and previous_accepted[0] == day:
+                rejected.append((ref, DUPLICATE_IN_BATCH_ERROR))
+                continue
+
+            # Closest earlier entry, whether stored or from this batch
+            previous = stored[position - 1] if position else None
+            if previous_accepted and (
+                previous is None or previous_accepted[0] > previous[0]
+            ):
+                previous = previous_accepted
+            if previous and total_steps < previous[1]:
+                rejected.append((ref, DECREASING_STEPS_ERROR))
+                continue
+            # Later batch rows are checked against this one in turn
+            following = stored[position] if position < len(stored) else None
+            if following and total_steps > following[1]:
+                rejected.append((ref, EXCEEDS_NEXT_ENTRY_ERROR))
+                continue
+
+            entry = StepEntry(
+                participant_id=participant_id,
+                challenge_id=challenge_id,
+                date=day,
+                total_steps=total_steps,
+                step_delta=total_steps - (previous[1] if previous else 0),
+            )
+            entry.ref = ref
+            accepted.append(entry)
+            previous_accepted = (day, total_steps)
+
+    return accepted, rejected
+
+
+def save_entries(entries, batch_size=1000):
+    """
+    Insert validated entries in chunks and refresh what depends on them.
+
+    Runs in a single transaction; returns the number of rows written.
+    """
+    with transaction.atomic():
+        for start in range(0, len(entries), batch_size):
+            StepEntry.objects.bulk_create(entries[start:start + batch_size])
+
+        pairs = {(entry.participant_id, entry.challenge_id) for entry in entries}
+        # New rows come with their delta; stored rows after them need theirs redone
+        StepEntry.objects.refresh_deltas_many(pairs)
+        ChallengeDailyStats.objects.record_bulk_insert(entries)
+        ParticipantStanding.objects.refresh_many(pairs)
+        earliest = {}
+        for entry in entries:
+            earliest[entry.challenge_id] = min(
+                entry.date, earliest.get(entry.challenge_id, entry.date)
+            )
+        for challenge_id, since in earliest.items():
+            StandingSnapshot.objects.invalidate(challenge_id, since=since)
+            invalidate_challenge(challenge_id)
+            # Many rows may have moved: live leaderboards reload instead
+            publish_on_commit(challenge_id, {"type": "reset"})
+
+    return len(entries)
+
+
+def drain_submissions(batch_size=500):
+    """
+    Validate and save the oldest pending submissions (write-behind mode)
+    as one batch, recording each one's outcome in the same transaction.
+
+    Returns ``(created, rejected)`` counts; ``(0, 0)`` once the queue is
+    empty. Rows another worker holds are skipped where the database
+    supports it (``SKIP LOCKED``); SQLite serializes writers anyway.
+    """
+    with transaction.atomic():
+        batch = list(
+            PendingSubmission.objects
+            .filter(status=PendingSubmission.Status.PENDING)
+            .select_for_update(skip_locked=True)
+            .order_by("pk")[:batch_size]
+        )
+        if not batch:
+            return 0, 0
+
+        accepted, rejected = validate_entries(
+            (s.pk, s.participant_id, s.challenge_id, s.date, s.total_steps)
+            for s in batch
+        )
+        save_entries(accepted)
+
+        submissions = {submission.pk: submission for submission in batch}
+        created = {entry.ref: entry.pk for entry in accepted}
+        errors = {}
+        for ref, reason in sorted(rejected):
+            if reason not in (DUPLICATE_DATE_ERROR, DUPLICATE_IN_BATCH_ERROR):
+                errors[ref] = reason
+                continue
+            # A second value for a day corrects the first, as in the form
+            submission = submissions[ref]
+            entry = StepEntry(
+                participant_id=submission.participant_id,
+                challenge_id=submission.challenge_id,
+                date=submission.date,
+                total_steps=submission.total_steps,
+            )
+            try:
+                with transaction.atomic():
+                    entry.upsert()
+            except ValidationError as exc:
+                errors[ref] = exc.messages[0]
+            else:
+                created[ref] = entry.pk
+
+        processed_at = now()
+        for submission in batch:
+            if submission.pk in created:
+                submission.status = PendingSubmission.Status.CREATED
+                submission.entry_id = created[submission.pk]
+            else:
+                submission.status = PendingSubmission.Status.REJECTED
+                submission.error = errors[submission.pk]
+            submission.processed_at = processed_at
+        PendingSubmission.objects.bulk_update(
+            batch, ["status", "error", "entry", "processed_at"]
+        )
+    return len(created), len(errors)
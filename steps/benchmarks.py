@@ -0,0 +1,183 @@
+"""
+Helpers shared by the benchmarking management commands.
+
+Benchmarks never touch the configured database: they run inside a
+throwaway copy created the same way the test runner creates one, and
+fill it with synthetic data through ``bulk_create``.
+"""
+import math
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import islice
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils.timezone import now
+
+from .models import (
+    ChallengeDailyStats,
+    StepChallenge,
+    Team,
+    Participant,
+    ParticipantStanding,
+    StepEntry,
+)
+
+
+TEAM_COLORS = ["#6c63ff", "#ff3860", "#23d160", "#ffdd57", "#209cee", "#363636"]
+
+
+@contextmanager
+def isolated_database(verbosity=0, name=None, options=None):
+    """
+    Run the block against a freshly migrated, disposable test database,
+    with the test environment (``testserver`` host, locmem email) set up
+    so views can be driven through ``django.test.Client``.
+
+    ``name`` gives the test database a file of its own (SQLite test
+    databases live in memory otherwise) and ``options`` replaces the
+    connection OPTIONS for the duration, e.g. to compare tunings.
+    """
+    settings_dict = connection.settings_dict
+    old_name, old_options = settings_dict["NAME"], settings_dict["OPTIONS"]
+    old_test_name = settings_dict["TEST"].get("NAME")
+    if name is not None:
+        settings_dict["TEST"]["NAME"] = name
+    if options is not None:
+        connection.close()
+        settings_dict["OPTIONS"] = options
+    setup_test_environment()
+    connection.creation.create_test_db(
+        verbosity=verbosity, autoclobber=True, serialize=False
+    )
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+        teardown_test_environment()
+        settings_dict["OPTIONS"] = old_options
+        settings_dict["TEST"]["NAME"] = old_test_name
+
+
+def _batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def seed(
+    challenges=1,
+    teams=10,
+    participants=100,
+    days=30,
+    random_seed=0,
+    batch_size=5000,
+):
+    """
+    Fill the database with synthetic challenges, teams and entries.
+
+    Each challenge gets ``teams`` teams and ``participants`` participants
+    (one user per participant, reused across challenges) with one entry
+    per day for ``days`` days. The most recent challenge ends today and
+    is the only active one; older challenges sit back to back before it.
+
+    Returns a dict of row counts. Standings and daily stats are rebuilt
+    at the end since ``bulk_create`` bypasses ``StepEntry.save()``.
+    """
+    rng = random.Random(random_seed)
+    today = now().date()
+
+    users = User.objects.bulk_create(
+        (
+            User(
+                username=f"bench{n}",
+                first_name=f"Runner{n}",
+                last_name="Bench",
+                password="!",  # unusable password
+            )
+            for n in range(participants)
+        ),
+        batch_size=batch_size,
+    )
+
+    entry_count = 0
+    for index in range(challenges):
+        end = today - timedelta(days=index * days)
+        challenge = StepChallenge.objects.create(
+            name=f"Bench Challenge {index + 1}",
+            start_date=end - timedelta(days=days - 1),
+            end_date=end,
+            is_active=index == 0,
+        )
+        challenge_teams = Team.objects.bulk_create(
+            Team(
+                challenge=challenge,
+                name=f"Team {n + 1}",
+                color=TEAM_COLORS[n % len(TEAM_COLORS)],
+            )
+            for n in range(teams)
+        )
+        members = Participant.objects.bulk_create(
+            (
+                Participant(user=user, team=challenge_teams[n % teams])
+                for n, user in enumerate(users)
+            ),
+            batch_size=batch_size,
+        )
+
+        def entries():
+            for member in members:
+                total = 0
+                for day in range(days):
+                    steps = rng.randint(2000, 15000)
+                    total += steps
+                    yield StepEntry(
+                        participant=member,
+                        challenge=challenge,
+                        date=challenge.start_date + timedelta(days=day),
+                        total_steps=total,
+                        step_delta=steps,
+                    )
+
+        for batch in _batched(entries(), batch_size):
+            StepEntry.objects.bulk_create(batch)
+            entry_count += len(batch)
+
+        ParticipantStanding.objects.rebuild(challenge.pk)
+        ChallengeDailyStats.objects.rebuild(challenge.pk)
+
+    return {
+        "challenges": challenges,
+        "teams": teams * challenges,
+        "participants": participants * challenges,
+        "entries": entry_count,
+    }
+
+
+def percentile(values, p):
+    """``p``-th percentile (0-100) of ``values``, nearest-rank method."""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    rank = max(math.ceil(p / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def summarize(timings, queries):
+    """
+    JSON-friendly summary of one benchmark: latency percentiles in
+    milliseconds from ``timings`` (seconds) and the largest query count.
+    """
+    millis = [timing * 1000 for timing in timings]
+    summary = {
+        f"p{p}_ms": round(percentile(millis, p), 3) for p in (50, 90, 95, 99)
+    }
+    summary.update({
+        "mean_ms": round(sum(millis) / len(millis), 3),
+        "max_ms": round(max(millis), 3),
+        "requests": len(millis),
+        "queries": max(queries),
+    })
+    return summary
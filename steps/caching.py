@@ -0,0 +1,150 @@
+"""
+Versioned per-challenge cache for leaderboard data.
+
+Every challenge has a version counter in Django's cache. Cached pages
+are stored under keys that include the current version, and any write
+that can change a ranking (StepEntry, Participant, Team or StepChallenge
+save/delete, bulk deletes and updates of them, imports and the rebuild
+commands) bumps the counter, so readers simply stop finding the old
+keys. Nothing is ever deleted explicitly; stale entries expire on their
+own after ``STEPS_LEADERBOARD_CACHE_TIMEOUT``.
+
+Set ``STEPS_LEADERBOARD_CACHE = False`` to always recompute.
+
+Once the write commits, the version is also bumped in the database
+(LeaderboardVersion), which is what the JSON APIs use as their ETag
+and Last-Modified: a process-local cache would let every server process
+answer 304 from its own, possibly stale, counter.
+"""
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+
+VERSION_KEY = "steps:challenge:{}:version"
+VALUE_KEY = "steps:challenge:{}:{}:v{}"
+COUNTER_KEY = "steps:leaderboard-cache:{}"
+
+_MISSING = object()
+
+
+def is_enabled():
+    return getattr(settings, "STEPS_LEADERBOARD_CACHE", True)
+
+
+def challenge_version(challenge_id):
+    """Current version of a challenge's cached data."""
+    key = VERSION_KEY.format(challenge_id)
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so an evicted counter never reuses old keys
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _bump(challenge_id):
+    key = VERSION_KEY.format(challenge_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def invalidate_challenge(challenge_id):
+    """
+    Retire every cached value of a challenge.
+
+    Bumps now, so later reads in this transaction miss, and again on
+    commit, so a concurrent reader cannot cache pre-commit data under
+    the new version. The database copy is only bumped on commit, for
+    the same reason.
+    """
+    if challenge_id is None:
+        return
+    _bump(challenge_id)
+    transaction.on_commit(lambda: _committed(challenge_id))
+
+
+def _committed(challenge_id):
+    from .models import LeaderboardVersion  # models imports this module
+
+    _bump(challenge_id)
+    LeaderboardVersion.objects.bump(challenge_id)
+
+
+def get_or_compute(challenge_id, name, compute):
+    """Return the cached ``name`` value for a challenge, computing it on a miss."""
+    if not is_enabled():
+        return compute()
+
+    key = VALUE_KEY.format(challenge_id, name, challenge_version(challenge_id))
+    value = cache.get(key, _MISSING)
+    if value is _MISSING:
+        _count("misses")
+        value = compute()
+        cache.set(
+            key,
+            value,
+            timeout=getattr(settings, "STEPS_LEADERBOARD_CACHE_TIMEOUT", 3600),
+        )
+    else:
+        _count("hits")
+    return value
+
+
+async def aget_or_compute(challenge_id, name, compute):
+    """get_or_compute() for async views; ``compute`` is a coroutine function."""
+    if not is_enabled():
+        return await compute()
+
+    version = await sync_to_async(challenge_version)(challenge_id)
+    key = VALUE_KEY.format(challenge_id, name, version)
+    value = await cache.aget(key, _MISSING)
+    if value is _MISSING:
+        await sync_to_async(_count)("misses")
+        value = await compute()
+        await cache.aset(
+            key,
+            value,
+            timeout=getattr(settings, "STEPS_LEADERBOARD_CACHE_TIMEOUT", 3600),
+        )
+    else:
+        await sync_to_async(_count)("hits")
+    return value
+
+
+def _count(kind):
+    key = COUNTER_KEY.format(kind)
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:  # Evicted between add() and incr()
+            cache.set(key, 1, timeout=None)
+
+
+def counters_are_shared():
+    """
+    Whether other processes see the hit/miss counters. The local-memory
+    backend keeps them inside each server process (and the dummy
+    backend keeps nothing), so a management command would only ever
+    read its own zeros.
+    """
+    return not isinstance(caches[DEFAULT_CACHE_ALIAS], (LocMemCache, DummyCache))
+
+
+def stats():
+    """Hit/miss counters since the last reset."""
+    return {
+        kind: cache.get(COUNTER_KEY.format(kind), 0)
+        for kind in ("hits", "misses")
+    }
+
+
+def reset_stats():
+    cache.delete_many([COUNTER_KEY.format(kind) for kind in ("hits", "misses")])
@@ -1,7 +1,7 @@
 # forms.py
 from django import forms
 from django.contrib.auth.forms import AuthenticationForm
-from .models import Team, StepEntry
+from .models import PendingSubmission, Team, StepEntry
 
 
 class BulmaLoginForm(AuthenticationForm):
@@ -27,6 +27,21 @@ class TeamAdminForm(forms.ModelForm):
         }
 
 
+class StepEntryAdminForm(forms.ModelForm):
+    """
+    Adding an entry for a date that already has one replaces it
+    (StepEntry.upsert()), so only edits are checked for duplicates.
+    """
+
+    class Meta:
+        model = StepEntry
+        fields = "__all__"
+
+    def validate_unique(self):
+        if self.instance.pk:
+            super().validate_unique()
+
+
 class StepEntryForm(forms.ModelForm):
     class Meta:
         model = StepEntry
@@ -42,3 +57,19 @@ class StepEntryForm(forms.ModelForm):
                 attrs={"class": "input"}
             ),
         }
+
+
+class StepSubmissionForm(StepEntryForm):
+    """The entry form in write-behind mode: queues the entry instead."""
+
+    class Meta(StepEntryForm.Meta):
+        model = PendingSubmission
+
+
+class RosterUploadForm(forms.Form):
+    roster = forms.FileField(
+        help_text="CSV with the columns username, name, email, team, color."
+    )
+    dry_run = forms.BooleanField(
+        required=False, help_text="Check the file and report without saving."
+    )
@@ -0,0 +1,75 @@
+"""
+In-process fan-out of leaderboard changes to server-sent event streams.
+
+Each open ``/leaderboard/<id>/stream/`` connection subscribes an
+``asyncio.Queue`` for its challenge. Writes publish one small event per
+change (after the transaction commits), and the broadcaster hands it to
+every subscriber's event loop with ``call_soon_threadsafe``, so sync
+request threads never touch a queue directly.
+
+Subscribers only see events published by the same process: run a
+single ASGI worker for live updates, or the clients of other workers
+simply get no pushes and keep working like a normal page.
+"""
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.db import transaction
+
+
+# Events a slow client may fall behind by before it is sent a reset
+QUEUE_SIZE = 100
+
+
+class Broadcaster:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)  # challenge id -> {(loop, queue)}
+
+    def subscribe(self, challenge_id):
+        """Register a queue on the running event loop and return it."""
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(QUEUE_SIZE))
+        with self._lock:
+            self._subscribers[challenge_id].add(subscriber)
+        return subscriber[1]
+
+    def unsubscribe(self, challenge_id, queue):
+        with self._lock:
+            subscribers = self._subscribers.get(challenge_id, set())
+            subscribers.difference_update(
+                {subscriber for subscriber in subscribers if subscriber[1] is queue}
+            )
+            if not subscribers:
+                self._subscribers.pop(challenge_id, None)
+
+    def has_subscribers(self, challenge_id):
+        return bool(self._subscribers.get(challenge_id))
+
+    def publish(self, challenge_id, event):
+        """Queue ``event`` for every subscriber of a challenge; thread-safe."""
+        with self._lock:
+            subscribers = list(self._subscribers.get(challenge_id, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, event)
+            except RuntimeError:  # Loop already closed
+                self.unsubscribe(challenge_id, queue)
+
+
+def _offer(queue, event):
+    if queue.full():
+        # Too far behind for deltas to make sense: start over
+        while not queue.empty():
+            queue.get_nowait()
+        event = {"type": "reset"}
+    queue.put_nowait(event)
+
+
+broadcaster = Broadcaster()
+
+
+def publish_on_commit(challenge_id, event):
+    """Publish once the current transaction commits, if anyone listens."""
+    if broadcaster.has_subscribers(challenge_id):
+        transaction.on_commit(lambda: broadcaster.publish(challenge_id, event))
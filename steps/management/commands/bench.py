@@ -0,0 +1,320 @@
+import json
+import platform
+import re
+import time
+
+import django
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import AsyncClient, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.timezone import now
+
+from steps.benchmarks import isolated_database, seed, summarize
+from steps.models import StepChallenge, StepEntry
+
+
+SCENARIOS = (
+    "home",
+    "leaderboard",
+    "add-entry",
+    "add-entry-post",
+    "my-entries",
+    "home-async",
+    "leaderboard-async",
+)
+
+GET_URLS = {
+    "home": "steps-home",
+    "leaderboard": "steps-leaderboard",
+    "add-entry": "steps-add-entry",
+    "my-entries": "steps-my-entries",
+}
+
+# Async views (through the ASGI handler) and the sync view each mirrors
+ASYNC_URLS = {
+    "home-async": ("steps-home-async", "home"),
+    "leaderboard-async": ("steps-leaderboard-async", "leaderboard"),
+}
+
+
+def header_queries(server_timing):
+    """Query count from a ``db;dur=...;desc="N queries"`` Server-Timing entry."""
+    return int(re.search(r'desc="(\d+) queries"', server_timing)[1])
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a disposable database with synthetic data, time the main "
+        "views through the test client and print latency percentiles and "
+        "query counts as JSON. Compare with a previous run via --baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--challenges", type=int, default=1)
+        parser.add_argument("--teams", type=int, default=20)
+        parser.add_argument("--participants", type=int, default=1000)
+        parser.add_argument("--days", type=int, default=60)
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=50,
+            help="Timed requests per view.",
+        )
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=3,
+            help="Untimed requests per view before measuring.",
+        )
+        parser.add_argument(
+            "--only",
+            choices=SCENARIOS,
+            action="append",
+            help="Benchmark only this view (repeatable).",
+        )
+        parser.add_argument(
+            "--no-cache",
+            action="store_true",
+            help="Run with STEPS_LEADERBOARD_CACHE disabled.",
+        )
+        parser.add_argument(
+            "--output",
+            help="Also write the JSON report to this file (e.g. to use as a baseline).",
+        )
+        parser.add_argument(
+            "--baseline",
+            help="JSON report of an earlier run to compare against.",
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.25,
+            help="Allowed p95 slowdown before flagging a regression (0.25 = 25%%).",
+        )
+        parser.add_argument(
+            "--fail-on-regression",
+            action="store_true",
+            help="Exit with an error if any view regressed against the baseline.",
+        )
+
+    def handle(self, *args, **options):
+        baseline = self.load_baseline(options["baseline"])
+
+        with isolated_database():
+            started = time.perf_counter()
+            counts = seed(
+                challenges=options["challenges"],
+                teams=options["teams"],
+                participants=options["participants"],
+                days=options["days"],
+            )
+            self.stderr.write(
+                f"Seeded {counts['entries']} entries for "
+                f"{counts['participants']} participants in "
+                f"{time.perf_counter() - started:.1f}s"
+            )
+
+            with override_settings(STEPS_LEADERBOARD_CACHE=not options["no_cache"]):
+                results = {}
+                for scenario in options["only"] or SCENARIOS:
+                    timings, queries = self.run_scenario(
+                        scenario, options["warmup"], options["requests"]
+                    )
+                    results[scenario] = summarize(timings, queries)
+                    self.stderr.write(
+                        f"{scenario}: p50 {results[scenario]['p50_ms']:.2f} ms, "
+                        f"p95 {results[scenario]['p95_ms']:.2f} ms, "
+                        f"{results[scenario]['queries']} queries"
+                    )
+                self.compare_async(results)
+
+        report = {
+            "meta": {
+                "seed": counts,
+                "requests": options["requests"],
+                "cache": not options["no_cache"],
+                "database": connection.vendor,
+                "django": django.get_version(),
+                "python": platform.python_version(),
+            },
+            "results": results,
+        }
+        output = json.dumps(report, indent=2)
+        self.stdout.write(output)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as stream:
+                stream.write(output + "\n")
+
+        if baseline:
+            regressions = self.compare(results, baseline, options["tolerance"])
+            if regressions and options["fail_on_regression"]:
+                raise CommandError(
+                    f"{len(regressions)} view(s) regressed: {', '.join(regressions)}"
+                )
+
+    def load_baseline(self, path):
+        if not path:
+            return None
+        try:
+            with open(path, encoding="utf-8") as stream:
+                return json.load(stream)["results"]
+        except (OSError, ValueError, KeyError) as exc:
+            raise CommandError(f"Cannot read baseline {path}: {exc}")
+
+    # ------------------------------------------------------------------
+    # Scenarios
+    # ------------------------------------------------------------------
+
+    def run_scenario(self, scenario, warmup, requests):
+        """Return per-request wall times (seconds) and query counts."""
+        if scenario == "add-entry-post":
+            return self.run_entry_posts(warmup, requests)
+        if scenario in ASYNC_URLS:
+            return self.run_async_scenario(scenario, warmup, requests)
+
+        client = Client()
+        client.force_login(User.objects.get(username="bench0"))
+        url = reverse(GET_URLS[scenario])
+        return self.measure(
+            lambda _: client.get(url), warmup, requests, scenario
+        )
+
+    def run_async_scenario(self, scenario, warmup, requests):
+        """
+        Time an async view from inside one event loop, like an ASGI server.
+
+        Each ASGI request runs its ORM calls in a worker thread (and
+        connection) of its own, out of reach of CaptureQueriesContext,
+        so queries are read from the Server-Timing header instead.
+        """
+        with override_settings(STEPS_SERVER_TIMING=True):
+            client = AsyncClient()  # Loads the middleware with the header on
+        url = reverse(ASYNC_URLS[scenario][0])
+        user = User.objects.get(username="bench0")
+
+        async def run():
+            await client.aforce_login(user)
+            timings, queries = [], []
+            for index in range(warmup + requests):
+                started = time.perf_counter()
+                response = await client.get(url)
+                elapsed = time.perf_counter() - started
+                self.check_status(scenario, response)
+                if index >= warmup:
+                    timings.append(elapsed)
+                    queries.append(header_queries(response["Server-Timing"]))
+            return timings, queries
+
+        return async_to_sync(run)()
+
+    def run_entry_posts(self, warmup, requests):
+        """
+        Each request submits today's total for the next seeded user,
+        after removing the entry the seed (or an earlier round) left for
+        today. Only the POST itself is timed.
+        """
+        challenge = StepChallenge.objects.get(is_active=True)
+        users = list(
+            User.objects
+            .filter(participant__team__challenge=challenge)
+            .order_by("pk")
+        )
+        today = now().date()
+        url = reverse("steps-add-entry")
+        clients = {}
+
+        def prepare(index):
+            user = users[index % len(users)]
+            existing = StepEntry.objects.filter(
+                participant__user=user, challenge=challenge, date=today
+            ).first()
+            if existing:
+                existing.delete()
+            previous = (
+                StepEntry.objects
+                .filter(participant__user=user, challenge=challenge)
+                .order_by("-date")
+                .values_list("total_steps", flat=True)
+                .first()
+            ) or 0
+            if user.pk not in clients:
+                clients[user.pk] = Client()
+                clients[user.pk].force_login(user)
+            return clients[user.pk], {
+                "challenge": challenge.pk,
+                "date": today.isoformat(),
+                "total_steps": previous + 5000,
+            }
+
+        def request(prepared):
+            client, data = prepared
+            return client.post(url, data)
+
+        return self.measure(request, warmup, requests, "add-entry-post", prepare)
+
+    def measure(self, request, warmup, requests, scenario, prepare=lambda index: index):
+        timings, queries = [], []
+        for index in range(warmup + requests):
+            prepared = prepare(index)
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = request(prepared)
+                elapsed = time.perf_counter() - started
+            self.check_status(scenario, response)
+            if index >= warmup:
+                timings.append(elapsed)
+                queries.append(len(captured))
+        return timings, queries
+
+    def check_status(self, scenario, response):
+        if response.status_code >= 400:
+            raise CommandError(
+                f"{scenario}: request failed with status {response.status_code}"
+            )
+
+    # ------------------------------------------------------------------
+    # Baseline comparison
+    # ------------------------------------------------------------------
+
+    def compare_async(self, results):
+        """Print each async view's latency next to its sync counterpart's."""
+        for scenario, (_, sync_scenario) in ASYNC_URLS.items():
+            if scenario not in results or sync_scenario not in results:
+                continue
+            current, sync = results[scenario], results[sync_scenario]
+            self.stderr.write(
+                f"{scenario} vs {sync_scenario}: "
+                f"p50 {current['p50_ms']:.2f} / {sync['p50_ms']:.2f} ms, "
+                f"p95 {current['p95_ms']:.2f} / {sync['p95_ms']:.2f} ms"
+            )
+
+    def compare(self, results, baseline, tolerance):
+        """Print each view against the baseline; return the regressed ones."""
+        regressions = []
+        for scenario, current in results.items():
+            previous = baseline.get(scenario)
+            if not previous:
+                self.stderr.write(f"{scenario}: not in baseline")
+                continue
+
+            change = (
+                current["p95_ms"] / previous["p95_ms"] - 1
+                if previous["p95_ms"] else 0
+            )
+            slower = change > tolerance
+            more_queries = current["queries"] > previous["queries"]
+            line = (
+                f"{scenario}: p95 {current['p95_ms']:.2f} ms vs "
+                f"{previous['p95_ms']:.2f} ms ({change:+.0%}), queries "
+                f"{current['queries']} vs {previous['queries']}"
+            )
+            if slower or more_queries:
+                regressions.append(scenario)
+                self.stderr.write(self.style.ERROR(f"{line}  REGRESSION"))
+            else:
+                self.stderr.write(self.style.SUCCESS(line))
+        return regressions
@@ -0,0 +1,112 @@
+import gc
+import json
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.template import Context, Template
+
+from steps.benchmarks import isolated_database, seed
+from steps.models import ParticipantStanding, StepChallenge
+
+
+# The leaderboard's participant row, written against each row shape
+ROW_TEMPLATES = {
+    "models": (
+        "{% for p in participants %}"
+        '<tr data-participant="{{ p.participant_id }}" data-steps="{{ p.total_steps }}">'
+        "<td>{{ p.rank }}</td>"
+        "<td>{{ p.participant.user.first_name }} {{ p.participant.user.last_name }}</td>"
+        '<td><span style="background-color: {{ p.team.color }};"></span>{{ p.team.name }}</td>'
+        "<td>{{ p.total_steps }}</td></tr>"
+        "{% endfor %}"
+    ),
+    "rows": (
+        "{% for p in participants %}"
+        '<tr data-participant="{{ p.participant_id }}" data-steps="{{ p.total_steps }}">'
+        "<td>{{ p.rank }}</td>"
+        "<td>{{ p.first_name }} {{ p.last_name }}</td>"
+        '<td><span style="background-color: {{ p.team_color }};"></span>{{ p.team_name }}</td>'
+        "<td>{{ p.total_steps }}</td></tr>"
+        "{% endfor %}"
+    ),
+}
+
+
+def row_queries(standings):
+    """The whole ranked table in each shape the benchmark compares."""
+    return {
+        "models": standings.select_related("participant__user", "team").ranked(),
+        "rows": standings.rows().ranked(),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a disposable database with one large challenge and compare "
+        "loading and rendering its whole leaderboard as model instances "
+        "versus the named-tuple rows the views use: memory held by the "
+        "rows, fetch time and render time, printed as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--participants", type=int, default=10000)
+        parser.add_argument("--teams", type=int, default=20)
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Timed fetches and renders per shape (best one is reported).",
+        )
+
+    def handle(self, *args, **options):
+        with isolated_database():
+            seed(
+                challenges=1,
+                teams=options["teams"],
+                participants=options["participants"],
+                days=1,
+            )
+            challenge = StepChallenge.objects.get()
+            queries = row_queries(ParticipantStanding.objects.filter(challenge=challenge))
+            results = {
+                shape: self.measure(queryset, Template(ROW_TEMPLATES[shape]), options["repeat"])
+                for shape, queryset in queries.items()
+            }
+
+        models, rows = results["models"], results["rows"]
+        report = {
+            "meta": {"participants": options["participants"], "repeat": options["repeat"]},
+            "results": results,
+            "reduction": {
+                key: round(1 - rows[key] / models[key], 3) if models[key] else None
+                for key in ("memory_bytes", "fetch_ms", "render_ms")
+            },
+        }
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def measure(self, queryset, template, repeat):
+        """Memory held by one evaluated page, best fetch and render times."""
+        gc.collect()
+        tracemalloc.start()
+        rows = list(queryset.all())
+        memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del rows
+
+        fetch_times, render_times = [], []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            rows = list(queryset.all())
+            fetch_times.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            template.render(Context({"participants": rows}))
+            render_times.append(time.perf_counter() - started)
+
+        return {
+            "rows": len(rows),
+            "memory_bytes": memory,
+            "fetch_ms": round(min(fetch_times) * 1000, 3),
+            "render_ms": round(min(render_times) * 1000, 3),
+        }
@@ -0,0 +1,76 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now
+
+from steps.batch import drain_submissions
+from steps.models import PendingSubmission
+
+
+class Command(BaseCommand):
+    help = (
+        "Save the step entries queued by the entry form in write-behind "
+        "mode (STEPS_WRITE_BEHIND). Each batch is validated in memory with "
+        "the StepEntry rules and written in one transaction, and every "
+        "submission gets its status. Without --loop, stops once the queue "
+        "is empty."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Submissions validated and written per transaction.",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep running, checking for new submissions every --interval.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait when the queue is empty (with --loop).",
+        )
+        parser.add_argument(
+            "--keep-days",
+            type=int,
+            default=7,
+            help="Delete processed submissions older than this many days.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                self.drain(options["batch_size"])
+                self.purge(options["keep_days"])
+                if not options["loop"]:
+                    break
+                time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+
+    def drain(self, batch_size):
+        """Process batches until the queue is empty."""
+        while True:
+            started = time.perf_counter()
+            created, rejected = drain_submissions(batch_size)
+            if not created and not rejected:
+                return
+            self.stdout.write(
+                f"Created {created}, rejected {rejected} in "
+                f"{time.perf_counter() - started:.2f}s"
+            )
+
+    def purge(self, keep_days):
+        deleted, _ = (
+            PendingSubmission.objects
+            .exclude(status=PendingSubmission.Status.PENDING)
+            .filter(processed_at__lt=now() - timedelta(days=keep_days))
+            .delete()
+        )
+        if deleted:
+            self.stdout.write(f"Deleted {deleted} processed submissions")
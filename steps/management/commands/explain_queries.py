@@ -0,0 +1,124 @@
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from steps.benchmarks import isolated_database, seed
+
+
+# Tables that grow with participants x days; a full scan of these is a bug
+LARGE_TABLES = (
+    "steps_stepentry",
+    "steps_participant",
+    "steps_participantstanding",
+)
+
+VIEWS = (
+    ("home", "steps-home"),
+    ("leaderboard", "steps-leaderboard"),
+    ("add-entry", "steps-add-entry"),
+    ("my-entries", "steps-my-entries"),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a disposable database, request every view and print the "
+        "query plan and timing of each query it runs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--participants", type=int, default=5000)
+        parser.add_argument("--teams", type=int, default=50)
+        parser.add_argument("--days", type=int, default=200)
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Times to re-run each query when measuring it.",
+        )
+        parser.add_argument(
+            "--fail-on-scan",
+            action="store_true",
+            help="Exit with an error if any query scans a large table.",
+        )
+
+    def handle(self, *args, **options):
+        with isolated_database():
+            started = time.perf_counter()
+            counts = seed(
+                teams=options["teams"],
+                participants=options["participants"],
+                days=options["days"],
+            )
+            self.stdout.write(
+                f"Seeded {counts['entries']} entries for "
+                f"{counts['participants']} participants in "
+                f"{time.perf_counter() - started:.1f}s"
+            )
+
+            client = Client()
+            client.force_login(User.objects.order_by("pk").first())
+
+            scans = []
+            for label, url_name in VIEWS:
+                scans += self.explain_view(
+                    client, label, reverse(url_name), options["repeat"]
+                )
+
+        if scans:
+            for label, table in scans:
+                self.stderr.write(f"{label}: full scan of {table}")
+            if options["fail_on_scan"]:
+                raise CommandError(f"{len(scans)} quer(ies) scan a large table.")
+
+    def explain_view(self, client, label, url, repeat):
+        # With the leaderboard cache on, the second request would be
+        # answered from it and the ranking queries never planned
+        with override_settings(STEPS_LEADERBOARD_CACHE=False):
+            client.get(url)  # Warm the session row and the page cache
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = client.get(url)
+                elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            self.style.MIGRATE_HEADING(
+                f"\n{label} ({url}) -> {response.status_code}, "
+                f"{len(captured)} queries, {elapsed * 1000:.1f} ms"
+            )
+        )
+
+        scans = []
+        for query in captured.captured_queries:
+            sql = query["sql"]
+            if not sql.lstrip().upper().startswith("SELECT") or "steps_" not in sql:
+                continue
+            with connection.cursor() as cursor:
+                self.stdout.write(f"\n  [{self.time_query(cursor, sql, repeat):.2f} ms] {sql}")
+                cursor.execute(f"{connection.ops.explain_query_prefix()} {sql}")
+                plan = [" ".join(str(col) for col in row[3:] or row) for row in cursor]
+            for line in plan:
+                self.stdout.write(f"      {line}")
+                scans += [
+                    (label, table)
+                    for table in LARGE_TABLES
+                    if line.startswith(f"SCAN {table}")
+                    and "COVERING INDEX" not in line
+                ]
+        return scans
+
+    def time_query(self, cursor, sql, repeat):
+        """Median wall time of ``sql`` in milliseconds, rows fetched."""
+        timings = []
+        for _ in range(max(repeat, 1)):
+            started = time.perf_counter()
+            cursor.execute(sql)
+            cursor.fetchall()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
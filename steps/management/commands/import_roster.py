@@ -0,0 +1,72 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from steps.models import StepChallenge
+from steps.roster import import_roster, parse_roster
+
+
+class Command(BaseCommand):
+    help = (
+        "Enroll a roster CSV (username, name, email, team, color) in a "
+        "challenge. Missing users, teams and participants are created "
+        "with bulk_create in one transaction; existing ones are left as "
+        "they are, so re-running the same file changes nothing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV file to read, or '-' for stdin.")
+        parser.add_argument(
+            "--challenge", type=int, required=True, help="Challenge id to enroll into."
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Rows per bulk_create INSERT.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Validate and report without writing anything.",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            challenge = StepChallenge.objects.get(pk=options["challenge"])
+        except StepChallenge.DoesNotExist:
+            raise CommandError(f"Challenge {options['challenge']} does not exist.")
+
+        try:
+            if options["path"] == "-":
+                rows, rejected = parse_roster(sys.stdin)
+            else:
+                with open(options["path"], newline="", encoding="utf-8-sig") as stream:
+                    rows, rejected = parse_roster(stream)
+            counts = import_roster(
+                challenge,
+                rows,
+                batch_size=options["batch_size"],
+                dry_run=options["dry_run"],
+            )
+        except OSError as exc:
+            raise CommandError(f"Cannot read {options['path']}: {exc}")
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        for line, reason in rejected:
+            self.stderr.write(f"line {line}: {reason}")
+
+        elapsed = time.perf_counter() - started
+        total = len(rows) + len(rejected)
+        verb = "Would enroll" if options["dry_run"] else "Enrolled"
+        self.stdout.write(
+            f"{verb} {counts['participants_created']} of {total} rows in "
+            f"{challenge.name}: {counts['users_created']} new users "
+            f"({counts['users_existing']} existing), {counts['teams_created']} "
+            f"new teams, {counts['already_enrolled']} already enrolled, "
+            f"rejected {len(rejected)} in {elapsed:.2f}s "
+            f"({total / elapsed if elapsed else 0:.0f} rows/s)"
+        )
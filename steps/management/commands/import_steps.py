@@ -0,0 +1,166 @@
+import csv
+import json
+import sys
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from steps.batch import chunked, save_entries, validate_entries
+from steps.models import Participant
+
+
+UNKNOWN_PARTICIPANT_ERROR = "Participant is not enrolled in this challenge."
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-import step entries from CSV or JSON Lines. Each row needs "
+        "'challenge', 'date', 'total_steps' and either 'username' or "
+        "'participant' (id). Rows are validated in memory with the same "
+        "rules as the entry form and written with bulk_create."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path",
+            help="File to read, or '-' for stdin.",
+        )
+        parser.add_argument(
+            "--format",
+            choices=("csv", "jsonl"),
+            help="Input format. Defaults to the file extension, csv for stdin.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Rows per bulk_create INSERT.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Validate and report without writing anything.",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        input_format = options["format"] or (
+            "jsonl" if options["path"].endswith((".jsonl", ".ndjson")) else "csv"
+        )
+
+        if options["path"] == "-":
+            rows, rejected = self.parse(sys.stdin, input_format)
+        else:
+            try:
+                with open(options["path"], newline="", encoding="utf-8") as stream:
+                    rows, rejected = self.parse(stream, input_format)
+            except OSError as exc:
+                raise CommandError(f"Cannot read {options['path']}: {exc}")
+
+        resolved, unresolved = self.resolve_participants(rows)
+        accepted, invalid = validate_entries(resolved)
+        rejected += unresolved + invalid
+
+        if not options["dry_run"]:
+            save_entries(accepted, batch_size=options["batch_size"])
+
+        for line, reason in sorted(rejected, key=lambda item: item[0]):
+            self.stderr.write(f"line {line}: {reason}")
+
+        elapsed = time.perf_counter() - started
+        total = len(accepted) + len(rejected)
+        verb = "Validated" if options["dry_run"] else "Imported"
+        self.stdout.write(
+            f"{verb} {len(accepted)} of {total} rows, rejected {len(rejected)} "
+            f"in {elapsed:.2f}s ({total / elapsed if elapsed else 0:.0f} rows/s)"
+        )
+
+    def parse(self, stream, input_format):
+        """
+        Read raw records into ``(line, participant, username, challenge_id,
+        date, total_steps)`` tuples, returning them with parse errors.
+        """
+        if input_format == "csv":
+            reader = csv.DictReader(stream)
+            records = ((reader.line_num, record) for record in reader)
+        else:
+            records = self.read_json_lines(stream)
+
+        rows, rejected = [], []
+        for line, record in records:
+            if isinstance(record, str):  # JSON decoding error
+                rejected.append((line, record))
+                continue
+            try:
+                participant = record.get("participant") or None
+                username = record.get("username") or None
+                if not participant and not username:
+                    raise ValueError("Either 'username' or 'participant' is required.")
+                rows.append((
+                    line,
+                    int(participant) if participant else None,
+                    username,
+                    int(record["challenge"]),
+                    date.fromisoformat(str(record["date"])),
+                    int(record["total_steps"]),
+                ))
+            except KeyError as exc:
+                rejected.append((line, f"Missing column {exc}."))
+            except (TypeError, ValueError) as exc:
+                rejected.append((line, f"Invalid value: {exc}"))
+        return rows, rejected
+
+    def read_json_lines(self, stream):
+        for line, text in enumerate(stream, start=1):
+            if not text.strip():
+                continue
+            try:
+                record = json.loads(text)
+            except ValueError as exc:
+                yield line, f"Invalid JSON: {exc}"
+                continue
+            if not isinstance(record, dict):
+                yield line, "Invalid JSON: expected an object."
+                continue
+            yield line, record
+
+    def resolve_participants(self, rows):
+        """
+        Map each row to a participant enrolled in its challenge, using one
+        query per chunk of usernames (or participant ids).
+        """
+        usernames = {username for _, pid, username, *_ in rows if not pid}
+        participant_ids = {pid for _, pid, *_ in rows if pid}
+
+        by_username = {}
+        for chunk in chunked(usernames):
+            enrolled = (
+                Participant.objects
+                .filter(user__username__in=chunk)
+                .values_list("user__username", "team__challenge_id", "pk")
+            )
+            for username, challenge_id, pk in enrolled:
+                by_username[(username, challenge_id)] = pk
+
+        by_id = {}
+        for chunk in chunked(participant_ids):
+            enrolled = (
+                Participant.objects
+                .filter(pk__in=chunk)
+                .values_list("pk", "team__challenge_id")
+            )
+            for pk, challenge_id in enrolled:
+                by_id[(pk, challenge_id)] = pk
+
+        resolved, rejected = [], []
+        for line, pid, username, challenge_id, day, total_steps in rows:
+            if pid:
+                participant_id = by_id.get((pid, challenge_id))
+            else:
+                participant_id = by_username.get((username, challenge_id))
+            if participant_id is None:
+                rejected.append((line, UNKNOWN_PARTICIPANT_ERROR))
+            else:
+                resolved.append((line, participant_id, challenge_id, day, total_steps))
+        return resolved, rejected
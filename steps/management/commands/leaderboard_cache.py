@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from steps import caching
+
+
+class Command(BaseCommand):
+    help = (
+        "Show leaderboard cache hit/miss counters. They are kept in the "
+        "cache itself, so this needs a backend shared with the server "
+        "processes (file-based, Redis, Memcached...), not locmem."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Reset the counters after printing them.",
+        )
+
+    def handle(self, *args, **options):
+        if not caching.counters_are_shared():
+            raise CommandError(
+                "The default cache is local to each process, so the server's "
+                "hit/miss counters cannot be read from here. Configure a "
+                "shared backend in CACHES (e.g. FileBasedCache) to use this "
+                "command."
+            )
+        counters = caching.stats()
+        lookups = counters["hits"] + counters["misses"]
+        ratio = counters["hits"] / lookups if lookups else 0
+        state = "enabled" if caching.is_enabled() else "disabled"
+        self.stdout.write(
+            f"Leaderboard cache ({state}): {counters['hits']} hits, "
+            f"{counters['misses']} misses ({ratio:.0%} hit rate)"
+        )
+        if options["reset"]:
+            caching.reset_stats()
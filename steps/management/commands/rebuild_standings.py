@@ -0,0 +1,159 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F
+
+from steps.caching import invalidate_challenge
+from steps.models import (
+    ChallengeDailyStats,
+    FinalStanding,
+    ParticipantStanding,
+    StepChallenge,
+    StepEntry,
+    delta_expression,
+    rank_totals,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the ParticipantStanding and ChallengeDailyStats tables, "
+        "each entry's step_delta and the final standings of closed "
+        "challenges from raw step entries, and verify them against live "
+        "totals."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--challenge",
+            type=int,
+            action="append",
+            dest="challenges",
+            help="Challenge id to process (repeatable). Defaults to all.",
+        )
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only compare the table with live totals; do not rebuild.",
+        )
+
+    def handle(self, *args, **options):
+        challenges = StepChallenge.objects.order_by("pk")
+        if options["challenges"]:
+            challenges = challenges.filter(pk__in=options["challenges"])
+
+        mismatched = []
+        for challenge in challenges:
+            if not options["check"]:
+                count = ParticipantStanding.objects.rebuild(challenge.pk)
+                days = ChallengeDailyStats.objects.rebuild(challenge.pk)
+                deltas = (
+                    StepEntry.objects
+                    .filter(challenge_id=challenge.pk)
+                    .update(step_delta=delta_expression())
+                )
+                self.stdout.write(
+                    f"{challenge}: rebuilt {count} standings, {days} daily stats, "
+                    f"{deltas} entry deltas"
+                )
+                if challenge.archived_at:
+                    count = FinalStanding.objects.freeze(challenge)
+                    self.stdout.write(f"{challenge}: refroze {count} final standings")
+                invalidate_challenge(challenge.pk)
+
+            problems = (
+                self.compare(challenge.pk)
+                + self.compare_daily_stats(challenge.pk)
+                + self.compare_deltas(challenge.pk)
+            )
+            if challenge.archived_at:
+                problems += [
+                    f"final standings: {problem}"
+                    for problem in self.compare(challenge.pk, FinalStanding.objects)
+                ]
+            for problem in problems:
+                self.stderr.write(f"{challenge}: {problem}")
+            if problems:
+                mismatched.append(challenge)
+            else:
+                self.stdout.write(f"{challenge}: standings match live totals")
+
+        if mismatched:
+            raise CommandError(
+                f"{len(mismatched)} challenge(s) have standings that do not "
+                "match their step entries."
+            )
+
+    def compare(self, challenge_id, table=ParticipantStanding.objects):
+        """Return human-readable differences between table and live totals."""
+        expected = {
+            participant_id: (team_id, steps, last_date, rank)
+            for participant_id, team_id, steps, last_date, rank in rank_totals(
+                ParticipantStanding.objects.live_totals(challenge_id)
+            )
+        }
+        stored = {
+            participant_id: (team_id, steps, last_date, rank)
+            for participant_id, team_id, steps, last_date, rank in (
+                table
+                .filter(challenge_id=challenge_id)
+                .values_list(
+                    "participant_id",
+                    "team_id",
+                    "total_steps",
+                    "last_entry_date",
+                    "rank",
+                )
+            )
+        }
+
+        problems = []
+        for participant_id in sorted(expected.keys() - stored.keys()):
+            problems.append(f"participant {participant_id} is missing")
+        for participant_id in sorted(stored.keys() - expected.keys()):
+            problems.append(f"participant {participant_id} should not be listed")
+        for participant_id in sorted(expected.keys() & stored.keys()):
+            if expected[participant_id] != stored[participant_id]:
+                problems.append(
+                    f"participant {participant_id}: stored "
+                    f"{stored[participant_id]}, expected {expected[participant_id]}"
+                )
+        return problems
+
+    def compare_daily_stats(self, challenge_id):
+        """Return differences between the daily rollup and raw entries."""
+        expected = {
+            day: values
+            for day, values in ChallengeDailyStats.objects.live_days(challenge_id).items()
+            if any(values)
+        }
+        stored = {
+            day: (delta, count)
+            for day, delta, count in (
+                ChallengeDailyStats.objects
+                .filter(challenge_id=challenge_id)
+                .values_list("date", "step_delta", "entry_count")
+            )
+            if delta or count
+        }
+
+        problems = []
+        for day in sorted(expected.keys() | stored.keys()):
+            if expected.get(day) != stored.get(day):
+                problems.append(
+                    f"{day}: stored (step_delta, entry_count) "
+                    f"{stored.get(day, (0, 0))}, expected {expected.get(day, (0, 0))}"
+                )
+        return problems
+
+    def compare_deltas(self, challenge_id):
+        """Return entries whose stored step_delta is out of date."""
+        wrong = (
+            StepEntry.objects
+            .filter(challenge_id=challenge_id)
+            .annotate(expected=delta_expression())
+            .exclude(step_delta=F("expected"))
+            .values_list("pk", "step_delta", "expected")
+        )
+        return [
+            f"entry {pk}: stored step_delta {stored}, expected {expected}"
+            for pk, stored, expected in wrong
+        ]
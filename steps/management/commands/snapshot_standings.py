@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from steps.caching import invalidate_challenge
+from steps.models import StandingSnapshot, StepChallenge
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the daily standings snapshots behind the leaderboard's "
+        "?as_of= view, for every finished day of each challenge. Days that "
+        "already have a snapshot are skipped, so this is cheap to run "
+        "nightly; pages only show the days built so far."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--challenge",
+            type=int,
+            action="append",
+            dest="challenges",
+            help="Challenge id to process (repeatable). Defaults to all.",
+        )
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Drop existing snapshots and build them again.",
+        )
+
+    def handle(self, *args, **options):
+        challenges = StepChallenge.objects.order_by("pk")
+        if options["challenges"]:
+            challenges = challenges.filter(pk__in=options["challenges"])
+
+        for challenge in challenges:
+            if options["rebuild"]:
+                StandingSnapshot.objects.invalidate(challenge.pk)
+                invalidate_challenge(challenge.pk)
+            days = StandingSnapshot.objects.build(challenge)
+            if days:
+                invalidate_challenge(challenge.pk)  # Widens the date picker
+            self.stdout.write(f"{challenge}: built {days} day(s) of snapshots")
@@ -0,0 +1,192 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils.timezone import now
+
+from steps.batch import drain_submissions
+from steps.benchmarks import isolated_database
+from steps.models import Participant, StepChallenge, StepEntry, Team
+
+
+# Connection OPTIONS compared by the stress test
+PROFILES = ("defaults", "production")
+
+
+def profile_options(profile):
+    """Django's stock SQLite options, or the tuned ones from settings."""
+    if profile == "defaults":
+        return {}
+    return dict(settings.DATABASES["default"].get("OPTIONS", {}))
+
+
+def error_kind(exc):
+    """Bucket a failed request: SQLite lock errors versus anything else."""
+    if isinstance(exc, OperationalError) and "locked" in str(exc):
+        return "lock_errors"
+    return "other_errors"
+
+
+class Command(BaseCommand):
+    help = (
+        "Hammer the add-entry form with concurrent writers against a "
+        "throwaway SQLite file database, once with Django's default "
+        "connection options and once with the production profile from "
+        "settings, and print write throughput and lock errors as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--threads", type=int, default=16, help="Concurrent writers."
+        )
+        parser.add_argument(
+            "--entries",
+            type=int,
+            default=20,
+            help="Entries each writer submits, one per challenge day.",
+        )
+        parser.add_argument(
+            "--profile",
+            choices=PROFILES,
+            action="append",
+            help="Run only this profile (repeatable).",
+        )
+        parser.add_argument(
+            "--write-behind",
+            action="store_true",
+            help="Queue submissions (STEPS_WRITE_BEHIND) and drain them afterwards.",
+        )
+        parser.add_argument(
+            "--fail-on-lock",
+            action="store_true",
+            help="Exit with an error if the production profile hit a lock error.",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("stress_entries only applies to the SQLite backend.")
+
+        results = {}
+        for profile in options["profile"] or PROFILES:
+            with tempfile.TemporaryDirectory() as directory:
+                with isolated_database(
+                    name=os.path.join(directory, "stress.sqlite3"),
+                    options=profile_options(profile),
+                ):
+                    users, challenge = self.setup_challenge(
+                        options["threads"], options["entries"]
+                    )
+                    with override_settings(STEPS_WRITE_BEHIND=options["write_behind"]):
+                        results[profile] = self.run(users, challenge, options["entries"])
+                    if options["write_behind"]:
+                        results[profile].update(self.drain(challenge))
+            self.stderr.write(
+                f"{profile}: {results[profile]['written']} entries in "
+                f"{results[profile]['seconds']:.2f}s "
+                f"({results[profile]['entries_per_second']:.0f}/s), "
+                f"{results[profile]['lock_errors']} lock errors"
+            )
+
+        self.stdout.write(json.dumps({
+            "meta": {
+                "threads": options["threads"],
+                "entries": options["entries"],
+                "write_behind": options["write_behind"],
+            },
+            "results": results,
+        }, indent=2))
+
+        if options["fail_on_lock"] and results.get("production", {}).get("lock_errors"):
+            raise CommandError("The production profile hit database lock errors.")
+
+    def setup_challenge(self, writers, days):
+        """One open challenge ending today and a participant per writer."""
+        today = now().date()
+        challenge = StepChallenge.objects.create(
+            name="Stress",
+            start_date=today - timedelta(days=days - 1),
+            end_date=today,
+            is_active=True,
+        )
+        team = Team.objects.create(challenge=challenge, name="Stress", color="#6c63ff")
+        users = []
+        for n in range(writers):
+            user = User.objects.create(username=f"stress{n}", password="!")
+            Participant.objects.create(user=user, team=team)
+            users.append(user)
+        return users, challenge
+
+    def drain(self, challenge):
+        """Save the queued submissions, as the drain_submissions worker would."""
+        started = time.perf_counter()
+        while drain_submissions() != (0, 0):
+            pass
+        return {
+            "stored": StepEntry.objects.filter(challenge=challenge).count(),
+            "drain_seconds": round(time.perf_counter() - started, 3),
+        }
+
+    def run(self, users, challenge, days):
+        """Submit every writer's entries from its own thread and connection."""
+        url = reverse("steps-add-entry")
+        start = threading.Barrier(len(users))
+        outcomes = Counter()
+        lock = threading.Lock()
+
+        def write(user):
+            client = Client()
+            client.force_login(user)
+            start.wait()  # Everybody submits at once
+            tally = Counter()
+            try:
+                for day in range(days):
+                    try:
+                        response = client.post(url, {
+                            "challenge": challenge.pk,
+                            "date": (challenge.start_date + timedelta(days=day)).isoformat(),
+                            "total_steps": (day + 1) * 1000,
+                        })
+                    except Exception as exc:
+                        tally[error_kind(exc)] += 1
+                    else:
+                        tally["written" if response.status_code == 302 else "other_errors"] += 1
+            finally:
+                connections.close_all()
+            with lock:
+                outcomes.update(tally)
+
+        # Failed requests are counted; their tracebacks would drown the report
+        request_logger = logging.getLogger("django.request")
+        request_logger.disabled = True
+        threads = [threading.Thread(target=write, args=(user,)) for user in users]
+        started = time.perf_counter()
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            request_logger.disabled = False
+        elapsed = time.perf_counter() - started
+
+        stored = StepEntry.objects.filter(challenge=challenge).count()
+        return {
+            "attempted": len(users) * days,
+            "written": outcomes["written"],
+            "stored": stored,
+            "lock_errors": outcomes["lock_errors"],
+            "other_errors": outcomes["other_errors"],
+            "seconds": round(elapsed, 3),
+            "entries_per_second": round(outcomes["written"] / elapsed, 1) if elapsed else None,
+        }
@@ -0,0 +1,136 @@
+"""
+Per-request timing: database, template rendering and total time.
+
+``ServerTimingMiddleware`` adds a ``Server-Timing`` header that browser
+dev tools show next to each request, e.g.::
+
+    Server-Timing: db;dur=4.1;desc="6 queries", render;dur=2.3, total;dur=9.8
+
+and can log a sampled line per request with the resolved URL name to
+the ``steps.profiling`` logger. Settings:
+
+- ``STEPS_SERVER_TIMING``: add the header to every response
+- ``STEPS_PROFILE_SAMPLE_RATE``: fraction of requests to log (0 to 1)
+
+With both off the middleware removes itself at startup
+(``MiddlewareNotUsed``), so it costs nothing; with only sampling on,
+unsampled requests skip all measuring. It works under both WSGI and
+ASGI, so async views (and their streaming responses) are not forced
+through a thread by an adapter.
+"""
+import logging
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+
+logger = logging.getLogger("steps.profiling")
+
+
+class RequestTimings:
+    """Counters for one request; also the ``execute_wrapper`` hook."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db = 0.0
+        self.render = 0.0
+        self.render_started = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db += time.perf_counter() - started
+
+    def start_render(self):
+        self.render_started = time.perf_counter()
+
+    def end_render(self, response):
+        self.render += time.perf_counter() - self.render_started
+        return response
+
+    def header(self, total):
+        return (
+            f'db;dur={self.db * 1000:.1f};desc="{self.queries} queries", '
+            f"render;dur={self.render * 1000:.1f}, "
+            f"total;dur={total * 1000:.1f}"
+        )
+
+
+class ServerTimingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.header = getattr(settings, "STEPS_SERVER_TIMING", False)
+        self.sample_rate = getattr(settings, "STEPS_PROFILE_SAMPLE_RATE", 0)
+        if not self.header and not self.sample_rate:
+            raise MiddlewareNotUsed
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        sampled = self.sample_rate and random.random() < self.sample_rate
+        if not (self.header or sampled):
+            return self.get_response(request)
+
+        timings = request.steps_timings = RequestTimings()
+        with connection.execute_wrapper(timings):
+            response = self.get_response(request)
+        return self.finish(request, response, timings, sampled)
+
+    async def __acall__(self, request):
+        sampled = self.sample_rate and random.random() < self.sample_rate
+        if not (self.header or sampled):
+            return await self.get_response(request)
+
+        # ORM calls of async views, and sync views under ASGI, run in the
+        # request's thread-sensitive worker thread: hook that thread's
+        # connection (looked up there, not on the event loop)
+        timings = request.steps_timings = RequestTimings()
+        await sync_to_async(lambda: connection.execute_wrappers.append(timings))()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(lambda: connection.execute_wrappers.remove(timings))()
+        return self.finish(request, response, timings, sampled)
+
+    def finish(self, request, response, timings, sampled):
+        total = time.perf_counter() - timings.started
+
+        if self.header:
+            response["Server-Timing"] = timings.header(total)
+        if sampled:
+            match = request.resolver_match
+            logger.info(
+                "%s %s %s %s total=%.1fms db=%.1fms queries=%d render=%.1fms",
+                request.method,
+                request.path,
+                match.view_name if match else "-",
+                response.status_code,
+                total * 1000,
+                timings.db * 1000,
+                timings.queries,
+                timings.render * 1000,
+            )
+        return response
+
+    def process_template_response(self, request, response):
+        # Called just before a TemplateResponse is rendered
+        timings = getattr(request, "steps_timings", None)
+        if timings is not None:
+            timings.start_render()
+            response.add_post_render_callback(timings.end_render)
+        return response
@@ -0,0 +1,76 @@
+# Generated by Django 6.0.1 on 2026-10-18 01:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def populate_standings(apps, schema_editor):
+    Participant = apps.get_model("steps", "Participant")
+    ParticipantStanding = apps.get_model("steps", "ParticipantStanding")
+    StepEntry = apps.get_model("steps", "StepEntry")
+
+    latest_entry = (
+        StepEntry.objects
+        .filter(participant=OuterRef("pk"), challenge=OuterRef("team__challenge"))
+        .order_by("-date")
+    )
+    rows = (
+        Participant.objects
+        .annotate(
+            latest_steps=Subquery(latest_entry.values("total_steps")[:1]),
+            latest_date=Subquery(latest_entry.values("date")[:1]),
+        )
+        .values_list("pk", "team_id", "team__challenge_id", "latest_steps", "latest_date")
+        .order_by("team__challenge_id")
+    )
+
+    by_challenge = {}
+    for pk, team_id, challenge_id, steps, latest_date in rows:
+        by_challenge.setdefault(challenge_id, []).append(
+            (pk, team_id, steps or 0, latest_date)
+        )
+
+    standings = []
+    for challenge_id, members in by_challenge.items():
+        members.sort(key=lambda row: (-row[2], row[0]))
+        rank, previous = 0, None
+        for position, (pk, team_id, steps, latest_date) in enumerate(members, start=1):
+            if steps != previous:
+                rank, previous = position, steps
+            standings.append(ParticipantStanding(
+                challenge_id=challenge_id,
+                participant_id=pk,
+                team_id=team_id,
+                total_steps=steps,
+                last_entry_date=latest_date,
+                rank=rank,
+            ))
+    ParticipantStanding.objects.bulk_create(standings, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('steps', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ParticipantStanding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_steps', models.PositiveIntegerField(default=0)),
+                ('last_entry_date', models.DateField(blank=True, null=True)),
+                ('rank', models.PositiveIntegerField(default=1)),
+                ('challenge', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standings', to='steps.stepchallenge')),
+                ('participant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standings', to='steps.participant')),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standings', to='steps.team')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['challenge', 'rank', 'participant'], name='standing_rank_idx'), models.Index(fields=['challenge', 'total_steps'], name='standing_total_idx')],
+                'unique_together': {('challenge', 'participant')},
+            },
+        ),
+        migrations.RunPython(populate_standings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 6.0.1 on 2026-10-18 01:36
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('steps', '0002_participantstanding'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='participant',
+            index=models.Index(fields=['team', 'user'], name='participant_team_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stepentry',
+            index=models.Index(fields=['challenge', 'participant', '-date'], name='entry_challenge_part_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stepentry',
+            index=models.Index(fields=['challenge', '-date'], name='entry_challenge_date_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 6.0.1 on 2026-10-18 01:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('steps', '0003_entry_and_participant_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='participantstanding',
+            name='standing_rank_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='participantstanding',
+            name='standing_total_idx',
+        ),
+        migrations.AddIndex(
+            model_name='participantstanding',
+            index=models.Index(fields=['challenge', '-total_steps', 'participant'], name='standing_steps_idx'),
+        ),
+    ]
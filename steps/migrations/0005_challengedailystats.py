@@ -0,0 +1,65 @@
+# Generated by Django 6.0.1 on 2026-10-18 01:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_daily_stats(apps, schema_editor):
+    ChallengeDailyStats = apps.get_model("steps", "ChallengeDailyStats")
+    StepEntry = apps.get_model("steps", "StepEntry")
+
+    entries = (
+        StepEntry.objects
+        .order_by("participant_id", "challenge_id", "date")
+        .values_list("participant_id", "challenge_id", "date", "total_steps")
+        .iterator(chunk_size=2000)
+    )
+
+    days = {}
+    previous_key, previous_total = None, 0
+    for participant_id, challenge_id, day, total in entries:
+        if (participant_id, challenge_id) != previous_key:
+            previous_key, previous_total = (participant_id, challenge_id), 0
+        row = days.setdefault((challenge_id, day), [0, 0])
+        row[0] += total - previous_total
+        row[1] += 1
+        previous_total = total
+
+    ChallengeDailyStats.objects.bulk_create(
+        (
+            ChallengeDailyStats(
+                challenge_id=challenge_id,
+                date=day,
+                step_delta=delta,
+                entry_count=count,
+            )
+            for (challenge_id, day), (delta, count) in days.items()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('steps', '0004_standing_keyset_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChallengeDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('step_delta', models.BigIntegerField(default=0)),
+                ('entry_count', models.IntegerField(default=0)),
+                ('challenge', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='steps.stepchallenge')),
+            ],
+            options={
+                'verbose_name_plural': 'challenge daily stats',
+                'ordering': ['date'],
+                'unique_together': {('challenge', 'date')},
+            },
+        ),
+        migrations.RunPython(populate_daily_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 6.0.1 on 2026-10-18 02:32
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_step_deltas(apps, schema_editor):
+    StepEntry = apps.get_model("steps", "StepEntry")
+
+    previous_total = (
+        StepEntry.objects
+        .filter(
+            participant_id=OuterRef("participant_id"),
+            challenge_id=OuterRef("challenge_id"),
+            date__lt=OuterRef("date"),
+        )
+        .order_by("-date")
+        .values("total_steps")[:1]
+    )
+    StepEntry.objects.update(
+        step_delta=F("total_steps") - Coalesce(Subquery(previous_total), 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('steps', '0005_challengedailystats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stepentry',
+            name='step_delta',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_step_deltas, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 6.0.1 on 2026-10-18 02:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('steps', '0006_stepentry_step_delta'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StandingSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('total_steps', models.PositiveIntegerField(default=0)),
+                ('rank', models.PositiveIntegerField(default=1)),
+                ('challenge', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standing_snapshots', to='steps.stepchallenge')),
+                ('participant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='steps.participant')),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='participant_snapshots', to='steps.team')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['challenge', 'date', '-total_steps', 'participant'], name='snapshot_steps_idx')],
+                'unique_together': {('challenge', 'date', 'participant')},
+            },
+        ),
+        migrations.CreateModel(
+            name='TeamSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('total_steps', models.PositiveBigIntegerField(default=0)),
+                ('rank', models.PositiveIntegerField(default=1)),
+                ('challenge', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='team_snapshots', to='steps.stepchallenge')),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='steps.team')),
+            ],
+            options={
+                'ordering': ['date', 'rank'],
+                'unique_together': {('challenge', 'date', 'team')},
+            },
+        ),
+    ]
@@ -0,0 +1,97 @@
+# Generated by Django 6.0.1 on 2026-10-18 02:47
+
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils.timezone import now
+
+
+def freeze_closed_challenges(apps, schema_editor):
+    """Archive the standings rows of challenges that are already closed."""
+    StepChallenge = apps.get_model("steps", "StepChallenge")
+    ParticipantStanding = apps.get_model("steps", "ParticipantStanding")
+    FinalStanding = apps.get_model("steps", "FinalStanding")
+    FinalTeamStanding = apps.get_model("steps", "FinalTeamStanding")
+
+    for challenge in StepChallenge.objects.filter(is_active=False):
+        standings = list(ParticipantStanding.objects.filter(challenge=challenge))
+        FinalStanding.objects.bulk_create(
+            [
+                FinalStanding(
+                    challenge=challenge,
+                    participant_id=standing.participant_id,
+                    team_id=standing.team_id,
+                    total_steps=standing.total_steps,
+                    last_entry_date=standing.last_entry_date,
+                    rank=standing.rank,
+                )
+                for standing in standings
+            ],
+            batch_size=1000,
+        )
+
+        team_steps = defaultdict(int)
+        for standing in standings:
+            team_steps[standing.team_id] += standing.total_steps
+        ordered = sorted(team_steps.items(), key=lambda item: (-item[1], item[0]))
+        team_rows = []
+        rank = 0
+        previous_steps = None
+        for position, (team_id, steps) in enumerate(ordered, start=1):
+            if steps != previous_steps:
+                rank = position
+                previous_steps = steps
+            team_rows.append(FinalTeamStanding(
+                challenge=challenge, team_id=team_id, total_steps=steps, rank=rank
+            ))
+        FinalTeamStanding.objects.bulk_create(team_rows)
+
+        challenge.archived_at = now()
+        challenge.save(update_fields=["archived_at"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('steps', '0007_standing_snapshots'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stepchallenge',
+            name='archived_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name='FinalStanding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_steps', models.PositiveIntegerField(default=0)),
+                ('last_entry_date', models.DateField(blank=True, null=True)),
+                ('rank', models.PositiveIntegerField(default=1)),
+                ('challenge', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='final_standings', to='steps.stepchallenge')),
+                ('participant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='final_standings', to='steps.participant')),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='final_standings', to='steps.team')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['challenge', '-total_steps', 'participant'], name='final_steps_idx')],
+                'unique_together': {('challenge', 'participant')},
+            },
+        ),
+        migrations.CreateModel(
+            name='FinalTeamStanding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_steps', models.PositiveBigIntegerField(default=0)),
+                ('rank', models.PositiveIntegerField(default=1)),
+                ('challenge', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='final_team_standings', to='steps.stepchallenge')),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='final_team_standings', to='steps.team')),
+            ],
+            options={
+                'ordering': ['rank'],
+                'unique_together': {('challenge', 'team')},
+            },
+        ),
+        migrations.RunPython(freeze_closed_challenges, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-18 03:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('steps', '0008_final_standings'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='stepentry',
+            index=models.Index(fields=['-date'], name='entry_date_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 6.0.1 on 2026-10-18 03:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('steps', '0009_entry_date_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingSubmission',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('total_steps', models.PositiveIntegerField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('created', 'Created'), ('rejected', 'Rejected')], default='pending', max_length=10)),
+                ('error', models.CharField(blank=True, max_length=200)),
+                ('submitted_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('challenge', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='submissions', to='steps.stepchallenge')),
+                ('entry', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='steps.stepentry')),
+                ('participant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='submissions', to='steps.participant')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'id'], name='submission_status_idx')],
+            },
+        ),
+    ]
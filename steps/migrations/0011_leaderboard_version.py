@@ -0,0 +1,21 @@
+# Generated by Django 6.0.1 on 2026-10-18 04:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('steps', '0010_pending_submissions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardVersion',
+            fields=[
+                ('challenge_id', models.PositiveIntegerField(primary_key=True, serialize=False)),
+                ('version', models.PositiveBigIntegerField(default=1)),
+                ('changed_at', models.DateTimeField()),
+            ],
+        ),
+    ]
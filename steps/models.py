@@ -1,6 +1,39 @@
-from django.db import models
+import bisect
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import models, transaction
+from django.db.models import Count, F, Max, Min, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce, Now
+from django.db.models.signals import pre_delete
 from django.contrib.auth.models import User
+from django.dispatch import receiver
 from django.forms import ValidationError
+from django.utils.timezone import now
+
+from .caching import invalidate_challenge
+from .live import publish_on_commit
+
+
+# Validation messages shared by StepEntry.clean() and batch imports
+CLOSED_CHALLENGE_ERROR = "This challenge is closed. Steps can no longer be added."
+DATE_OUTSIDE_CHALLENGE_ERROR = "Step date must be within the challenge period."
+DECREASING_STEPS_ERROR = "Total steps cannot be less than your previous entry."
+EXCEEDS_NEXT_ENTRY_ERROR = "Total steps cannot be more than your next entry."
+
+# StepEntry columns that standings and the other derived tables depend on
+ENTRY_SOURCE_FIELDS = {
+    "participant", "participant_id", "challenge", "challenge_id", "date", "total_steps",
+}
+
+
+class StepChallengeQuerySet(models.QuerySet):
+    def delete(self):
+        challenge_ids = list(self.values_list("pk", flat=True))
+        result = super().delete()
+        for challenge_id in challenge_ids:
+            invalidate_challenge(challenge_id)
+        return result
 
 
 class StepChallenge(models.Model):
@@ -16,10 +49,89 @@ class StepChallenge(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Set while the final standings are frozen in FinalStanding
+    archived_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = StepChallengeQuerySet.as_manager()
+
+    def save(self, *args, **kwargs):
+        # Closing freezes the final standings; reopening discards them.
+        # Challenges created closed (imports, fixtures) stay live until
+        # they are next saved.
+        freeze = not self._state.adding and not self.is_active and not self.archived_at
+        discard = self.is_active and self.archived_at is not None
+        with transaction.atomic():
+            if freeze:
+                self.archived_at = now()
+            elif discard:
+                self.archived_at = None
+            super().save(*args, **kwargs)
+            if freeze:
+                FinalStanding.objects.freeze(self)
+            elif discard:
+                FinalStanding.objects.discard(self.pk)
+        invalidate_challenge(self.pk)
+
+    def delete(self, *args, **kwargs):
+        challenge_id = self.pk
+        result = super().delete(*args, **kwargs)
+        invalidate_challenge(challenge_id)
+        return result
+
     def __str__(self):
         return self.name
 
 
+class LeaderboardVersionManager(models.Manager):
+    def bump(self, challenge_id):
+        if not self.filter(pk=challenge_id).update(version=F("version") + 1, changed_at=Now()):
+            self.get_or_create(challenge_id=challenge_id, defaults={"changed_at": Now()})
+
+    def current(self, challenge_id):
+        """``(version, changed_at)``; ``(0, None)`` before the first write."""
+        row = self.filter(pk=challenge_id).values_list("version", "changed_at").first()
+        return row or (0, None)
+
+
+class LeaderboardVersion(models.Model):
+    """
+    Database copy of a challenge's cache version: bumped by
+    caching.invalidate_challenge() once a write commits, and the source
+    of the JSON APIs' ETag and Last-Modified. Unlike the cache, every
+    server process sees the same row.
+
+    Keyed by the bare challenge id (no foreign key), so the bump after a
+    challenge delete has nothing to violate and a reused id only ever
+    counts upwards.
+    """
+
+    challenge_id = models.PositiveIntegerField(primary_key=True)
+    version = models.PositiveBigIntegerField(default=1)
+    changed_at = models.DateTimeField()
+
+    objects = LeaderboardVersionManager()
+
+    def __str__(self):
+        return f"Challenge {self.challenge_id} v{self.version}"
+
+
+class TeamQuerySet(models.QuerySet):
+    def delete(self):
+        """
+        Delete teams after their members' entries, which go through
+        StepEntryQuerySet.delete() so standings follow. The members are
+        then at zero steps, so their standings rows (removed by the
+        cascade) leave no gaps in the ranks of everyone else.
+        """
+        with transaction.atomic():
+            challenge_ids = set(self.values_list("challenge_id", flat=True))
+            StepEntry.objects.filter(participant__team__in=self).delete()
+            result = super().delete()
+        for challenge_id in challenge_ids:
+            invalidate_challenge(challenge_id)
+        return result
+
+
 class Team(models.Model):
     challenge = models.ForeignKey(
         StepChallenge,
@@ -33,10 +145,39 @@ class Team(models.Model):
         help_text="Hex color code, e.g. #6c63ff"
     )
 
+    objects = TeamQuerySet.as_manager()
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        invalidate_challenge(self.challenge_id)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            # Entries first, so what is derived from them follows
+            StepEntry.objects.filter(participant__team=self).delete()
+            result = super().delete(*args, **kwargs)
+        invalidate_challenge(self.challenge_id)
+        return result
+
     def __str__(self):
         return f"{self.name} ({self.challenge.name})"
 
 
+class ParticipantQuerySet(models.QuerySet):
+    def delete(self):
+        """
+        Delete participants after their entries, as TeamQuerySet.delete()
+        does for whole teams.
+        """
+        with transaction.atomic():
+            challenge_ids = set(self.values_list("team__challenge_id", flat=True))
+            StepEntry.objects.filter(participant__in=self).delete()
+            result = super().delete()
+        for challenge_id in challenge_ids:
+            invalidate_challenge(challenge_id)
+        return result
+
+
 class Participant(models.Model):
     user = models.ForeignKey(
         User,
@@ -51,10 +192,172 @@ class Participant(models.Model):
 
     joined_at = models.DateTimeField(auto_now_add=True)
 
+    objects = ParticipantQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # "Is this user in that challenge?" lookups join through team
+            models.Index(fields=["team", "user"], name="participant_team_user_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            adding = self._state.adding
+            stored_team_id = None
+            if self.pk:
+                stored_team_id = (
+                    Participant.objects
+                    .filter(pk=self.pk)
+                    .values_list("team_id", flat=True)
+                    .first()
+                )
+            super().save(*args, **kwargs)
+            # Every participant gets a standings row, even before logging steps
+            ParticipantStanding.objects.sync_participant(self)
+            if stored_team_id not in (None, self.team_id):
+                # Team totals moved from the first entry on: those days
+                # are rebuilt. The days before it keep their rows, which
+                # follow the participant to the new team
+                first_entry = (
+                    StepEntry.objects
+                    .filter(participant=self, challenge_id=self.team.challenge_id)
+                    .aggregate(Min("date"))["date__min"]
+                )
+                if first_entry:
+                    StandingSnapshot.objects.invalidate(
+                        self.team.challenge_id, since=first_entry
+                    )
+                StandingSnapshot.objects.filter(participant=self).update(
+                    team_id=self.team_id
+                )
+            if adding or stored_team_id not in (None, self.team_id):
+                # A closed challenge's archive lists every participant
+                FinalStanding.objects.refreeze(self.team.challenge_id)
+        invalidate_challenge(self.team.challenge_id)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            StepEntry.objects.filter(participant=self).delete()
+            ParticipantStanding.objects.remove_participant(self.pk)
+            result = super().delete(*args, **kwargs)
+        invalidate_challenge(self.team.challenge_id)
+        return result
+
     def __str__(self):
         return self.user.get_full_name() or self.user.username
 
 
+@receiver(pre_delete, sender=User)
+def delete_participations(sender, instance, **kwargs):
+    """A deleted user's participations go the maintained way, not by cascade."""
+    Participant.objects.filter(user=instance).delete()
+
+
+class StepEntryQuerySet(models.QuerySet):
+    """
+    Keyset navigation over entries, newest first.
+
+    Bulk deletes and updates of totals, dates or owners refresh the
+    deltas, daily stats and standings of everyone they touch, like
+    StepEntry.save()/delete() do for one entry; the admin's "delete selected" action and Participant
+    and Team deletes go through here.
+    """
+
+    def delete(self):
+        with transaction.atomic():
+            touched = list(self.values_list("participant_id", "challenge_id", "date"))
+            result = super().delete()
+            self._refresh_derived(touched)
+        return result
+
+    def update(self, **kwargs):
+        if not ENTRY_SOURCE_FIELDS & kwargs.keys():
+            # Derived columns such as step_delta are written as they are
+            return super().update(**kwargs)
+        with transaction.atomic():
+            rows = list(self.values_list("pk", "participant_id", "challenge_id", "date"))
+            updated = super().update(**kwargs)
+            touched = [row[1:] for row in rows]
+            pks = [row[0] for row in rows]
+            # Chunked to stay below SQLite's bound-parameter limit
+            for start in range(0, len(pks), 500):
+                touched += StepEntry.objects.filter(
+                    pk__in=pks[start:start + 500]
+                ).values_list("participant_id", "challenge_id", "date")
+            self._refresh_derived(touched)
+        return updated
+
+    def _refresh_derived(self, touched):
+        """
+        Refresh what depends on the ``(participant_id, challenge_id,
+        date)`` entries a bulk write removed or changed, as
+        batch.save_entries() does after an import.
+        """
+        pairs = {(participant_id, challenge_id) for participant_id, challenge_id, _ in touched}
+        # Entries after a removed or moved one now follow another entry
+        StepEntry.objects.refresh_deltas_many(pairs)
+        ChallengeDailyStats.objects.recompute_days(touched)
+        ParticipantStanding.objects.refresh_many(pairs)
+        earliest = {}
+        for _, challenge_id, day in touched:
+            earliest[challenge_id] = min(day, earliest.get(challenge_id, day))
+        for challenge_id, since in earliest.items():
+            # Too many rows for in-place updates: the next build redoes them
+            StandingSnapshot.objects.invalidate(challenge_id, since=since)
+            FinalStanding.objects.refreeze(challenge_id)
+            invalidate_challenge(challenge_id)
+            # Many rows may have moved: live leaderboards reload instead
+            publish_on_commit(challenge_id, {"type": "reset"})
+
+    def newest(self):
+        return self.order_by("-date", "-id")
+
+    def older_than(self, day, entry_id):
+        """Entries listed after the given one, newest first."""
+        return self.filter(
+            Q(date__lt=day) | Q(date=day, id__lt=entry_id)
+        ).newest()
+
+    def newer_than(self, day, entry_id):
+        """Entries listed before the given one, nearest first."""
+        return self.filter(
+            Q(date__gt=day) | Q(date=day, id__gt=entry_id)
+        ).order_by("date", "id")
+
+    def refresh_deltas(self, participant_id, challenge_id, after=None):
+        """
+        Recompute ``step_delta`` of one participant's entries in a
+        challenge with a single UPDATE.
+
+        With ``after`` (a list of dates), only the first entry after each
+        date is touched: the entries whose previous entry changes when
+        one on that date is written or removed.
+        """
+        history = self.filter(participant_id=participant_id, challenge_id=challenge_id)
+        targets = history
+        if after is not None:
+            following = Q(pk__in=[])
+            for day in after:
+                following |= Q(
+                    pk__in=history.filter(date__gt=day).order_by("date").values("pk")[:1]
+                )
+            targets = history.filter(following)
+        return targets.update(step_delta=delta_expression())
+
+    def refresh_deltas_many(self, pairs, chunk_size=500):
+        """refresh_deltas() for many ``(participant_id, challenge_id)`` pairs."""
+        participant_ids = sorted({participant_id for participant_id, _ in pairs})
+        challenge_ids = {challenge_id for _, challenge_id in pairs}
+        updated = 0
+        # Chunked to stay below SQLite's bound-parameter limit
+        for start in range(0, len(participant_ids), chunk_size):
+            updated += self.filter(
+                participant_id__in=participant_ids[start:start + chunk_size],
+                challenge_id__in=challenge_ids,
+            ).update(step_delta=delta_expression())
+        return updated
+
+
 class StepEntry(models.Model):
     participant = models.ForeignKey(
         Participant,
@@ -73,11 +376,31 @@ class StepEntry(models.Model):
     # Cumulative steps entered by the participant
     total_steps = models.PositiveIntegerField()
 
+    # Steps added since the participant's previous entry, kept up to date
+    # on every write so per-day series need no differencing
+    step_delta = models.IntegerField(default=0, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = StepEntryQuerySet.as_manager()
+
     class Meta:
         unique_together = ("participant", "challenge", "date")
         ordering = ["date"]
+        indexes = [
+            # Latest / previous entry of one participant in a challenge
+            models.Index(
+                fields=["challenge", "participant", "-date"],
+                name="entry_challenge_part_date_idx",
+            ),
+            # Challenge-wide activity feeds and aggregates
+            models.Index(
+                fields=["challenge", "-date"],
+                name="entry_challenge_date_idx",
+            ),
+            # Admin changelist (newest first) and its date hierarchy
+            models.Index(fields=["-date"], name="entry_date_idx"),
+        ]
 
     def clean(self):
         if not self.participant_id or not self.challenge_id:
@@ -85,36 +408,203 @@ class StepEntry(models.Model):
         
         # Block if challenge is closed by admin
         if not self.challenge.is_active:
-            raise ValidationError(
-                "This challenge is closed. Steps can no longer be added."
-            )
+            raise ValidationError(CLOSED_CHALLENGE_ERROR)
 
         # Ensure step date is within challenge window
         if not (self.challenge.start_date <= self.date <= self.challenge.end_date):  # noqa: E501
-            raise ValidationError(
-                "Step date must be within the challenge period."
-            )
+            raise ValidationError(DATE_OUTSIDE_CHALLENGE_ERROR)
 
-        # Ensure cumulative steps never decrease
-        previous_entry = (
-            StepEntry.objects
-            .filter(
-                participant=self.participant,
-                challenge=self.challenge,
-                date__lt=self.date
-            )
-            .order_by("-date")
-            .first()
-        )
+        # Ensure cumulative steps never decrease, before or after this day
+        previous_entry, _, next_entry = self.neighbours()
 
         if previous_entry and self.total_steps < previous_entry.total_steps:
-            raise ValidationError(
-                "Total steps cannot be less than your previous entry."
+            raise ValidationError(DECREASING_STEPS_ERROR)
+
+        if next_entry and self.total_steps > next_entry.total_steps:
+            raise ValidationError(EXCEEDS_NEXT_ENTRY_ERROR)
+
+        self.step_delta = self.total_steps - (
+            previous_entry.total_steps if previous_entry else 0
+        )
+
+    def neighbours(self):
+        """
+        ``(previous, same_day, next)`` entries of this participant in the
+        challenge around ``date``, other than this one, as named tuples
+        of ``pk``, ``date`` and ``total_steps`` (or None), in one query.
+        Remembered until the next call, for upsert().
+        """
+        history = StepEntry.objects.filter(
+            participant_id=self.participant_id, challenge_id=self.challenge_id
+        )
+        if self.pk:
+            history = history.exclude(pk=self.pk)
+        rows = history.filter(
+            Q(pk__in=history.filter(date__lt=self.date).order_by("-date").values("pk")[:1])
+            | Q(date=self.date)
+            | Q(pk__in=history.filter(date__gt=self.date).order_by("date").values("pk")[:1])
+        ).values_list("pk", "date", "total_steps", named=True)
+
+        previous = same_day = following = None
+        for row in rows:
+            if row.date < self.date:
+                previous = row
+            elif row.date > self.date:
+                following = row
+            else:
+                same_day = row
+        self._neighbours = (previous, same_day, following)
+        return self._neighbours
+
+    def upsert(self):
+        """
+        Save a new entry, replacing the participant's entry on the same
+        date if there is one, with a single ``INSERT ... ON CONFLICT DO
+        UPDATE``. Validated like save(), except that the date may be
+        taken; returns True if a row was inserted.
+        """
+        if self.pk:
+            raise ValueError("upsert() is for new entries; use save() to edit one.")
+        with transaction.atomic():
+            # Foreign keys are left to the database; the date may be taken
+            self.full_clean(exclude=["participant", "challenge"], validate_unique=False)
+            previous_entry, replaced, next_entry = self._neighbours
+
+            StepEntry.objects.bulk_create(
+                [self],
+                update_conflicts=True,
+                unique_fields=["participant", "challenge", "date"],
+                update_fields=["total_steps", "step_delta"],
             )
+            if self.pk is None:  # Backends without RETURNING on upserts
+                self.pk = (
+                    StepEntry.objects
+                    .filter(
+                        participant_id=self.participant_id,
+                        challenge_id=self.challenge_id,
+                        date=self.date,
+                    )
+                    .values_list("pk", flat=True)
+                    .get()
+                )
+
+            if next_entry:
+                StepEntry.objects.filter(pk=next_entry.pk).update(
+                    step_delta=next_entry.total_steps - self.total_steps
+                )
+            # A replaced entry had the same previous entry: only the day's
+            # total moves, not its entry count
+            ChallengeDailyStats.objects.record_change(
+                self.challenge_id,
+                self.date,
+                self.total_steps - (
+                    replaced.total_steps if replaced
+                    else previous_entry.total_steps if previous_entry
+                    else 0
+                ),
+                added=replaced is None,
+                following_date=next_entry.date if next_entry else None,
+            )
+            StandingSnapshot.objects.refresh(
+                self.challenge_id, self.participant_id, self.date
+            )
+            delta = ParticipantStanding.objects.refresh(
+                self.participant_id, self.challenge_id
+            )
+            if delta:
+                publish_on_commit(self.challenge_id, delta)
+        invalidate_challenge(self.challenge_id)
+        return replaced is None
 
     def save(self, *args, **kwargs):
         self.full_clean()  # Enforce validation everywhere
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            stored = None
+            if self.pk:
+                stored = (
+                    StepEntry.objects
+                    .filter(pk=self.pk)
+                    .values("participant_id", "challenge_id", "date", "total_steps")
+                    .first()
+                )
+            if stored:
+                ChallengeDailyStats.objects.record_entry(
+                    stored, removed=True, exclude_pk=self.pk
+                )
+
+            super().save(*args, **kwargs)
+
+            # Own step_delta was set by clean(); the next entry's follows it
+            StepEntry.objects.refresh_deltas(
+                self.participant_id, self.challenge_id, after=[self.date]
+            )
+            if stored and (
+                (stored["participant_id"], stored["challenge_id"], stored["date"])
+                != (self.participant_id, self.challenge_id, self.date)
+            ):
+                # ...and so does the one that followed its old position
+                StepEntry.objects.refresh_deltas(
+                    stored["participant_id"], stored["challenge_id"], after=[stored["date"]]
+                )
+            ChallengeDailyStats.objects.record_entry(
+                self._rollup_values(), exclude_pk=self.pk
+            )
+            StandingSnapshot.objects.refresh(
+                self.challenge_id, self.participant_id, self.date
+            )
+            if stored and (
+                (stored["participant_id"], stored["challenge_id"], stored["date"])
+                != (self.participant_id, self.challenge_id, self.date)
+            ):
+                StandingSnapshot.objects.refresh(
+                    stored["challenge_id"], stored["participant_id"], stored["date"]
+                )
+            delta = ParticipantStanding.objects.refresh(
+                self.participant_id, self.challenge_id
+            )
+            if delta:
+                publish_on_commit(self.challenge_id, delta)
+            if stored and (
+                (stored["participant_id"], stored["challenge_id"])
+                != (self.participant_id, self.challenge_id)
+            ):
+                ParticipantStanding.objects.refresh(
+                    stored["participant_id"], stored["challenge_id"]
+                )
+                if stored["challenge_id"] != self.challenge_id:
+                    # Moved out of a possibly closed challenge
+                    FinalStanding.objects.refreeze(stored["challenge_id"])
+                invalidate_challenge(stored["challenge_id"])
+        invalidate_challenge(self.challenge_id)
+
+    def delete(self, *args, **kwargs):
+        values = self._rollup_values()
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            StepEntry.objects.refresh_deltas(
+                self.participant_id, self.challenge_id, after=[self.date]
+            )
+            ChallengeDailyStats.objects.record_entry(values, removed=True)
+            StandingSnapshot.objects.refresh(
+                self.challenge_id, self.participant_id, self.date
+            )
+            delta = ParticipantStanding.objects.refresh(
+                self.participant_id, self.challenge_id
+            )
+            if delta:
+                publish_on_commit(self.challenge_id, delta)
+            # Closed challenges take no new entries, but can lose some
+            FinalStanding.objects.refreeze(self.challenge_id)
+        invalidate_challenge(self.challenge_id)
+        return result
+
+    def _rollup_values(self):
+        return {
+            "participant_id": self.participant_id,
+            "challenge_id": self.challenge_id,
+            "date": self.date,
+            "total_steps": self.total_steps,
+        }
 
     def __str__(self):
         return (
@@ -123,3 +613,1199 @@ class StepEntry(models.Model):
         )
 
 
+def delta_expression():
+    """``total_steps`` minus the total of the same participant's previous entry."""
+    previous_total = (
+        StepEntry.objects
+        .filter(
+            participant_id=OuterRef("participant_id"),
+            challenge_id=OuterRef("challenge_id"),
+            date__lt=OuterRef("date"),
+        )
+        .order_by("-date")
+        .values("total_steps")[:1]
+    )
+    return F("total_steps") - Coalesce(Subquery(previous_total), 0)
+
+
+# Columns of StandingQuerySet.rows(), ranks included
+STANDING_ROW_FIELDS = (
+    "participant_id",
+    "first_name",
+    "last_name",
+    "username",
+    "team_id",
+    "team_name",
+    "team_color",
+    "total_steps",
+    "rank",
+)
+
+
+class StandingQuerySet(models.QuerySet):
+    """
+    Leaderboard order is highest total first, ties broken by participant
+    id. ``after``/``before`` give keyset pages relative to a row's
+    ``(total_steps, participant_id)``, so deep pages cost the same as
+    the first one.
+    """
+
+    def ranked(self):
+        return self.order_by("-total_steps", "participant_id")
+
+    def after(self, total_steps, participant_id):
+        """Rows ranked below the given row, best first."""
+        return self.filter(
+            Q(total_steps__lt=total_steps)
+            | Q(total_steps=total_steps, participant_id__gt=participant_id)
+        ).ranked()
+
+    def before(self, total_steps, participant_id):
+        """Rows ranked above the given row, nearest first."""
+        return self.filter(
+            Q(total_steps__gt=total_steps)
+            | Q(total_steps=total_steps, participant_id__lt=participant_id)
+        ).order_by("total_steps", "-participant_id")
+
+    def rows(self, *extra):
+        """
+        Just the columns a leaderboard renders, as named tuples instead
+        of model instances with their user and team (password hashes and
+        all). ``extra`` adds more columns of the standings row itself.
+        """
+        return self.annotate(
+            first_name=F("participant__user__first_name"),
+            last_name=F("participant__user__last_name"),
+            username=F("participant__user__username"),
+            team_name=F("team__name"),
+            team_color=F("team__color"),
+        ).values_list(*STANDING_ROW_FIELDS, *extra, named=True)
+
+
+class StandingManager(models.Manager.from_queryset(StandingQuerySet)):
+    """
+    Keeps ParticipantStanding in step with StepEntry writes.
+
+    Ranks use competition ranking (1, 2, 2, 4): a participant's rank is
+    one plus the number of participants in the challenge with strictly
+    more steps. When one participant's total moves, only the rows whose
+    totals it crossed need their rank shifted.
+    """
+
+    def live_totals(self, challenge_id):
+        """
+        Latest total per participant, straight from StepEntry.
+
+        This is the correlated subquery the views used before the
+        standings table existed; it is the source of truth for rebuilds
+        and consistency checks.
+        """
+        latest_entry = (
+            StepEntry.objects
+            .filter(participant=OuterRef("pk"), challenge_id=challenge_id)
+            .order_by("-date")
+        )
+        rows = (
+            Participant.objects
+            .filter(team__challenge_id=challenge_id)
+            .annotate(
+                latest_steps=Subquery(latest_entry.values("total_steps")[:1]),
+                latest_date=Subquery(latest_entry.values("date")[:1]),
+            )
+            .values_list("pk", "team_id", "latest_steps", "latest_date")
+        )
+        return {
+            pk: (team_id, steps or 0, latest_date)
+            for pk, team_id, steps, latest_date in rows
+        }
+
+    def rebuild(self, challenge_id):
+        """Replace every standings row of a challenge from live totals."""
+        totals = self.live_totals(challenge_id)
+        rows = [
+            ParticipantStanding(
+                challenge_id=challenge_id,
+                participant_id=participant_id,
+                team_id=team_id,
+                total_steps=steps,
+                last_entry_date=last_date,
+                rank=rank,
+            )
+            for participant_id, team_id, steps, last_date, rank
+            in rank_totals(totals)
+        ]
+        with transaction.atomic():
+            self.filter(challenge_id=challenge_id).delete()
+            self.bulk_create(rows, batch_size=1000)
+        return len(rows)
+
+    def refresh(self, participant_id, challenge_id):
+        """
+        Recompute one participant's row after one of their entries changed.
+
+        Returns the change as a compact rank delta (see ``rank_delta``),
+        or None if the participant is not enrolled in the challenge.
+        """
+        latest = (
+            StepEntry.objects
+            .filter(participant_id=participant_id, challenge_id=challenge_id)
+            .order_by("-date")
+            .values("total_steps", "date")
+            .first()
+        )
+        total = latest["total_steps"] if latest else 0
+        last_date = latest["date"] if latest else None
+
+        with transaction.atomic():
+            standing = (
+                self.filter(
+                    participant_id=participant_id, challenge_id=challenge_id
+                )
+                .select_for_update()
+                .first()
+            )
+            if standing is None:
+                team_id = (
+                    Participant.objects
+                    .filter(pk=participant_id, team__challenge_id=challenge_id)
+                    .values_list("team_id", flat=True)
+                    .first()
+                )
+                if team_id is None:
+                    return None  # Participant is not enrolled in this challenge
+                standing = ParticipantStanding(
+                    participant_id=participant_id,
+                    challenge_id=challenge_id,
+                    team_id=team_id,
+                )
+                old_total = old_rank = None
+            else:
+                old_total, old_rank = standing.total_steps, standing.rank
+
+            shift = self._shift_ranks(challenge_id, participant_id, old_total, total)
+            standing.total_steps = total
+            standing.last_entry_date = last_date
+            standing.rank = self._rank_for(challenge_id, participant_id, total)
+            standing.save()
+
+        return rank_delta(standing, old_rank, shift)
+
+    def refresh_many(self, pairs, rebuild_threshold=50):
+        """
+        Refresh after a bulk write touching ``(participant_id, challenge_id)``
+        pairs. Challenges where many participants moved are rebuilt in
+        one pass instead of shifting ranks row by row.
+        """
+        by_challenge = defaultdict(set)
+        for participant_id, challenge_id in pairs:
+            by_challenge[challenge_id].add(participant_id)
+
+        for challenge_id, participant_ids in by_challenge.items():
+            if len(participant_ids) > rebuild_threshold:
+                self.rebuild(challenge_id)
+            else:
+                for participant_id in participant_ids:
+                    self.refresh(participant_id, challenge_id)
+
+    def sync_participant(self, participant):
+        """Follow a participant's team (and so challenge) assignment."""
+        challenge_id = (
+            Team.objects
+            .filter(pk=participant.team_id)
+            .values_list("challenge_id", flat=True)
+            .get()
+        )
+        stale = (
+            self.filter(participant_id=participant.pk)
+            .exclude(challenge_id=challenge_id)
+        )
+        for standing in stale:
+            self._shift_ranks(
+                standing.challenge_id, participant.pk, standing.total_steps, None
+            )
+            standing.delete()
+            first_entry = (
+                StepEntry.objects
+                .filter(participant_id=participant.pk, challenge_id=standing.challenge_id)
+                .aggregate(Min("date"))["date__min"]
+            )
+            if first_entry:
+                StandingSnapshot.objects.invalidate(standing.challenge_id, since=first_entry)
+            StandingSnapshot.objects.filter(
+                participant_id=participant.pk, challenge_id=standing.challenge_id
+            ).delete()
+            FinalStanding.objects.refreeze(standing.challenge_id)
+            invalidate_challenge(standing.challenge_id)
+
+        self.filter(
+            participant_id=participant.pk, challenge_id=challenge_id
+        ).update(team_id=participant.team_id)
+        self.refresh(participant.pk, challenge_id)
+
+    def remove_participant(self, participant_id):
+        """Drop a participant's rows and close the gaps they leave."""
+        for standing in self.filter(participant_id=participant_id):
+            self._shift_ranks(
+                standing.challenge_id, participant_id, standing.total_steps, None
+            )
+            standing.delete()
+
+    def _shift_ranks(self, challenge_id, participant_id, old_total, new_total):
+        """
+        Adjust the ranks of everyone a moving total passes.
+
+        ``None`` stands for "not on the board": a new row behaves like a
+        climb from below zero, a removed row like a fall below zero.
+
+        Returns ``(low, high, by)``: rows with ``low <= total_steps < high``
+        moved ``by`` places, or None if nobody moved.
+        """
+        if old_total == new_total:
+            return None
+        others = (
+            self.filter(challenge_id=challenge_id)
+            .exclude(participant_id=participant_id)
+        )
+        if old_total is None or (new_total is not None and new_total > old_total):
+            # Overtakes rows in [old, new)
+            low, high, by = old_total or 0, new_total, 1
+        else:
+            # Falls behind rows in [new, old)
+            low, high, by = new_total or 0, old_total, -1
+        others.filter(
+            total_steps__gte=low, total_steps__lt=high
+        ).update(rank=F("rank") + by)
+        return low, high, by
+
+    def _rank_for(self, challenge_id, participant_id, total):
+        ahead = (
+            self.filter(challenge_id=challenge_id, total_steps__gt=total)
+            .exclude(participant_id=participant_id)
+            .count()
+        )
+        return ahead + 1
+
+
+def rank_delta(standing, previous_rank, shift):
+    """
+    JSON-ready description of one standing change, as pushed to live
+    leaderboards: the participant's new total and rank, and which other
+    rows moved (totals in ``[low, high)`` shifted ``by`` places).
+    """
+    return {
+        "type": "rank",
+        "participant": standing.participant_id,
+        "team": standing.team_id,
+        "total_steps": standing.total_steps,
+        "rank": standing.rank,
+        "previous_rank": previous_rank,
+        "shift": dict(zip(("low", "high", "by"), shift)) if shift else None,
+    }
+
+
+def rank_totals(totals):
+    """
+    Turn ``{participant_id: (team_id, steps, last_date)}`` into rows of
+    ``(participant_id, team_id, steps, last_date, rank)`` ordered by rank.
+    """
+    ordered = sorted(totals.items(), key=lambda item: (-item[1][1], item[0]))
+    rows = []
+    rank = 0
+    previous_steps = None
+    for position, (participant_id, (team_id, steps, last_date)) in enumerate(
+        ordered, start=1
+    ):
+        if steps != previous_steps:
+            rank = position
+            previous_steps = steps
+        rows.append((participant_id, team_id, steps, last_date, rank))
+    return rows
+
+
+class ParticipantStanding(models.Model):
+    """
+    Denormalized leaderboard row: each participant's latest cumulative
+    total in a challenge, with its rank.
+
+    Maintained by StepEntry.save()/delete(), bulk entry deletes and
+    updates (StepEntryQuerySet) and Participant.save()/delete();
+    ``manage.py rebuild_standings`` recreates it from raw entries.
+    """
+
+    challenge = models.ForeignKey(
+        StepChallenge,
+        on_delete=models.CASCADE,
+        related_name="standings"
+    )
+
+    participant = models.ForeignKey(
+        Participant,
+        on_delete=models.CASCADE,
+        related_name="standings"
+    )
+
+    team = models.ForeignKey(
+        Team,
+        on_delete=models.CASCADE,
+        related_name="standings"
+    )
+
+    # Latest cumulative total (0 until the first entry)
+    total_steps = models.PositiveIntegerField(default=0)
+    last_entry_date = models.DateField(null=True, blank=True)
+    rank = models.PositiveIntegerField(default=1)
+
+    objects = StandingManager()
+
+    class Meta:
+        unique_together = ("challenge", "participant")
+        indexes = [
+            models.Index(
+                fields=["challenge", "-total_steps", "participant"],
+                name="standing_steps_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"#{self.rank} {self.participant} – {self.total_steps} steps"
+
+
+def daily_deltas(sequence):
+    """
+    Per-day step deltas of one participant.
+
+    ``sequence`` is their ``(date, total_steps)`` history in date order;
+    yields ``(date, total_steps - previous_total)``, counting from zero.
+    """
+    previous = 0
+    for day, total in sequence:
+        yield day, total - previous
+        previous = total
+
+
+class DailyStatsManager(models.Manager):
+    """
+    Keeps ChallengeDailyStats in step with StepEntry writes.
+
+    A day's ``step_delta`` is the sum, over participants with an entry
+    that day, of their total minus their previous total. Inserting an
+    entry therefore moves steps from the next entry's day to its own;
+    the two changes always cancel out for later days.
+    """
+
+    def record_entry(self, entry, removed=False, exclude_pk=None):
+        """
+        Apply one entry being added (or ``removed``) to the rollup.
+
+        ``entry`` holds ``participant_id``, ``challenge_id``, ``date`` and
+        ``total_steps``. Neighbours are looked up without ``exclude_pk``
+        so an update can be recorded as a removal plus an addition.
+        """
+        history = StepEntry.objects.filter(
+            participant_id=entry["participant_id"],
+            challenge_id=entry["challenge_id"],
+        )
+        if exclude_pk:
+            history = history.exclude(pk=exclude_pk)
+
+        previous_total = (
+            history
+            .filter(date__lt=entry["date"])
+            .order_by("-date")
+            .values_list("total_steps", flat=True)
+            .first()
+        ) or 0
+        following_date = (
+            history
+            .filter(date__gt=entry["date"])
+            .order_by("date")
+            .values_list("date", flat=True)
+            .first()
+        )
+
+        sign = -1 if removed else 1
+        self.record_change(
+            entry["challenge_id"],
+            entry["date"],
+            sign * (entry["total_steps"] - previous_total),
+            added=not removed,
+            removed=removed,
+            following_date=following_date,
+        )
+
+    def record_change(
+        self, challenge_id, day, change, added=False, removed=False, following_date=None
+    ):
+        """
+        Move ``change`` steps onto ``day`` (and off ``following_date``,
+        the day of the participant's next entry), counting an entry
+        ``added`` or ``removed`` on that day.
+        """
+        changes = {(challenge_id, day): [change, int(added) - int(removed)]}
+        if following_date:
+            changes[(challenge_id, following_date)] = [-change, 0]
+        self._apply(changes)
+
+    def record_bulk_insert(self, entries):
+        """Apply freshly bulk-inserted entries with one history query."""
+        new_keys = {
+            (entry.participant_id, entry.challenge_id, entry.date)
+            for entry in entries
+        }
+        histories = defaultdict(list)
+        for participant_id, challenge_id, day, total in self._histories(
+            {(entry.participant_id, entry.challenge_id) for entry in entries}
+        ):
+            histories[(participant_id, challenge_id)].append((day, total))
+
+        changes = defaultdict(lambda: [0, 0])
+        for (participant_id, challenge_id), after in histories.items():
+            before = [
+                (day, total) for day, total in after
+                if (participant_id, challenge_id, day) not in new_keys
+            ]
+            for day, delta in daily_deltas(after):
+                changes[(challenge_id, day)][0] += delta
+            for day, delta in daily_deltas(before):
+                changes[(challenge_id, day)][0] -= delta
+        for entry in entries:
+            changes[(entry.challenge_id, entry.date)][1] += 1
+        self._apply(changes)
+
+    def recompute_days(self, touched):
+        """
+        Recompute the days a bulk delete or update of ``(participant_id,
+        challenge_id, date)`` entries affected: their own dates and the
+        date of each participant's following entry, whose delta changed
+        with them. Sums the stored ``step_delta``, so deltas must be
+        refreshed first.
+        """
+        pairs = {(participant_id, challenge_id) for participant_id, challenge_id, _ in touched}
+        dates = defaultdict(list)
+        for participant_id, challenge_id, day, _ in self._histories(pairs):
+            dates[(participant_id, challenge_id)].append(day)
+
+        days = defaultdict(set)
+        for participant_id, challenge_id, day in touched:
+            days[challenge_id].add(day)
+            following = dates[(participant_id, challenge_id)]
+            position = bisect.bisect_right(following, day)
+            if position < len(following):
+                days[challenge_id].add(following[position])
+
+        to_update, to_create = [], []
+        for challenge_id, challenge_days in days.items():
+            challenge_days = sorted(challenge_days)
+            for start in range(0, len(challenge_days), 500):
+                chunk = challenge_days[start:start + 500]
+                live = {
+                    day: (delta, count)
+                    for day, delta, count in (
+                        StepEntry.objects
+                        .filter(challenge_id=challenge_id, date__in=chunk)
+                        .order_by()
+                        .values("date")
+                        .annotate(delta=Sum("step_delta"), count=Count("pk"))
+                        .values_list("date", "delta", "count")
+                    )
+                }
+                stored = {
+                    row.date: row
+                    for row in self.filter(
+                        challenge_id=challenge_id, date__in=chunk
+                    ).select_for_update()
+                }
+                for day in chunk:
+                    delta, count = live.get(day, (0, 0))
+                    row = stored.get(day)
+                    if row is None:
+                        if count:
+                            to_create.append(ChallengeDailyStats(
+                                challenge_id=challenge_id,
+                                date=day,
+                                step_delta=delta,
+                                entry_count=count,
+                            ))
+                    elif (row.step_delta, row.entry_count) != (delta, count):
+                        row.step_delta, row.entry_count = delta, count
+                        to_update.append(row)
+
+        self.bulk_update(to_update, ["step_delta", "entry_count"])
+        self.bulk_create(to_create)
+
+    def live_days(self, challenge_id):
+        """``{date: (step_delta, entry_count)}`` computed from raw entries."""
+        histories = defaultdict(list)
+        for participant_id, _, day, total in self._histories(challenge_id=challenge_id):
+            histories[participant_id].append((day, total))
+
+        days = defaultdict(lambda: [0, 0])
+        for history in histories.values():
+            for day, delta in daily_deltas(history):
+                days[day][0] += delta
+                days[day][1] += 1
+        return {day: tuple(values) for day, values in days.items()}
+
+    def rebuild(self, challenge_id):
+        """Recompute a challenge's rollup from raw entries."""
+        days = self.live_days(challenge_id)
+        with transaction.atomic():
+            self.filter(challenge_id=challenge_id).delete()
+            self.bulk_create(
+                ChallengeDailyStats(
+                    challenge_id=challenge_id,
+                    date=day,
+                    step_delta=delta,
+                    entry_count=count,
+                )
+                for day, (delta, count) in sorted(days.items())
+            )
+        return len(days)
+
+    def _histories(self, pairs=None, challenge_id=None):
+        """``(participant, challenge, date, total)`` rows in date order."""
+        entries = (
+            StepEntry.objects
+            .order_by("participant_id", "challenge_id", "date")
+            .values_list("participant_id", "challenge_id", "date", "total_steps")
+        )
+        if challenge_id is not None:
+            yield from entries.filter(challenge_id=challenge_id)
+            return
+
+        participant_ids = sorted({participant_id for participant_id, _ in pairs})
+        challenge_ids = {challenge_id for _, challenge_id in pairs}
+        # Chunked to stay below SQLite's bound-parameter limit
+        for start in range(0, len(participant_ids), 500):
+            for row in entries.filter(
+                participant_id__in=participant_ids[start:start + 500],
+                challenge_id__in=challenge_ids,
+            ):
+                if (row[0], row[1]) in pairs:
+                    yield row
+
+    def _apply(self, changes):
+        """Add ``{(challenge_id, date): [step_delta, entry_count]}`` to the rollup."""
+        changes = {key: change for key, change in changes.items() if any(change)}
+        if not changes:
+            return
+
+        stored = {
+            (row.challenge_id, row.date): row
+            for row in self.filter(
+                challenge_id__in={challenge_id for challenge_id, _ in changes},
+                date__in={day for _, day in changes},
+            ).select_for_update()
+        }
+        to_update, to_create = [], []
+        for (challenge_id, day), (delta, count) in changes.items():
+            row = stored.get((challenge_id, day))
+            if row is None:
+                to_create.append(ChallengeDailyStats(
+                    challenge_id=challenge_id,
+                    date=day,
+                    step_delta=delta,
+                    entry_count=count,
+                ))
+            else:
+                row.step_delta += delta
+                row.entry_count += count
+                to_update.append(row)
+
+        self.bulk_update(to_update, ["step_delta", "entry_count"])
+        self.bulk_create(to_create)
+
+
+class ChallengeDailyStats(models.Model):
+    """
+    Per-challenge, per-day rollup of step entries.
+
+    ``step_delta`` adds up each participant's progress on that day, so
+    summing it over a challenge gives the sum of everyone's latest
+    total. Each entry is one participant-day (entries are unique per
+    participant and date), so ``entry_count`` is also the number of
+    participants active that day.
+
+    Maintained by StepEntry.save()/delete(), the batch import path and
+    bulk entry deletes and updates (including participant and team
+    deletes); ``manage.py rebuild_standings`` recreates it.
+    """
+
+    challenge = models.ForeignKey(
+        StepChallenge,
+        on_delete=models.CASCADE,
+        related_name="daily_stats"
+    )
+
+    date = models.DateField()
+
+    step_delta = models.BigIntegerField(default=0)
+    entry_count = models.IntegerField(default=0)
+
+    objects = DailyStatsManager()
+
+    class Meta:
+        unique_together = ("challenge", "date")
+        ordering = ["date"]
+        verbose_name_plural = "challenge daily stats"
+
+    def __str__(self):
+        return f"{self.challenge} – {self.date}: +{self.step_delta} steps"
+
+
+def rank_team_totals(totals):
+    """
+    Sum ``rank_totals()`` input per team into rows of
+    ``(team_id, steps, rank)`` ordered by rank.
+    """
+    team_steps = defaultdict(int)
+    for team_id, steps, _ in totals.values():
+        team_steps[team_id] += steps
+
+    rows = []
+    rank = 0
+    previous_steps = None
+    ordered = sorted(team_steps.items(), key=lambda item: (-item[1], item[0]))
+    for position, (team_id, steps) in enumerate(ordered, start=1):
+        if steps != previous_steps:
+            rank = position
+            previous_steps = steps
+        rows.append((team_id, steps, rank))
+    return rows
+
+
+class SnapshotManager(models.Manager.from_queryset(StandingQuerySet)):
+    """
+    Builds StandingSnapshot and TeamSnapshot rows, one set per day.
+
+    A day's snapshot is the standings as they were at the end of that
+    day. Missing days are built in order from the last stored day plus
+    the entries dated after it, so catching up costs one entries query
+    rather than a replay per day. Only finished days (before today) are
+    kept; today is the live standings table.
+
+    Snapshots always form an unbroken run of days from the challenge
+    start. ``build()`` extends it (``manage.py snapshot_standings``,
+    never a page view). A single entry write updates the rows it changed
+    in place (``refresh()``); bulk writes cut the run back to their
+    earliest date (``invalidate()``) for the next build.
+    """
+
+    def last_day(self, challenge):
+        """Latest day that can have a snapshot: the end or yesterday."""
+        return min(challenge.end_date, now().date() - timedelta(days=1))
+
+    def built_through(self, challenge_id):
+        """Last stored day of a challenge, or None before the first build."""
+        return self.filter(challenge_id=challenge_id).aggregate(Max("date"))["date__max"]
+
+    def build(self, challenge, until=None):
+        """Snapshot the missing days up to ``until``; returns how many."""
+        last_day = self.last_day(challenge)
+        until = min(until, last_day) if until else last_day
+        if until < challenge.start_date:
+            return 0
+
+        built_through = (
+            self.filter(challenge=challenge, date__lte=until)
+            .aggregate(Max("date"))["date__max"]
+        )
+        if built_through == until:
+            return 0
+
+        day = built_through + timedelta(days=1) if built_through else challenge.start_date
+        rows, team_rows = self._replay(challenge, day, until)
+        # A concurrent build of the same days inserts identical rows
+        with transaction.atomic():
+            self._insert(rows, team_rows)
+        return (until - day).days + 1
+
+    def refresh(self, challenge_id, participant_id, since):
+        """
+        Update the stored days a write to one participant's entry dated
+        ``since`` changed, in place: their total from ``since`` to the
+        day before their next entry, and the ranks of the rows it
+        passed, as ParticipantStanding.refresh() does for the live
+        table. A handful of range UPDATEs, however many participants
+        and days there are.
+        """
+        if since >= now().date():
+            return 0  # Today and later are never snapshotted
+        built_through = self.built_through(challenge_id)
+        if built_through is None or since > built_through:
+            return 0
+
+        entries = StepEntry.objects.filter(
+            participant_id=participant_id, challenge_id=challenge_id
+        )
+        new_total = (
+            entries.filter(date__lte=since)
+            .order_by("-date")
+            .values_list("total_steps", flat=True)
+            .first()
+        ) or 0
+        next_date = entries.filter(date__gt=since).aggregate(Min("date"))["date__min"]
+        until = built_through
+        if next_date is not None:
+            until = min(until, next_date - timedelta(days=1))
+        if since > until:
+            return 0
+
+        stored = dict(
+            self.filter(
+                challenge_id=challenge_id,
+                participant_id=participant_id,
+                date__range=(since, until),
+            ).values_list("date", "total_steps")
+        )
+        # Runs of days with the same stored total (None: not on that
+        # day's board) move together
+        runs = []
+        day = since
+        while day <= until:
+            old_total = stored.get(day)
+            if runs and runs[-1][2] == old_total:
+                runs[-1][1] = day
+            else:
+                runs.append([day, day, old_total])
+            day += timedelta(days=1)
+        runs = [run for run in runs if run[2] != new_total]
+        if not runs:
+            return 0
+
+        team_id = (
+            Participant.objects.filter(pk=participant_id)
+            .values_list("team_id", flat=True)
+            .get()
+        )
+        with transaction.atomic():
+            for first, last, old_total in runs:
+                self._shift_ranks(
+                    challenge_id, participant_id, (first, last), old_total, new_total
+                )
+                if old_total is None:
+                    self.bulk_create([
+                        StandingSnapshot(
+                            challenge_id=challenge_id,
+                            date=first + timedelta(days=offset),
+                            participant_id=participant_id,
+                            team_id=team_id,
+                            total_steps=new_total,
+                            rank=0,  # Set below
+                        )
+                        for offset in range((last - first).days + 1)
+                    ])
+                else:
+                    self.filter(
+                        challenge_id=challenge_id,
+                        participant_id=participant_id,
+                        date__range=(first, last),
+                    ).update(total_steps=new_total)
+
+            ahead = (
+                self.filter(
+                    challenge_id=challenge_id,
+                    date=OuterRef("date"),
+                    total_steps__gt=new_total,
+                )
+                .exclude(participant_id=participant_id)
+                .order_by()
+                .values("date")
+                .annotate(count=Count("pk"))
+                .values("count")
+            )
+            self.filter(
+                challenge_id=challenge_id,
+                participant_id=participant_id,
+                date__range=(runs[0][0], runs[-1][1]),
+            ).update(rank=Coalesce(Subquery(ahead), 0) + 1)
+
+            self._move_team_totals(challenge_id, team_id, runs, new_total)
+        return sum((last - first).days + 1 for first, last, _ in runs)
+
+    def _shift_ranks(self, challenge_id, participant_id, days, old_total, new_total):
+        """ParticipantStanding._shift_ranks() over a range of snapshot days."""
+        if old_total is None or new_total > old_total:
+            low, high, by = old_total or 0, new_total, 1
+        else:
+            low, high, by = new_total, old_total, -1
+        (
+            self.filter(challenge_id=challenge_id, date__range=days)
+            .exclude(participant_id=participant_id)
+            .filter(total_steps__gte=low, total_steps__lt=high)
+            .update(rank=F("rank") + by)
+        )
+
+    def _move_team_totals(self, challenge_id, team_id, runs, new_total):
+        """Apply the participant's change to their team's rows and re-rank the teams."""
+        delta = {}
+        for first, last, old_total in runs:
+            day = first
+            while day <= last:
+                delta[day] = new_total - (old_total or 0)
+                day += timedelta(days=1)
+
+        by_day = defaultdict(dict)
+        for row in TeamSnapshot.objects.filter(
+            challenge_id=challenge_id, date__in=list(delta)
+        ):
+            by_day[row.date][row.team_id] = row
+        changed, created = [], []
+        for day, steps in delta.items():
+            rows = by_day[day]
+            if team_id not in rows:
+                rows[team_id] = TeamSnapshot(
+                    challenge_id=challenge_id, date=day, team_id=team_id, total_steps=0
+                )
+                created.append(rows[team_id])
+            rows[team_id].total_steps += steps
+            ordered = sorted(rows.values(), key=lambda row: (-row.total_steps, row.team_id))
+            rank, previous_steps = 0, None
+            for position, row in enumerate(ordered, start=1):
+                if row.total_steps != previous_steps:
+                    rank, previous_steps = position, row.total_steps
+                if row.rank != rank or row.team_id == team_id:
+                    row.rank = rank
+                    if row.pk:
+                        changed.append(row)
+        TeamSnapshot.objects.bulk_update(changed, ["total_steps", "rank"], batch_size=1000)
+        TeamSnapshot.objects.bulk_create(created)
+
+    def _replay(self, challenge, day, until):
+        """Snapshot rows of ``day`` through ``until``, from the day before's."""
+        # Current participants start at zero; the day before gives their
+        # totals so far (it is stored, the run being unbroken)
+        totals = {
+            participant_id: (team_id, 0, None)
+            for participant_id, team_id in (
+                Participant.objects
+                .filter(team__challenge=challenge)
+                .values_list("pk", "team_id")
+            )
+        }
+        if day > challenge.start_date:
+            for participant_id, steps in (
+                self.filter(challenge=challenge, date=day - timedelta(days=1))
+                .values_list("participant_id", "total_steps")
+            ):
+                if participant_id in totals:
+                    totals[participant_id] = (totals[participant_id][0], steps, None)
+
+        entries_by_day = defaultdict(list)
+        for entry_date, participant_id, steps in (
+            StepEntry.objects
+            .filter(challenge=challenge, date__range=(day, until))
+            .values_list("date", "participant_id", "total_steps")
+        ):
+            entries_by_day[entry_date].append((participant_id, steps))
+
+        rows, team_rows = [], []
+        while day <= until:
+            for participant_id, steps in entries_by_day.get(day, ()):
+                if participant_id in totals:
+                    totals[participant_id] = (totals[participant_id][0], steps, day)
+            rows += [
+                StandingSnapshot(
+                    challenge=challenge,
+                    date=day,
+                    participant_id=participant_id,
+                    team_id=team_id,
+                    total_steps=steps,
+                    rank=rank,
+                )
+                for participant_id, team_id, steps, _, rank in rank_totals(totals)
+            ]
+            team_rows += [
+                TeamSnapshot(
+                    challenge=challenge,
+                    date=day,
+                    team_id=team_id,
+                    total_steps=steps,
+                    rank=rank,
+                )
+                for team_id, steps, rank in rank_team_totals(totals)
+            ]
+            day += timedelta(days=1)
+        return rows, team_rows
+
+    def _insert(self, rows, team_rows):
+        self.bulk_create(rows, batch_size=1000, ignore_conflicts=True)
+        TeamSnapshot.objects.bulk_create(team_rows, batch_size=1000, ignore_conflicts=True)
+
+    def invalidate(self, challenge_id, since=None):
+        """
+        Drop a challenge's snapshots from ``since`` on (all by default),
+        keeping the run unbroken. Bulk writes and team moves go this way;
+        ``snapshot_standings`` builds the days again off the request path.
+        """
+        if since is not None and since >= now().date():
+            return  # Today and later are never snapshotted
+        for model in (StandingSnapshot, TeamSnapshot):
+            stale = model.objects.filter(challenge_id=challenge_id)
+            if since is not None:
+                stale = stale.filter(date__gte=since)
+            stale.delete()
+
+
+class StandingSnapshot(models.Model):
+    """
+    A participant's total and rank at the end of one challenge day.
+
+    Backs the point-in-time leaderboard (``?as_of=``); built by
+    ``manage.py snapshot_standings`` and kept right by writes (see
+    SnapshotManager).
+    """
+
+    challenge = models.ForeignKey(
+        StepChallenge,
+        on_delete=models.CASCADE,
+        related_name="standing_snapshots"
+    )
+
+    date = models.DateField()
+
+    participant = models.ForeignKey(
+        Participant,
+        on_delete=models.CASCADE,
+        related_name="snapshots"
+    )
+
+    team = models.ForeignKey(
+        Team,
+        on_delete=models.CASCADE,
+        related_name="participant_snapshots"
+    )
+
+    total_steps = models.PositiveIntegerField(default=0)
+    rank = models.PositiveIntegerField(default=1)
+
+    objects = SnapshotManager()
+
+    class Meta:
+        unique_together = ("challenge", "date", "participant")
+        indexes = [
+            models.Index(
+                fields=["challenge", "date", "-total_steps", "participant"],
+                name="snapshot_steps_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.date} #{self.rank} {self.participant} – {self.total_steps} steps"
+
+
+class TeamSnapshot(models.Model):
+    """A team's summed total and rank at the end of one challenge day."""
+
+    challenge = models.ForeignKey(
+        StepChallenge,
+        on_delete=models.CASCADE,
+        related_name="team_snapshots"
+    )
+
+    date = models.DateField()
+
+    team = models.ForeignKey(
+        Team,
+        on_delete=models.CASCADE,
+        related_name="snapshots"
+    )
+
+    total_steps = models.PositiveBigIntegerField(default=0)
+    rank = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        unique_together = ("challenge", "date", "team")
+        ordering = ["date", "rank"]
+
+    def __str__(self):
+        return f"{self.date} #{self.rank} {self.team.name} – {self.total_steps} steps"
+
+
+class ArchiveManager(models.Manager.from_queryset(StandingQuerySet)):
+    """
+    Freezes the final standings of a closed challenge.
+
+    Closed challenges accept no more entries, so their ranking is
+    computed once from raw entries, the same way ``rebuild_standings``
+    does, and served from FinalStanding and FinalTeamStanding from then
+    on (see StepChallenge.save()). Deleting entries, participants or
+    teams, or moving a participant, still changes it: those paths call
+    ``refreeze()``.
+    """
+
+    def freeze(self, challenge):
+        """Replace a challenge's archive with its current live totals."""
+        totals = ParticipantStanding.objects.live_totals(challenge.pk)
+        rows = [
+            FinalStanding(
+                challenge=challenge,
+                participant_id=participant_id,
+                team_id=team_id,
+                total_steps=steps,
+                last_entry_date=last_date,
+                rank=rank,
+            )
+            for participant_id, team_id, steps, last_date, rank
+            in rank_totals(totals)
+        ]
+        team_rows = [
+            FinalTeamStanding(
+                challenge=challenge, team_id=team_id, total_steps=steps, rank=rank
+            )
+            for team_id, steps, rank in rank_team_totals(totals)
+        ]
+        with transaction.atomic():
+            self.discard(challenge.pk)
+            self.bulk_create(rows, batch_size=1000)
+            FinalTeamStanding.objects.bulk_create(team_rows, batch_size=1000)
+        return len(rows)
+
+    def refreeze(self, challenge_id):
+        """Freeze a challenge again if it is archived."""
+        challenge = StepChallenge.objects.filter(
+            pk=challenge_id, archived_at__isnull=False
+        ).first()
+        if challenge:
+            self.freeze(challenge)
+
+    def discard(self, challenge_id):
+        """Drop a challenge's archive, e.g. when it is reopened."""
+        self.filter(challenge_id=challenge_id).delete()
+        FinalTeamStanding.objects.filter(challenge_id=challenge_id).delete()
+
+
+class FinalStanding(models.Model):
+    """
+    A participant's final total and rank in a closed challenge.
+
+    Same shape as ParticipantStanding, so leaderboards of closed
+    challenges read it instead; written only by ArchiveManager.
+    """
+
+    challenge = models.ForeignKey(
+        StepChallenge,
+        on_delete=models.CASCADE,
+        related_name="final_standings"
+    )
+
+    participant = models.ForeignKey(
+        Participant,
+        on_delete=models.CASCADE,
+        related_name="final_standings"
+    )
+
+    team = models.ForeignKey(
+        Team,
+        on_delete=models.CASCADE,
+        related_name="final_standings"
+    )
+
+    total_steps = models.PositiveIntegerField(default=0)
+    last_entry_date = models.DateField(null=True, blank=True)
+    rank = models.PositiveIntegerField(default=1)
+
+    objects = ArchiveManager()
+
+    class Meta:
+        unique_together = ("challenge", "participant")
+        indexes = [
+            models.Index(
+                fields=["challenge", "-total_steps", "participant"],
+                name="final_steps_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"#{self.rank} {self.participant} – {self.total_steps} steps (final)"
+
+
+class FinalTeamStanding(models.Model):
+    """A team's final summed total and rank in a closed challenge."""
+
+    challenge = models.ForeignKey(
+        StepChallenge,
+        on_delete=models.CASCADE,
+        related_name="final_team_standings"
+    )
+
+    team = models.ForeignKey(
+        Team,
+        on_delete=models.CASCADE,
+        related_name="final_team_standings"
+    )
+
+    total_steps = models.PositiveBigIntegerField(default=0)
+    rank = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        unique_together = ("challenge", "team")
+        ordering = ["rank"]
+
+    def __str__(self):
+        return f"#{self.rank} {self.team.name} – {self.total_steps} steps (final)"
+
+
+class PendingSubmission(models.Model):
+    """
+    A step entry queued by the entry form in write-behind mode
+    (``STEPS_WRITE_BEHIND``), waiting for ``manage.py drain_submissions``
+    to validate it against the participant's other entries and save it.
+
+    The form only checks what needs no queries (challenge open, date in
+    range); ``status`` tells the client polling the submission whether
+    the entry was created or rejected, and why.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending"
+        CREATED = "created"
+        REJECTED = "rejected"
+
+    participant = models.ForeignKey(
+        Participant,
+        on_delete=models.CASCADE,
+        related_name="submissions"
+    )
+
+    challenge = models.ForeignKey(
+        StepChallenge,
+        on_delete=models.CASCADE,
+        related_name="submissions"
+    )
+
+    date = models.DateField()
+    total_steps = models.PositiveIntegerField()
+
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.PENDING
+    )
+    error = models.CharField(max_length=200, blank=True)
+    entry = models.ForeignKey(
+        StepEntry,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+
+    submitted_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The drain's "oldest pending first" scan
+            models.Index(fields=["status", "id"], name="submission_status_idx"),
+        ]
+
+    def clean(self):
+        # The form has loaded the challenge already: no query here
+        if not self.challenge_id:
+            return
+        if not self.challenge.is_active:
+            raise ValidationError(CLOSED_CHALLENGE_ERROR)
+        if not (self.challenge.start_date <= self.date <= self.challenge.end_date):
+            raise ValidationError(DATE_OUTSIDE_CHALLENGE_ERROR)
+
+    def __str__(self):
+        return f"{self.date} – {self.total_steps} steps ({self.status})"
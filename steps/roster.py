@@ -0,0 +1,253 @@
+"""
+Enroll a whole roster of users, teams and participants in a challenge.
+
+A roster is a CSV with ``username``, ``name``, ``email``, ``team`` and
+``color`` columns (only ``username`` and ``team`` are required). Users
+are looked up with one ``IN`` query per chunk of usernames; missing
+users, teams and participants, and the participants' standings rows,
+are then created with ``bulk_create`` in a single transaction.
+
+Nothing that already exists is changed: known users keep their names,
+known teams their colors, and people already in the challenge stay on
+their team. Importing the same file twice is therefore a no-op.
+"""
+import csv
+import re
+from collections import namedtuple
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+
+from .batch import chunked
+from .caching import invalidate_challenge
+from .live import publish_on_commit
+from .models import Participant, ParticipantStanding, Team
+
+
+ROSTER_COLUMNS = ("username", "name", "email", "team", "color")
+DEFAULT_TEAM_COLOR = "#6c63ff"
+
+ARCHIVED_CHALLENGE_ERROR = "This challenge is closed; reopen it to add participants."
+DUPLICATE_USERNAME_ERROR = "This username appears more than once in the roster."
+INVALID_COLOR_ERROR = "Color must be a hex code such as #6c63ff."
+INVALID_EMAIL_ERROR = "Enter a valid email address."
+MISSING_VALUE_ERROR = "Both 'username' and 'team' are required."
+TEAM_NAME_TOO_LONG_ERROR = "Team names are at most 50 characters."
+USERNAME_TOO_LONG_ERROR = "Usernames are at most 150 characters."
+
+HEX_COLOR = re.compile(r"#[0-9a-fA-F]{6}")
+
+RosterRow = namedtuple("RosterRow", "line username first_name last_name email team color")
+
+
+def parse_roster(stream):
+    """
+    Read roster rows from a CSV text stream, returning them together
+    with ``(line, reason)`` for every row that was rejected.
+    """
+    reader = csv.DictReader(stream)
+    missing = {"username", "team"} - set(reader.fieldnames or ())
+    if missing:
+        raise ValueError(
+            f"The roster needs the columns {', '.join(ROSTER_COLUMNS)} "
+            f"(missing: {', '.join(sorted(missing))})."
+        )
+
+    rows, rejected, seen = [], [], set()
+    for record in reader:
+        line = reader.line_num
+        values = {
+            column: (record.get(column) or "").strip() for column in ROSTER_COLUMNS
+        }
+        error = row_error(values, seen)
+        if error:
+            rejected.append((line, error))
+            continue
+        seen.add(values["username"])
+        first_name, _, last_name = values["name"].partition(" ")
+        rows.append(RosterRow(
+            line,
+            values["username"],
+            first_name,
+            last_name.strip(),
+            values["email"],
+            values["team"],
+            values["color"],
+        ))
+    return rows, rejected
+
+
+def row_error(values, seen):
+    if not values["username"] or not values["team"]:
+        return MISSING_VALUE_ERROR
+    if values["username"] in seen:
+        return DUPLICATE_USERNAME_ERROR
+    if len(values["username"]) > 150:
+        return USERNAME_TOO_LONG_ERROR
+    try:
+        User.username_validator(values["username"])
+    except ValidationError as exc:
+        return exc.messages[0]
+    if values["email"]:
+        try:
+            validate_email(values["email"])
+        except ValidationError:
+            return INVALID_EMAIL_ERROR
+    if len(values["team"]) > 50:
+        return TEAM_NAME_TOO_LONG_ERROR
+    if values["color"] and not HEX_COLOR.fullmatch(values["color"]):
+        return INVALID_COLOR_ERROR
+    return None
+
+
+def import_roster(challenge, rows, batch_size=1000, dry_run=False):
+    """
+    Enroll parsed roster rows in ``challenge``; returns counts of what
+    was created and what already existed. ``dry_run`` rolls it all back.
+    """
+    if challenge.archived_at:
+        raise ValueError(ARCHIVED_CHALLENGE_ERROR)
+
+    counts = dict.fromkeys((
+        "users_created",
+        "users_existing",
+        "teams_created",
+        "participants_created",
+        "already_enrolled",
+    ), 0)
+
+    with transaction.atomic():
+        users = user_ids(row.username for row in rows)
+        counts["users_existing"] = len(users)
+        new_users = [
+            User(
+                username=row.username,
+                first_name=row.first_name,
+                last_name=row.last_name,
+                email=row.email,
+                password=make_password(None),  # Unusable until they reset it
+            )
+            for row in rows if row.username not in users
+        ]
+        User.objects.bulk_create(new_users, batch_size=batch_size)
+        users.update(created_ids(new_users, "username", user_ids))
+        counts["users_created"] = len(new_users)
+
+        teams = dict(
+            Team.objects.filter(challenge=challenge).values_list("name", "pk")
+        )
+        new_teams = {}
+        for row in rows:
+            if row.team not in teams and row.team not in new_teams:
+                new_teams[row.team] = Team(
+                    challenge=challenge,
+                    name=row.team,
+                    color=row.color or DEFAULT_TEAM_COLOR,
+                )
+        Team.objects.bulk_create(new_teams.values(), batch_size=batch_size)
+        teams.update(created_ids(
+            new_teams.values(),
+            "name",
+            lambda names: dict(
+                Team.objects.filter(challenge=challenge, name__in=names)
+                .values_list("name", "pk")
+            ),
+        ))
+        counts["teams_created"] = len(new_teams)
+
+        enrolled = set()
+        for chunk in chunked(users.values()):
+            enrolled.update(
+                Participant.objects
+                .filter(team__challenge=challenge, user_id__in=chunk)
+                .values_list("user_id", flat=True)
+            )
+        new_participants = [
+            Participant(user_id=users[row.username], team_id=teams[row.team])
+            for row in rows if users[row.username] not in enrolled
+        ]
+        Participant.objects.bulk_create(new_participants, batch_size=batch_size)
+        counts["participants_created"] = len(new_participants)
+        counts["already_enrolled"] = len(rows) - len(new_participants)
+
+        if new_participants:
+            participant_ids = created_ids(
+                new_participants,
+                "user_id",
+                lambda ids: participants_by_user(challenge, ids),
+            )
+            add_standings(
+                challenge,
+                [
+                    (participant_ids[participant.user_id], participant.team_id)
+                    for participant in new_participants
+                ],
+                batch_size,
+            )
+            # Many rows were added: live leaderboards reload instead
+            publish_on_commit(challenge.pk, {"type": "reset"})
+        if new_teams or new_participants:
+            invalidate_challenge(challenge.pk)
+
+        if dry_run:
+            transaction.set_rollback(True)
+    return counts
+
+
+def user_ids(usernames):
+    """``{username: id}`` of the users that exist, a query per chunk."""
+    found = {}
+    for chunk in chunked(set(usernames)):
+        found.update(
+            User.objects.filter(username__in=chunk).values_list("username", "pk")
+        )
+    return found
+
+
+def created_ids(objects, key, lookup):
+    """
+    ``{key: pk}`` of freshly bulk-created objects. Backends that don't
+    return primary keys from bulk inserts are asked with ``lookup``.
+    """
+    ids = {getattr(obj, key): obj.pk for obj in objects if obj.pk is not None}
+    missing = [getattr(obj, key) for obj in objects if obj.pk is None]
+    if missing:
+        ids.update(lookup(missing))
+    return ids
+
+
+def participants_by_user(challenge, user_ids):
+    found = {}
+    for chunk in chunked(user_ids):
+        found.update(
+            Participant.objects
+            .filter(team__challenge=challenge, user_id__in=chunk)
+            .values_list("user_id", "pk")
+        )
+    return found
+
+
+def add_standings(challenge, participants, batch_size):
+    """
+    Standings rows for ``(participant_id, team_id)`` pairs without any
+    entries, as ``Participant.save()`` adds them one at a time: no
+    steps yet, ranked just behind everyone who has logged some.
+    """
+    rank = ParticipantStanding.objects.filter(
+        challenge=challenge, total_steps__gt=0
+    ).count() + 1
+    ParticipantStanding.objects.bulk_create(
+        [
+            ParticipantStanding(
+                challenge=challenge,
+                participant_id=participant_id,
+                team_id=team_id,
+                rank=rank,
+            )
+            for participant_id, team_id in participants
+        ],
+        batch_size=batch_size,
+    )
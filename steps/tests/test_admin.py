@@ -0,0 +1,43 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from steps.admin import EstimatedCountPaginator
+from steps.benchmarks import seed
+from steps.models import StepEntry
+
+
+class EstimatedCountPaginatorTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed(teams=2, participants=10, days=5)  # 50 entries
+
+    def count(self, queryset):
+        with CaptureQueriesContext(connection) as captured:
+            count = EstimatedCountPaginator(queryset, 10).count
+        counted = any("COUNT(*)" in query["sql"] for query in captured)
+        return count, counted
+
+    def analyze(self):
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def test_tables_without_statistics_are_counted(self):
+        self.assertEqual(self.count(StepEntry.objects.all()), (50, True))
+
+    @override_settings(STEPS_ADMIN_EXACT_COUNT_LIMIT=10)
+    def test_large_analyzed_tables_use_the_estimate(self):
+        self.analyze()
+        StepEntry.objects.filter(pk=StepEntry.objects.first().pk).delete()
+        # Statistics still say 50 rows
+        self.assertEqual(self.count(StepEntry.objects.all()), (50, False))
+
+    @override_settings(STEPS_ADMIN_EXACT_COUNT_LIMIT=10)
+    def test_filtered_changelists_are_counted(self):
+        self.analyze()
+        queryset = StepEntry.objects.filter(total_steps__gt=0)
+        self.assertEqual(self.count(queryset), (50, True))
+
+    def test_small_tables_are_counted(self):
+        self.analyze()
+        self.assertEqual(self.count(StepEntry.objects.all()), (50, True))
@@ -0,0 +1,117 @@
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import reverse
+
+from steps.models import StepChallenge, Team, Participant, StepEntry
+
+
+@override_settings(STEPS_LEADERBOARD_PAGE_SIZE=2, STEPS_LEADERBOARD_AROUND=1)
+class AsyncViewsMatchSyncViewsTest(TestCase):
+    """The async pages must show exactly what the sync ones do."""
+
+    def setUp(self):
+        cache.clear()
+        self.challenge = StepChallenge.objects.create(
+            name="Challenge",
+            start_date=date.today() - timedelta(days=5),
+            end_date=date.today() + timedelta(days=5),
+            is_active=True,
+        )
+        red = Team.objects.create(challenge=self.challenge, name="Red", color="#f00")
+        blue = Team.objects.create(challenge=self.challenge, name="Blue", color="#00f")
+        self.people = {}
+        for name, steps, team in [
+            ("a", 900, red),
+            ("b", 700, blue),
+            ("c", 700, red),
+            ("d", 300, blue),
+            ("e", 100, red),
+        ]:
+            user = User.objects.create_user(username=name, password="p")
+            participant = self.people[name] = Participant.objects.create(
+                user=user, team=team
+            )
+            StepEntry.objects.create(
+                participant=participant,
+                challenge=self.challenge,
+                date=date.today() - timedelta(days=1),
+                total_steps=steps,
+            )
+        self.user = User.objects.get(username="d")
+
+    def home(self, response):
+        context = response.context
+        return (
+            context["current_challenge"],
+            context["my_standing"],
+            [p.participant_id for p in context["top_participants"]],
+            context["top_teams"],
+            context["quick_stats"],
+            context["daily_activity"],
+            [e.pk for e in context["recent_entries"]],
+        )
+
+    def leaderboard(self, response):
+        context = response.context
+        return (
+            context["challenge"],
+            context["challenges"],
+            [(p.participant_id, p.rank) for p in context["participants"]],
+            context["teams"],
+            context.get("my_standing"),
+            context["previous_cursor"],
+            context["next_cursor"],
+        )
+
+    async def compare(self, sync_url, async_url, extract, login=False, **params):
+        client = AsyncClient()
+        if login:
+            await client.aforce_login(self.user)
+        sync_response = await client.get(sync_url, params)
+        async_response = await client.get(async_url, params)
+        self.assertEqual(async_response.status_code, 200)
+        self.assertEqual(extract(async_response), extract(sync_response))
+        return async_response
+
+    async def test_home(self):
+        for login in (False, True):
+            for cached in (False, True):
+                with self.subTest(login=login, cached=cached), \
+                        self.settings(STEPS_LEADERBOARD_CACHE=cached):
+                    await self.compare(
+                        reverse("steps-home"),
+                        reverse("steps-home-async"),
+                        self.home,
+                        login=login,
+                    )
+
+    async def test_leaderboard_windows(self):
+        challenge = self.challenge.pk
+        c, d = self.people["c"].pk, self.people["d"].pk
+        for params in (
+            {},
+            {"challenge": challenge},
+            {"challenge": challenge, "after": f"700.{c}"},
+            {"challenge": challenge, "before": f"300.{d}"},
+            {"challenge": challenge, "around": "me"},
+        ):
+            with self.subTest(**params):
+                await self.compare(
+                    reverse("steps-leaderboard"),
+                    reverse("steps-leaderboard-async"),
+                    self.leaderboard,
+                    login=True,
+                    **params,
+                )
+
+    async def test_anonymous_leaderboard_of_a_challenge(self):
+        response = await self.compare(
+            reverse("steps-leaderboard"),
+            reverse("steps-leaderboard-async"),
+            self.leaderboard,
+            challenge=self.challenge.pk,
+        )
+        self.assertEqual(len(response.context["participants"]), 2)
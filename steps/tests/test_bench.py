@@ -0,0 +1,87 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.template import Context, Template
+from django.test import Client, SimpleTestCase, TestCase
+from django.urls import reverse
+
+from steps.benchmarks import percentile, seed, summarize
+from steps.management.commands.bench import Command, header_queries
+from steps.management.commands.bench_rows import ROW_TEMPLATES, row_queries
+from steps.management.commands.explain_queries import Command as ExplainCommand
+from steps.models import ParticipantStanding
+
+
+class BenchmarkSummaryTest(SimpleTestCase):
+    def test_percentile_uses_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 95), 95)
+        self.assertEqual(percentile([7], 99), 7)
+        self.assertIsNone(percentile([], 50))
+
+    def test_summarize_reports_milliseconds_and_max_queries(self):
+        summary = summarize([0.001, 0.002, 0.003, 0.004], [3, 3, 4, 3])
+        self.assertEqual(summary["p50_ms"], 2.0)
+        self.assertEqual(summary["p99_ms"], 4.0)
+        self.assertEqual(summary["mean_ms"], 2.5)
+        self.assertEqual(summary["requests"], 4)
+        self.assertEqual(summary["queries"], 4)
+
+    def test_query_count_is_read_from_server_timing(self):
+        header = 'db;dur=4.1;desc="6 queries", render;dur=2.3, total;dur=9.8'
+        self.assertEqual(header_queries(header), 6)
+
+
+class BenchBaselineComparisonTest(SimpleTestCase):
+    def compare(self, current, baseline):
+        command = Command(stdout=StringIO(), stderr=StringIO())
+        return command.compare(current, baseline, tolerance=0.25)
+
+    def test_slower_p95_or_more_queries_is_a_regression(self):
+        baseline = {
+            "home": {"p95_ms": 10.0, "queries": 3},
+            "leaderboard": {"p95_ms": 10.0, "queries": 3},
+            "my-entries": {"p95_ms": 10.0, "queries": 2},
+        }
+        current = {
+            "home": {"p95_ms": 12.0, "queries": 3},  # Within tolerance
+            "leaderboard": {"p95_ms": 13.0, "queries": 3},
+            "my-entries": {"p95_ms": 9.0, "queries": 3},
+        }
+        self.assertEqual(self.compare(current, baseline), ["leaderboard", "my-entries"])
+
+    def test_views_missing_from_baseline_are_skipped(self):
+        self.assertEqual(self.compare({"home": {"p95_ms": 1, "queries": 1}}, {}), [])
+
+
+class BenchRowsTest(TestCase):
+    def test_both_row_shapes_render_the_same_markup(self):
+        seed(teams=3, participants=12, days=2)
+        queries = row_queries(ParticipantStanding.objects.all())
+        models, rows = (
+            Template(ROW_TEMPLATES[shape]).render(
+                Context({"participants": list(queries[shape])})
+            )
+            for shape in ("models", "rows")
+        )
+        self.assertEqual(models.count("<tr "), 12)
+        self.assertEqual(rows, models)
+
+
+class ExplainQueriesTest(TestCase):
+    def test_board_queries_are_planned_even_when_cached(self):
+        cache.clear()
+        seed(teams=3, participants=12, days=2)
+        client = Client()
+        client.force_login(User.objects.order_by("pk").first())
+        out = StringIO()
+        ExplainCommand(stdout=out).explain_view(
+            client, "leaderboard", reverse("steps-leaderboard"), repeat=1
+        )
+        # The first page of the board, planned on the standings index
+        self.assertIn(
+            "SEARCH steps_participantstanding USING INDEX standing_steps_idx",
+            out.getvalue(),
+        )
@@ -0,0 +1,148 @@
+import tempfile
+from datetime import date, timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from steps import caching
+from steps.models import StepChallenge, Team, Participant, StepEntry
+
+
+class LeaderboardCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.challenge = StepChallenge.objects.create(
+            name="Challenge",
+            start_date=date.today() - timedelta(days=5),
+            end_date=date.today() + timedelta(days=5),
+        )
+        self.team = Team.objects.create(
+            challenge=self.challenge, name="Red", color="#ff0000"
+        )
+        user = User.objects.create_user(username="alice", password="p")
+        self.participant = Participant.objects.create(user=user, team=self.team)
+        caching.reset_stats()
+
+    def get_leaderboard(self):
+        return self.client.get(
+            reverse("steps-leaderboard"), {"challenge": self.challenge.pk}
+        )
+
+    def log(self, steps, days_ago=0):
+        StepEntry.objects.create(
+            participant=self.participant,
+            challenge=self.challenge,
+            date=date.today() - timedelta(days=days_ago),
+            total_steps=steps,
+        )
+
+    def test_second_load_is_served_from_cache(self):
+        self.get_leaderboard()
+        with self.assertNumQueries(1):  # Only the selected challenge
+            response = self.get_leaderboard()
+        self.assertEqual(len(response.context["participants"]), 1)
+        # Each page load looks up its board and its snapshot range
+        self.assertEqual(caching.stats(), {"hits": 2, "misses": 2})
+
+    def test_step_entry_write_invalidates(self):
+        self.get_leaderboard()
+        self.log(4000)
+        response = self.get_leaderboard()
+        self.assertEqual(response.context["participants"][0].total_steps, 4000)
+        self.assertEqual(caching.stats()["misses"], 4)
+
+    def test_team_and_participant_writes_invalidate(self):
+        self.get_leaderboard()
+        self.team.name = "Crimson"
+        self.team.save()
+        response = self.get_leaderboard()
+        self.assertEqual(response.context["teams"][0]["team__name"], "Crimson")
+
+        other = User.objects.create_user(username="bob", password="p")
+        Participant.objects.create(user=other, team=self.team)
+        response = self.get_leaderboard()
+        self.assertEqual(len(response.context["participants"]), 2)
+
+    def test_bulk_and_cascade_deletes_invalidate(self):
+        self.log(4000)
+        self.get_leaderboard()
+        StepEntry.objects.filter(participant=self.participant).delete()
+        response = self.get_leaderboard()
+        self.assertEqual(response.context["participants"][0].total_steps, 0)
+
+        Team.objects.filter(pk=self.team.pk).delete()
+        response = self.get_leaderboard()
+        self.assertEqual(response.context["participants"], [])
+        self.assertEqual(response.context["teams"], [])
+
+        before = caching.challenge_version(self.challenge.pk)
+        StepChallenge.objects.filter(pk=self.challenge.pk).delete()
+        self.assertNotEqual(caching.challenge_version(self.challenge.pk), before)
+
+    def test_rebuild_command_invalidates(self):
+        self.get_leaderboard()
+        before = caching.challenge_version(self.challenge.pk)
+        call_command("rebuild_standings", stdout=StringIO())
+        self.assertNotEqual(caching.challenge_version(self.challenge.pk), before)
+
+    def test_other_challenges_keep_their_cache(self):
+        before = caching.challenge_version(self.challenge.pk)
+        other = StepChallenge.objects.create(
+            name="Other",
+            start_date=date.today(),
+            end_date=date.today() + timedelta(days=5),
+        )
+        Team.objects.create(challenge=other, name="Blue", color="#0000ff")
+        self.assertEqual(caching.challenge_version(self.challenge.pk), before)
+
+    def test_home_page_is_cached(self):
+        self.log(4000)
+        self.client.get(reverse("steps-home"))
+        response = self.client.get(reverse("steps-home"))
+        self.assertEqual(caching.stats(), {"hits": 1, "misses": 1})
+        self.assertEqual(response.context["quick_stats"]["participant_count"], 1)
+
+    @override_settings(STEPS_LEADERBOARD_CACHE=False)
+    def test_disabled_cache_always_recomputes(self):
+        self.get_leaderboard()
+        self.get_leaderboard()
+        self.assertEqual(caching.stats(), {"hits": 0, "misses": 0})
+
+
+class FileBasedLeaderboardCacheTest(LeaderboardCacheTest):
+    """Same behaviour on the file-based backend."""
+
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.enterContext(
+            override_settings(
+                CACHES={
+                    "default": {
+                        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                        "LOCATION": self.cache_dir.name,
+                    }
+                }
+            )
+        )
+        self.addCleanup(self.cache_dir.cleanup)
+        super().setUp()
+
+    def test_command_reports_the_shared_counters(self):
+        self.get_leaderboard()
+        self.get_leaderboard()
+        out = StringIO()
+        call_command("leaderboard_cache", "--reset", stdout=out)
+        self.assertIn("2 hits, 2 misses (50% hit rate)", out.getvalue())
+        self.assertEqual(caching.stats(), {"hits": 0, "misses": 0})
+
+    def test_command_refuses_a_local_memory_cache(self):
+        with override_settings(CACHES={
+            "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+        }):
+            with self.assertRaisesMessage(CommandError, "local to each process"):
+                call_command("leaderboard_cache", stdout=StringIO())
@@ -0,0 +1,193 @@
+from datetime import date, timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.urls import reverse
+
+from steps.batch import save_entries, validate_entries
+from steps.models import ChallengeDailyStats, Participant, StepEntry, Team
+
+from .test_standings import StandingsTestMixin
+
+
+def day(days_ago):
+    return date.today() - timedelta(days=days_ago)
+
+
+class DailyStatsTestMixin(StandingsTestMixin):
+    def rollup(self):
+        return {
+            day: (delta, count)
+            for day, delta, count in (
+                ChallengeDailyStats.objects
+                .filter(challenge=self.challenge)
+                .values_list("date", "step_delta", "entry_count")
+            )
+            if delta or count
+        }
+
+    def assertMatchesEntries(self):
+        expected = {
+            day: values
+            for day, values in ChallengeDailyStats.objects.live_days(
+                self.challenge.pk
+            ).items()
+        }
+        self.assertEqual(self.rollup(), expected)
+
+
+class ChallengeDailyStatsMaintenanceTest(DailyStatsTestMixin, TestCase):
+    def test_entries_record_progress_per_day(self):
+        self.log(self.alice, 3, 1000)
+        self.log(self.alice, 1, 4000)
+        self.log(self.bob, 1, 2500)
+        self.assertEqual(
+            self.rollup(),
+            {day(3): (1000, 1), day(1): (5500, 2)},
+        )
+
+    def test_backdated_entry_moves_steps_from_next_day(self):
+        self.log(self.alice, 1, 5000)
+        self.log(self.alice, 3, 2000)
+        self.assertEqual(
+            self.rollup(),
+            {day(3): (2000, 1), day(1): (3000, 1)},
+        )
+        self.assertMatchesEntries()
+
+    def test_update_and_delete(self):
+        first = self.log(self.alice, 3, 2000)
+        middle = self.log(self.alice, 2, 3000)
+        self.log(self.alice, 1, 6000)
+
+        middle.total_steps = 4500
+        middle.save()
+        self.assertMatchesEntries()
+
+        middle.delete()
+        self.assertEqual(
+            self.rollup(),
+            {day(3): (2000, 1), day(1): (4000, 1)},
+        )
+
+        first.date = day(4)
+        first.save()
+        self.assertMatchesEntries()
+
+    def test_sum_of_deltas_is_sum_of_latest_totals(self):
+        self.log(self.alice, 3, 1000)
+        self.log(self.alice, 1, 4000)
+        self.log(self.carol, 2, 7000)
+        total = sum(delta for delta, _ in self.rollup().values())
+        self.assertEqual(total, 11000)
+
+    def test_batch_insert_matches_single_inserts(self):
+        self.log(self.alice, 5, 1000)
+        self.log(self.alice, 1, 9000)
+        accepted, rejected = validate_entries([
+            (0, self.alice.pk, self.challenge.pk, day(3), 4000),
+            (1, self.alice.pk, self.challenge.pk, day(0), 9500),
+            (2, self.bob.pk, self.challenge.pk, day(3), 3000),
+        ])
+        self.assertEqual(rejected, [])
+        save_entries(accepted)
+        self.assertEqual(
+            self.rollup(),
+            {
+                day(5): (1000, 1),
+                day(3): (6000, 2),
+                day(1): (5000, 1),
+                day(0): (500, 1),
+            },
+        )
+
+
+class DailyStatsDeleteCascadeTest(DailyStatsTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.log(self.alice, 3, 1000)
+        self.middle = self.log(self.alice, 2, 2500)
+        self.log(self.alice, 1, 4000)
+        self.log(self.bob, 2, 3000)
+        self.log(self.carol, 2, 2000)
+
+    def test_bulk_delete_in_the_admin(self):
+        self.client.force_login(
+            User.objects.create_superuser("admin", "admin@example.com", "p")
+        )
+        self.client.post(reverse("admin:steps_stepentry_changelist"), {
+            "action": "delete_selected",
+            "_selected_action": [self.middle.pk],
+            "post": "yes",
+        })
+        self.assertEqual(self.rollup()[day(2)], (5000, 2))
+        self.assertEqual(self.rollup()[day(1)], (3000, 1))
+        self.assertMatchesEntries()
+
+    def test_bulk_update(self):
+        StepEntry.objects.filter(pk=self.middle.pk).update(date=day(4), total_steps=500)
+        self.assertMatchesEntries()
+
+    def test_deleting_a_participant(self):
+        self.alice.delete()
+        self.assertEqual(self.rollup(), {day(2): (5000, 2)})
+        Participant.objects.filter(pk=self.bob.pk).delete()
+        self.assertEqual(self.rollup(), {day(2): (2000, 1)})
+
+    def test_deleting_a_team(self):
+        self.red.delete()
+        self.assertEqual(self.rollup(), {day(2): (2000, 1)})
+        Team.objects.filter(pk=self.blue.pk).delete()
+        self.assertEqual(self.rollup(), {})
+
+    def test_deleting_a_user(self):
+        self.bob.user.delete()
+        self.assertMatchesEntries()
+        self.assertEqual(self.rollup()[day(2)], (3500, 2))
+
+
+class DailyStatsRebuildTest(DailyStatsTestMixin, TestCase):
+    def test_rebuild_restores_rollup(self):
+        self.log(self.alice, 2, 3000)
+        self.log(self.bob, 1, 4000)
+        ChallengeDailyStats.objects.filter(challenge=self.challenge).update(
+            step_delta=1
+        )
+        out = StringIO()
+        call_command("rebuild_standings", stdout=out)
+        self.assertIn("2 daily stats", out.getvalue())
+        self.assertMatchesEntries()
+
+    def test_check_reports_rollup_mismatch(self):
+        self.log(self.alice, 2, 3000)
+        ChallengeDailyStats.objects.all().delete()
+        with self.assertRaises(CommandError):
+            call_command(
+                "rebuild_standings", "--check", stdout=StringIO(), stderr=StringIO()
+            )
+
+
+class HomeReadsDailyStatsTest(DailyStatsTestMixin, TestCase):
+    def test_quick_stats_use_latest_totals(self):
+        self.log(self.alice, 3, 1000)
+        self.log(self.alice, 1, 4000)
+        self.log(self.bob, 1, 2000)
+        response = self.client.get(reverse("steps-home"))
+        stats = response.context["quick_stats"]
+        self.assertEqual(stats["total_steps"], 6000)
+        self.assertEqual(stats["entry_count"], 3)
+        self.assertEqual(stats["avg_steps"], 2000)
+
+    def test_daily_activity_covers_every_day_so_far(self):
+        self.log(self.alice, 3, 1000)
+        self.log(self.alice, 1, 4000)
+        response = self.client.get(reverse("steps-home"))
+        activity = response.context["daily_activity"]
+        self.assertEqual(len(activity), 11)  # challenge started 10 days ago
+        by_date = {bar["date"]: bar for bar in activity}
+        self.assertEqual(by_date[day(1)]["percent"], 100)
+        self.assertEqual(by_date[day(3)]["percent"], 33)
+        self.assertEqual(by_date[day(2)]["steps"], 0)
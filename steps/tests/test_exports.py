@@ -0,0 +1,137 @@
+import csv
+import gzip
+import io
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from steps.exports import EXPORTS, csv_chunks, encoded
+from steps.models import FinalStanding, StepChallenge
+
+from .test_standings import StandingsTestMixin
+
+
+def read_csv(response):
+    body = b"".join(response.streaming_content)
+    if response["Content-Type"] == "application/gzip":
+        body = gzip.decompress(body)
+    return list(csv.reader(io.StringIO(body.decode())))
+
+
+class ExportTestMixin(StandingsTestMixin):
+    def setUp(self):
+        super().setUp()
+        self.staff = User.objects.create_user("organizer", password="p", is_staff=True)
+        self.log(self.alice, 3, 5000)
+        self.log(self.alice, 1, 9000)
+        self.log(self.bob, 2, 7000)
+
+
+class ChallengeExportViewTest(ExportTestMixin, TestCase):
+    def get(self, kind, **params):
+        self.client.force_login(self.staff)
+        return self.client.get(
+            reverse(f"steps-export-{kind}", args=[self.challenge.pk]), params
+        )
+
+    def test_standings_in_rank_order(self):
+        response = self.get("standings")
+        self.assertTrue(response.streaming)
+        self.assertEqual(
+            response["Content-Disposition"], 'attachment; filename="challenge-standings.csv"'
+        )
+        header, *rows = read_csv(response)
+        self.assertEqual(tuple(header), EXPORTS["standings"])
+        self.assertEqual(
+            [(row[1], row[3], row[6], row[7]) for row in rows],
+            [("1", "alice", "Red", "9000"), ("2", "bob", "Red", "7000"), ("3", "carol", "Blue", "0")],
+        )
+
+    def test_closed_challenge_exports_its_final_standings(self):
+        self.challenge.is_active = False
+        self.challenge.save()
+        FinalStanding.objects.filter(participant=self.bob).update(rank=7)
+        rows = read_csv(self.get("standings"))[1:]
+        self.assertEqual([row[1] for row in rows if row[3] == "bob"], ["7"])
+
+    def test_entries_grouped_by_participant(self):
+        header, *rows = read_csv(self.get("entries"))
+        self.assertEqual(tuple(header), EXPORTS["entries"])
+        today = date.today()
+        self.assertEqual(
+            [(row[2], row[4], row[5], row[6]) for row in rows],
+            [
+                ("alice", str(today - timedelta(days=3)), "5000", "5000"),
+                ("alice", str(today - timedelta(days=1)), "9000", "4000"),
+                ("bob", str(today - timedelta(days=2)), "7000", "7000"),
+            ],
+        )
+
+    def test_gzip(self):
+        response = self.get("entries", gzip="1")
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        self.assertTrue(response["Content-Disposition"].endswith('entries.csv.gz"'))
+        self.assertEqual(read_csv(response), read_csv(self.get("entries")))
+
+    def test_staff_only(self):
+        url = reverse("steps-export-entries", args=[self.challenge.pk])
+        self.assertEqual(self.client.get(url).status_code, 302)  # To login
+        self.client.force_login(self.alice.user)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+    def test_unknown_challenge(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse("steps-export-entries", args=[999]))
+        self.assertEqual(response.status_code, 404)
+
+
+class ExportStreamTest(ExportTestMixin, TestCase):
+    def test_header_goes_out_before_any_query(self):
+        chunks = csv_chunks("entries", [self.challenge], chunk_size=2)
+        with self.assertNumQueries(0):
+            self.assertEqual(next(chunks), ",".join(EXPORTS["entries"]) + "\r\n")
+        with self.assertNumQueries(1):
+            rest = list(chunks)
+        # Written out a chunk of rows at a time
+        self.assertEqual([chunk.count("\n") for chunk in rest], [2, 1])
+
+    def test_gzip_output_is_one_valid_file(self):
+        chunks = ["a,b\r\n", "1,2\r\n" * 1000]
+        self.assertEqual(
+            gzip.decompress(b"".join(encoded(iter(chunks), compress=True))).decode(),
+            "".join(chunks),
+        )
+
+
+class ChallengeAdminExportTest(ExportTestMixin, TestCase):
+    def test_action_exports_every_selected_challenge(self):
+        other = StepChallenge.objects.create(
+            name="Other",
+            start_date=date.today() - timedelta(days=5),
+            end_date=date.today(),
+            is_active=True,
+        )
+        other_team = other.teams.create(name="Green", color="#00ff00")
+        self.make_participant("dave", other_team)
+        self.staff.is_superuser = True
+        self.staff.save()
+        self.client.force_login(self.staff)
+        response = self.client.post(reverse("admin:steps_stepchallenge_changelist"), {
+            "action": "export_standings",
+            "_selected_action": [self.challenge.pk, other.pk],
+        })
+        self.assertEqual(
+            response["Content-Disposition"], 'attachment; filename="challenges-standings.csv"'
+        )
+        rows = read_csv(response)[1:]
+        self.assertEqual(
+            [(row[0], row[3]) for row in rows],
+            [
+                (str(self.challenge.pk), "alice"),
+                (str(self.challenge.pk), "bob"),
+                (str(self.challenge.pk), "carol"),
+                (str(other.pk), "dave"),
+            ],
+        )
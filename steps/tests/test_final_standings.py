@@ -0,0 +1,198 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.urls import reverse
+
+from steps.models import FinalStanding, FinalTeamStanding, StepChallenge, StepEntry
+
+from .test_standings import StandingsTestMixin
+
+
+class FinalStandingsTestMixin(StandingsTestMixin):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.log(self.alice, 3, 5000)
+        self.log(self.bob, 2, 7000)
+        self.log(self.carol, 1, 5000)
+
+    def close(self, is_active=False):
+        self.challenge.is_active = is_active
+        self.challenge.save()
+
+    def final_standings(self):
+        return list(
+            FinalStanding.objects
+            .filter(challenge=self.challenge)
+            .ranked()
+            .values_list("participant_id", "total_steps", "rank")
+        )
+
+    def final_team_standings(self):
+        return list(
+            FinalTeamStanding.objects.filter(challenge=self.challenge)
+            .order_by("rank", "team_id")
+            .values_list("team_id", "total_steps", "rank")
+        )
+
+
+class FreezeFinalStandingsTest(FinalStandingsTestMixin, TestCase):
+    def test_closing_freezes_participants_and_teams(self):
+        self.close()
+        self.assertIsNotNone(self.challenge.archived_at)
+        self.assertEqual(self.final_standings(), [
+            (self.bob.pk, 7000, 1), (self.alice.pk, 5000, 2), (self.carol.pk, 5000, 2),
+        ])
+        self.assertEqual(
+            list(
+                FinalTeamStanding.objects.filter(challenge=self.challenge)
+                .values_list("team_id", "total_steps", "rank")
+            ),
+            [(self.red.pk, 12000, 1), (self.blue.pk, 5000, 2)],
+        )
+
+    def test_saving_a_closed_challenge_keeps_its_archive(self):
+        self.close()
+        archived_at = self.challenge.archived_at
+        self.challenge.name = "Renamed"
+        with self.assertNumQueries(3):  # Savepoint, update, release
+            self.challenge.save()
+        self.assertEqual(self.challenge.archived_at, archived_at)
+        self.assertEqual(len(self.final_standings()), 3)
+
+    def test_reopening_discards_the_archive(self):
+        self.close()
+        self.close(is_active=True)
+        self.assertIsNone(StepChallenge.objects.get(pk=self.challenge.pk).archived_at)
+        self.assertFalse(FinalStanding.objects.exists())
+        self.assertFalse(FinalTeamStanding.objects.exists())
+
+        self.log(self.carol, 0, 9000)
+        self.close()
+        self.assertEqual(self.final_standings()[0], (self.carol.pk, 9000, 1))
+
+    def test_challenges_created_closed_stay_live(self):
+        challenge = StepChallenge.objects.create(
+            name="Imported",
+            start_date=self.challenge.start_date,
+            end_date=self.challenge.end_date,
+            is_active=False,
+        )
+        self.assertIsNone(challenge.archived_at)
+        self.assertFalse(FinalStanding.objects.filter(challenge=challenge).exists())
+
+    def test_admin_list_editable_closes_the_challenge(self):
+        admin = User.objects.create_superuser("admin", "admin@example.com", "p")
+        self.client.force_login(admin)
+        response = self.client.post(
+            reverse("admin:steps_stepchallenge_changelist"),
+            {
+                "form-TOTAL_FORMS": "1",
+                "form-INITIAL_FORMS": "1",
+                "form-0-id": self.challenge.pk,
+                "_save": "Save",
+            },
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertIsNotNone(StepChallenge.objects.get(pk=self.challenge.pk).archived_at)
+        self.assertEqual(len(self.final_standings()), 3)
+
+    def test_rebuild_standings_checks_and_refreezes_the_archive(self):
+        self.close()
+        FinalStanding.objects.filter(participant=self.bob).update(total_steps=1)
+
+        with self.assertRaises(CommandError):
+            call_command("rebuild_standings", "--check", stdout=StringIO(), stderr=StringIO())
+
+        out = StringIO()
+        call_command("rebuild_standings", stdout=out, stderr=StringIO())
+        self.assertIn("refroze 3 final standings", out.getvalue())
+        self.assertEqual(self.final_standings()[0], (self.bob.pk, 7000, 1))
+
+
+class ArchiveDeletesTest(FinalStandingsTestMixin, TestCase):
+    """Deletes still reach a closed challenge; its archive follows them."""
+
+    def setUp(self):
+        super().setUp()
+        self.close()
+
+    def test_deleting_an_entry_refreezes(self):
+        StepEntry.objects.get(participant=self.bob).delete()
+        self.assertEqual(self.final_standings(), [
+            (self.alice.pk, 5000, 1), (self.carol.pk, 5000, 1), (self.bob.pk, 0, 3),
+        ])
+        self.assertEqual(self.final_team_standings(), [
+            (self.red.pk, 5000, 1), (self.blue.pk, 5000, 1),
+        ])
+
+    def test_bulk_delete_refreezes(self):
+        StepEntry.objects.filter(participant__in=[self.alice, self.bob]).delete()
+        self.assertEqual(self.final_standings()[0], (self.carol.pk, 5000, 1))
+        self.assertEqual(self.final_team_standings()[0], (self.blue.pk, 5000, 1))
+
+    def test_deleting_participants_and_users_closes_the_gap(self):
+        self.bob.delete()
+        self.alice.user.delete()
+        self.assertEqual(self.final_standings(), [(self.carol.pk, 5000, 1)])
+        self.assertEqual(self.final_team_standings(), [
+            (self.blue.pk, 5000, 1), (self.red.pk, 0, 2),
+        ])
+
+    def test_deleting_a_team_refreezes(self):
+        self.red.delete()
+        self.assertEqual(self.final_standings(), [(self.carol.pk, 5000, 1)])
+        self.assertEqual(self.final_team_standings(), [(self.blue.pk, 5000, 1)])
+
+    def test_moving_a_participant_refreezes(self):
+        self.carol.team = self.red
+        self.carol.save()
+        self.assertEqual(self.final_team_standings(), [(self.red.pk, 17000, 1)])
+
+    def test_new_participant_is_frozen(self):
+        dave = self.make_participant("dave", self.blue)
+        self.assertIn((dave.pk, 0, 4), self.final_standings())
+        call_command("rebuild_standings", "--check", stdout=StringIO(), stderr=StringIO())
+
+
+class ClosedLeaderboardTest(FinalStandingsTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.close()
+        self.url = reverse("steps-leaderboard")
+
+    def test_leaderboard_reads_the_archive(self):
+        FinalStanding.objects.filter(participant=self.carol).update(rank=3)
+        response = self.client.get(self.url, {"challenge": self.challenge.pk})
+        self.assertEqual(
+            [(row.participant_id, row.rank) for row in response.context["participants"]],
+            [(self.bob.pk, 1), (self.alice.pk, 2), (self.carol.pk, 3)],
+        )
+        self.assertEqual(
+            [(team["team__id"], team["team_steps"], team["rank"])
+             for team in response.context["teams"]],
+            [(self.red.pk, 12000, 1), (self.blue.pk, 5000, 2)],
+        )
+
+    def test_archive_pages_and_around_me(self):
+        self.client.force_login(self.carol.user)
+        with self.settings(STEPS_LEADERBOARD_PAGE_SIZE=1, STEPS_LEADERBOARD_AROUND=1):
+            response = self.client.get(
+                self.url, {"challenge": self.challenge.pk, "around": "me"}
+            )
+        self.assertEqual(response.context["my_standing"].participant_id, self.carol.pk)
+
+    def test_api_serves_the_archive(self):
+        data = self.client.get(
+            reverse("steps-api-leaderboard", args=[self.challenge.pk])
+        ).json()
+        self.assertFalse(data["challenge"]["is_active"])
+        self.assertEqual(
+            [row["participant"] for row in data["participants"]],
+            [self.bob.pk, self.alice.pk, self.carol.pk],
+        )
+        self.assertEqual(data["teams"][0]["total_steps"], 12000)
@@ -0,0 +1,208 @@
+import tempfile
+from datetime import date, timedelta
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.urls import reverse
+
+from steps.models import Participant, ParticipantStanding, StepChallenge, StepEntry, Team
+from steps.roster import (
+    DUPLICATE_USERNAME_ERROR,
+    INVALID_COLOR_ERROR,
+    INVALID_EMAIL_ERROR,
+    MISSING_VALUE_ERROR,
+    import_roster,
+    parse_roster,
+)
+
+from .test_standings import StandingsTestMixin
+
+
+ROSTER = """username,name,email,team,color
+alice,Alice Adams,alice@example.com,Red,#ff0000
+dave,Dave de Vries,dave@example.com,Green,#00ff00
+erin,Erin,,Green,
+frank,,frank@example.com,Blue,
+"""
+
+
+class ImportRosterTest(StandingsTestMixin, TestCase):
+    """alice, bob and carol are already in the challenge (Red and Blue)."""
+
+    def setUp(self):
+        super().setUp()
+        self.log(self.bob, 1, 4000)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def write(self, text):
+        path = Path(self.tmp.name) / "roster.csv"
+        path.write_text(text)
+        return str(path)
+
+    def run_import(self, text=ROSTER, *args):
+        out, err = StringIO(), StringIO()
+        call_command(
+            "import_roster",
+            self.write(text),
+            "--challenge", str(self.challenge.pk),
+            *args,
+            stdout=out,
+            stderr=err,
+        )
+        return out.getvalue(), err.getvalue()
+
+    def test_creates_missing_users_teams_and_participants(self):
+        User.objects.create_user("frank", password="p")  # Known user, not enrolled
+        out, err = self.run_import()
+        self.assertIn("Enrolled 3 of 4 rows", out)
+        self.assertIn("2 new users (2 existing), 1 new teams, 1 already enrolled", out)
+        self.assertEqual(err, "")
+
+        dave = User.objects.get(username="dave")
+        self.assertEqual((dave.first_name, dave.last_name), ("Dave", "de Vries"))
+        self.assertFalse(dave.has_usable_password())
+        green = Team.objects.get(challenge=self.challenge, name="Green")
+        self.assertEqual(green.color, "#00ff00")
+        self.assertEqual(
+            set(
+                Participant.objects.filter(team__challenge=self.challenge)
+                .values_list("user__username", "team__name")
+            ),
+            {
+                ("alice", "Red"), ("bob", "Red"), ("carol", "Blue"),
+                ("dave", "Green"), ("erin", "Green"), ("frank", "Blue"),
+            },
+        )
+
+    def test_new_participants_get_standings_like_saved_ones(self):
+        self.run_import()
+        self.assertMatchesLive()
+        standing = ParticipantStanding.objects.get(participant__user__username="erin")
+        self.assertEqual((standing.total_steps, standing.rank), (0, 2))
+        # And the leaderboard keeps working after a first entry
+        self.log(Participant.objects.get(user__username="erin"), 1, 9000)
+        self.assertMatchesLive()
+
+    def test_rerunning_the_same_file_changes_nothing(self):
+        self.run_import()
+        before = (
+            User.objects.count(), Team.objects.count(),
+            Participant.objects.count(), ParticipantStanding.objects.count(),
+        )
+        out, _ = self.run_import()
+        self.assertIn("Enrolled 0 of 4 rows", out)
+        self.assertIn("0 new users (4 existing), 0 new teams, 4 already enrolled", out)
+        self.assertEqual(before, (
+            User.objects.count(), Team.objects.count(),
+            Participant.objects.count(), ParticipantStanding.objects.count(),
+        ))
+
+    def test_existing_people_and_teams_are_left_alone(self):
+        self.run_import("username,name,team,color\nalice,Someone Else,Blue,#123456\n")
+        self.assertEqual(User.objects.get(username="alice").first_name, "")
+        self.assertEqual(Participant.objects.get(pk=self.alice.pk).team, self.red)
+        self.assertEqual(Team.objects.get(pk=self.blue.pk).color, "#0000ff")
+
+    def test_dry_run_writes_nothing(self):
+        out, _ = self.run_import(ROSTER, "--dry-run")
+        self.assertIn("Would enroll 3 of 4 rows", out)
+        self.assertFalse(User.objects.filter(username="dave").exists())
+        self.assertFalse(Team.objects.filter(name="Green").exists())
+
+    def test_bad_rows_are_reported_and_skipped(self):
+        out, err = self.run_import(
+            "username,name,email,team,color\n"
+            "dave,,,Green,\n"
+            "dave,,,Green,\n"
+            ",,,Green,\n"
+            "erin,,not-an-email,Green,\n"
+            "frank,,,Purple,purple\n"
+        )
+        self.assertIn("Enrolled 1 of 5 rows", out)
+        self.assertEqual(err.splitlines(), [
+            f"line 3: {DUPLICATE_USERNAME_ERROR}",
+            f"line 4: {MISSING_VALUE_ERROR}",
+            f"line 5: {INVALID_EMAIL_ERROR}",
+            f"line 6: {INVALID_COLOR_ERROR}",
+        ])
+
+    def test_missing_columns(self):
+        with self.assertRaisesMessage(CommandError, "missing: team"):
+            self.run_import("username,name\ndave,Dave\n")
+
+    def test_closed_challenge_is_refused(self):
+        self.challenge.is_active = False
+        self.challenge.save()
+        with self.assertRaisesMessage(CommandError, "closed"):
+            self.run_import()
+
+    def test_query_count_does_not_grow_with_the_roster(self):
+        def roster(size, prefix):
+            rows, _ = parse_roster(StringIO(
+                "username,team\n"
+                + "".join(f"{prefix}{n},{prefix} {n % 5}\n" for n in range(size))
+            ))
+            return rows
+
+        # Savepoint, users, user insert, teams, team insert, enrolled,
+        # participant insert, rank, standings insert, release. (SQLite
+        # splits inserts of more than 99 users to stay under its
+        # bound-parameter limit.)
+        with self.assertNumQueries(10):
+            import_roster(self.challenge, roster(10, "small"))
+        with self.assertNumQueries(10):
+            import_roster(self.challenge, roster(90, "large"))
+        self.assertEqual(
+            Participant.objects.filter(team__challenge=self.challenge).count(), 103
+        )
+
+
+class RosterAdminUploadTest(TestCase):
+    def setUp(self):
+        self.challenge = StepChallenge.objects.create(
+            name="Challenge",
+            start_date=date.today() - timedelta(days=1),
+            end_date=date.today() + timedelta(days=30),
+            is_active=True,
+        )
+        self.url = reverse("admin:steps_stepchallenge_roster", args=[self.challenge.pk])
+        self.client.force_login(
+            User.objects.create_superuser("admin", "admin@example.com", "p")
+        )
+
+    def upload(self, text, **data):
+        return self.client.post(self.url, {
+            "roster": SimpleUploadedFile("roster.csv", text.encode()),
+            **data,
+        })
+
+    def test_change_form_links_to_the_upload(self):
+        response = self.client.get(
+            reverse("admin:steps_stepchallenge_change", args=[self.challenge.pk])
+        )
+        self.assertContains(response, self.url)
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def test_upload_enrolls_and_reports(self):
+        response = self.upload(ROSTER, dry_run="")
+        self.assertRedirects(
+            response, reverse("admin:steps_stepchallenge_change", args=[self.challenge.pk])
+        )
+        self.assertEqual(
+            Participant.objects.filter(team__challenge=self.challenge).count(), 4
+        )
+        messages = [str(m) for m in response.wsgi_request._messages]
+        self.assertTrue(messages[0].startswith("Enrolled 4 participants: 4 new users, 3 new teams"))
+
+    def test_invalid_file_shows_the_error(self):
+        response = self.upload("name\nDave\n")
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "missing: team, username")
+        self.assertFalse(StepEntry.objects.exists())
+        self.assertFalse(Team.objects.exists())
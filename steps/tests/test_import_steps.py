@@ -0,0 +1,125 @@
+import json
+import tempfile
+from datetime import date, timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+
+from steps.batch import validate_entries
+from steps.models import StepChallenge, Team, Participant, ParticipantStanding, StepEntry
+
+
+def day(offset):
+    return date.today() + timedelta(days=offset)
+
+
+class ImportStepsTest(TestCase):
+    def setUp(self):
+        self.challenge = StepChallenge.objects.create(
+            name="Challenge",
+            start_date=day(-10),
+            end_date=day(10),
+            is_active=True,
+        )
+        team = Team.objects.create(challenge=self.challenge, name="Red", color="#f00")
+        self.alice = Participant.objects.create(
+            user=User.objects.create_user(username="alice", password="p"), team=team
+        )
+        self.bob = Participant.objects.create(
+            user=User.objects.create_user(username="bob", password="p"), team=team
+        )
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def write_csv(self, rows):
+        path = Path(self.tmp.name) / "steps.csv"
+        lines = ["username,challenge,date,total_steps"]
+        lines += [",".join(str(value) for value in row) for row in rows]
+        path.write_text("\n".join(lines) + "\n")
+        return str(path)
+
+    def run_import(self, *args):
+        out, err = StringIO(), StringIO()
+        call_command("import_steps", *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_imports_rows_out_of_order(self):
+        c = self.challenge.pk
+        path = self.write_csv([
+            ("alice", c, day(-1), 9000),
+            ("alice", c, day(-3), 2000),
+            ("bob", c, day(-2), 5000),
+            ("alice", c, day(-2), 6000),
+        ])
+        out, err = self.run_import(path)
+        self.assertIn("Imported 4 of 4 rows, rejected 0", out)
+        self.assertEqual(err, "")
+        self.assertEqual(StepEntry.objects.count(), 4)
+        standing = ParticipantStanding.objects.get(participant=self.alice)
+        self.assertEqual((standing.total_steps, standing.rank), (9000, 1))
+
+    def test_rejects_rows_breaking_entry_rules(self):
+        StepEntry.objects.create(
+            participant=self.alice,
+            challenge=self.challenge,
+            date=day(-5),
+            total_steps=8000,
+        )
+        c = self.challenge.pk
+        path = self.write_csv([
+            ("alice", c, day(-4), 7000),   # below stored previous entry
+            ("alice", c, day(-5), 9000),   # date already stored
+            ("alice", c, day(-3), 9000),
+            ("alice", c, day(-3), 9500),   # duplicate within the file
+            ("alice", c, day(30), 9900),   # outside the challenge
+            ("carol", c, day(-1), 100),    # not enrolled
+            ("bob", c, "yesterday", 100),  # unparseable date
+        ])
+        out, err = self.run_import(path)
+        self.assertIn("Imported 1 of 7 rows, rejected 6", out)
+        self.assertIn("line 2: Total steps cannot be less than your previous entry.", err)
+        self.assertIn("line 3: An entry for this date already exists.", err)
+        self.assertIn("line 5: This date appears more than once", err)
+        self.assertIn("line 6: Step date must be within the challenge period.", err)
+        self.assertIn("line 7: Participant is not enrolled in this challenge.", err)
+        self.assertIn("line 8: Invalid value", err)
+
+    def test_closed_challenge_rejects_everything(self):
+        self.challenge.is_active = False
+        self.challenge.save()
+        path = self.write_csv([("alice", self.challenge.pk, day(-1), 100)])
+        out, err = self.run_import(path)
+        self.assertIn("closed", err)
+        self.assertFalse(StepEntry.objects.exists())
+
+    def test_json_lines_from_stdin(self):
+        records = [
+            {"participant": self.bob.pk, "challenge": self.challenge.pk,
+             "date": day(-1).isoformat(), "total_steps": 4000},
+            "not an object",
+        ]
+        stdin = StringIO("\n".join(json.dumps(record) for record in records) + "\n{oops\n")
+        with mock.patch("sys.stdin", stdin):
+            out, err = self.run_import("-", "--format", "jsonl")
+        self.assertIn("Imported 1 of 3 rows, rejected 2", out)
+        self.assertEqual(StepEntry.objects.get().participant, self.bob)
+
+    def test_dry_run_writes_nothing(self):
+        path = self.write_csv([("alice", self.challenge.pk, day(-1), 100)])
+        out, _ = self.run_import(path, "--dry-run")
+        self.assertIn("Validated 1 of 1 rows", out)
+        self.assertFalse(StepEntry.objects.exists())
+
+    def test_validation_uses_constant_queries(self):
+        rows = [
+            (n, self.alice.pk, self.challenge.pk, day(-10 + n), 1000 * n)
+            for n in range(25)
+        ]
+        with self.assertNumQueries(2):  # challenges + stored entries
+            accepted, rejected = validate_entries(rows)
+        self.assertEqual(len(accepted), 21)  # days 11-14 fall after end_date
+        self.assertEqual(len(rejected), 4)
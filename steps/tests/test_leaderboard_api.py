@@ -0,0 +1,117 @@
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from steps.models import (
+    LeaderboardVersion,
+    Participant,
+    ParticipantStanding,
+    StepChallenge,
+    StepEntry,
+    Team,
+)
+
+
+class LeaderboardApiTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.challenge = StepChallenge.objects.create(
+            name="Challenge",
+            start_date=date.today() - timedelta(days=5),
+            end_date=date.today() + timedelta(days=5),
+            is_active=True,
+        )
+        self.team = Team.objects.create(
+            challenge=self.challenge, name="Red", color="#ff0000"
+        )
+        user = User.objects.create_user(
+            username="alice", password="p", first_name="Alice", last_name="Smith"
+        )
+        self.participant = Participant.objects.create(user=user, team=self.team)
+        self.log(4000)
+        self.url = reverse("steps-api-leaderboard", args=[self.challenge.pk])
+
+    def log(self, steps, days_ago=1):
+        # The database version is bumped once the write commits
+        with self.captureOnCommitCallbacks(execute=True):
+            StepEntry.objects.create(
+                participant=self.participant,
+                challenge=self.challenge,
+                date=date.today() - timedelta(days=days_ago),
+                total_steps=steps,
+            )
+
+    def test_leaderboard_json_with_validators(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("ETag", response)
+        self.assertIn("Last-Modified", response)
+        self.assertEqual(response["Cache-Control"], "no-cache")
+
+        data = response.json()
+        self.assertEqual(data["challenge"]["name"], "Challenge")
+        self.assertEqual(data["participants"], [{
+            "rank": 1,
+            "participant": self.participant.pk,
+            "name": "Alice Smith",
+            "team": self.team.pk,
+            "total_steps": 4000,
+            "last_entry_date": (date.today() - timedelta(days=1)).isoformat(),
+        }])
+        self.assertEqual(data["teams"], [{
+            "rank": 1,
+            "id": self.team.pk,
+            "name": "Red",
+            "color": "#ff0000",
+            "total_steps": 4000,
+        }])
+
+    def test_unchanged_leaderboard_is_304_after_one_query(self):
+        etag = self.client.get(self.url)["ETag"]
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+    def test_unchanged_since_last_modified_is_304(self):
+        last_modified = self.client.get(self.url)["Last-Modified"]
+        response = self.client.get(
+            self.url, headers={"if-modified-since": last_modified}
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_new_entry_changes_the_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+        self.log(9000, days_ago=0)
+
+        response = self.client.get(self.url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.json()["participants"][0]["total_steps"], 9000)
+
+    def test_write_in_another_process_changes_the_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+        # Another server process wrote: its own cache version went up,
+        # this one's did not, but both share the database
+        ParticipantStanding.objects.filter(participant=self.participant).update(
+            total_steps=9000
+        )
+        LeaderboardVersion.objects.bump(self.challenge.pk)
+
+        response = self.client.get(self.url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.json()["participants"][0]["total_steps"], 9000)
+
+    @override_settings(STEPS_LEADERBOARD_CACHE=False)
+    def test_validators_work_with_the_cache_disabled(self):
+        etag = self.client.get(self.url)["ETag"]
+        response = self.client.get(self.url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 304)
+
+    def test_unknown_challenge_is_404(self):
+        url = reverse("steps-api-leaderboard", args=[self.challenge.pk + 1])
+        self.assertEqual(self.client.get(url).status_code, 404)
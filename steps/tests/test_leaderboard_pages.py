@@ -0,0 +1,96 @@
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from steps.models import StepChallenge, Team, Participant, StepEntry
+
+
+@override_settings(STEPS_LEADERBOARD_PAGE_SIZE=2, STEPS_LEADERBOARD_AROUND=1)
+class LeaderboardPaginationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.challenge = StepChallenge.objects.create(
+            name="Challenge",
+            start_date=date.today() - timedelta(days=5),
+            end_date=date.today() + timedelta(days=5),
+        )
+        self.red = Team.objects.create(challenge=self.challenge, name="Red", color="#f00")
+        self.blue = Team.objects.create(challenge=self.challenge, name="Blue", color="#00f")
+        # Totals: a=900, b=700, c=700, d=300, e=100
+        self.people = {}
+        for name, steps, team in [
+            ("a", 900, self.red),
+            ("b", 700, self.blue),
+            ("c", 700, self.red),
+            ("d", 300, self.blue),
+            ("e", 100, self.red),
+        ]:
+            user = User.objects.create_user(username=name, password="p")
+            participant = Participant.objects.create(user=user, team=team)
+            StepEntry.objects.create(
+                participant=participant,
+                challenge=self.challenge,
+                date=date.today(),
+                total_steps=steps,
+            )
+            self.people[name] = participant
+
+    def get(self, **params):
+        return self.client.get(
+            reverse("steps-leaderboard"), {"challenge": self.challenge.pk, **params}
+        )
+
+    def rows(self, response):
+        return [
+            (p.username, p.rank)
+            for p in response.context["participants"]
+        ]
+
+    def test_first_page_and_forward_paging(self):
+        response = self.get()
+        self.assertEqual(self.rows(response), [("a", 1), ("b", 2)])
+        self.assertIsNone(response.context["previous_cursor"])
+
+        response = self.get(after=response.context["next_cursor"])
+        self.assertEqual(self.rows(response), [("c", 2), ("d", 4)])
+
+        response = self.get(after=response.context["next_cursor"])
+        self.assertEqual(self.rows(response), [("e", 5)])
+        self.assertIsNone(response.context["next_cursor"])
+
+    def test_backward_paging(self):
+        response = self.get(after=f"700.{self.people['c'].pk}")
+        self.assertEqual(self.rows(response), [("d", 4), ("e", 5)])
+
+        response = self.get(before=response.context["previous_cursor"])
+        self.assertEqual(self.rows(response), [("b", 2), ("c", 2)])
+        self.assertIsNotNone(response.context["previous_cursor"])
+
+    def test_malformed_cursor_shows_first_page(self):
+        response = self.get(after="nonsense")
+        self.assertEqual(self.rows(response), [("a", 1), ("b", 2)])
+
+    def test_around_me(self):
+        self.client.login(username="d", password="p")
+        response = self.get(around="me")
+        self.assertEqual(self.rows(response), [("c", 2), ("d", 4), ("e", 5)])
+        self.assertEqual(response.context["my_standing"].participant_id, self.people["d"].pk)
+        self.assertIsNotNone(response.context["previous_cursor"])
+        self.assertIsNone(response.context["next_cursor"])
+
+    def test_around_me_runs_fixed_queries(self):
+        self.client.login(username="d", password="p")
+        self.get(around="me")  # warm the cached first page
+        # session, user, user's challenges, me, above, below
+        with self.assertNumQueries(6):
+            self.get(around="me")
+
+    def test_team_ranks_from_window_function(self):
+        teams = self.get().context["teams"]
+        self.assertEqual(
+            [(t["team__name"], t["team_steps"], t["rank"]) for t in teams],
+            [("Red", 1700, 1), ("Blue", 1000, 2)],
+        )
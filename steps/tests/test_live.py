@@ -0,0 +1,131 @@
+import asyncio
+from datetime import date, timedelta
+from unittest import mock
+
+from django.test import AsyncClient, RequestFactory, SimpleTestCase, TestCase
+from django.urls import reverse
+
+from steps.live import QUEUE_SIZE, Broadcaster, broadcaster
+from steps.models import ParticipantStanding, StepChallenge
+from steps.views import LeaderboardStreamView
+
+from .test_standings import StandingsTestMixin
+
+
+class BroadcasterTest(SimpleTestCase):
+    async def test_publish_from_another_thread_reaches_subscribers(self):
+        hub = Broadcaster()
+        first, second = hub.subscribe(1), hub.subscribe(1)
+        other = hub.subscribe(2)
+
+        await asyncio.to_thread(hub.publish, 1, {"type": "rank", "rank": 1})
+
+        self.assertEqual((await asyncio.wait_for(first.get(), 1))["rank"], 1)
+        self.assertEqual((await asyncio.wait_for(second.get(), 1))["rank"], 1)
+        self.assertTrue(other.empty())
+
+    async def test_unsubscribe_forgets_the_challenge(self):
+        hub = Broadcaster()
+        queue = hub.subscribe(1)
+        self.assertTrue(hub.has_subscribers(1))
+        hub.unsubscribe(1, queue)
+        self.assertFalse(hub.has_subscribers(1))
+
+    async def test_full_queue_is_replaced_by_a_reset(self):
+        hub = Broadcaster()
+        queue = hub.subscribe(1)
+        for rank in range(QUEUE_SIZE + 1):
+            hub.publish(1, {"type": "rank", "rank": rank})
+        await asyncio.sleep(0)  # Let the loop run the queued callbacks
+
+        self.assertEqual(queue.qsize(), 1)
+        self.assertEqual(queue.get_nowait(), {"type": "reset"})
+
+
+class RankDeltaTest(StandingsTestMixin, TestCase):
+    def test_refresh_reports_who_moved(self):
+        self.log(self.alice, 2, 5000)
+        self.log(self.bob, 2, 3000)
+        entry = self.log(self.carol, 2, 1000)
+        entry.total_steps = 4000
+        entry.save()
+
+        delta = ParticipantStanding.objects.refresh(self.carol.pk, self.challenge.pk)
+        self.assertIsNone(delta["shift"])  # Nothing changed since the save
+
+        with mock.patch("steps.models.publish_on_commit") as publish:
+            entry.total_steps = 6000
+            entry.save()
+        [(_, delta)] = [call.args for call in publish.call_args_list]
+
+        self.assertEqual(delta["participant"], self.carol.pk)
+        self.assertEqual(delta["team"], self.blue.pk)
+        self.assertEqual(delta["total_steps"], 6000)
+        self.assertEqual((delta["previous_rank"], delta["rank"]), (2, 1))
+        # Alice (5000) moved down one place; Bob (3000) stayed
+        self.assertEqual(delta["shift"], {"low": 4000, "high": 6000, "by": 1})
+
+    def test_saved_entry_is_published_after_commit(self):
+        with mock.patch.object(broadcaster, "has_subscribers", return_value=True), \
+                mock.patch.object(broadcaster, "publish") as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.log(self.alice, 1, 2500)
+
+        [(challenge_id, event), ] = [call.args for call in publish.call_args_list]
+        self.assertEqual(challenge_id, self.challenge.pk)
+        self.assertEqual(event["type"], "rank")
+        self.assertEqual((event["participant"], event["rank"]), (self.alice.pk, 1))
+
+    def test_nothing_is_published_without_subscribers(self):
+        with mock.patch.object(broadcaster, "publish") as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.log(self.alice, 1, 2500)
+        publish.assert_not_called()
+
+
+class LeaderboardStreamViewTest(TestCase):
+    def setUp(self):
+        self.challenge = StepChallenge.objects.create(
+            name="Challenge",
+            start_date=date.today() - timedelta(days=5),
+            end_date=date.today() + timedelta(days=5),
+            is_active=True,
+        )
+        self.url = reverse("steps-leaderboard-stream", args=[self.challenge.pk])
+
+    async def test_stream_sends_published_events(self):
+        hub = Broadcaster()
+        with mock.patch("steps.views.broadcaster", hub):
+            response = await AsyncClient().get(self.url)
+            self.assertEqual(response["Content-Type"], "text/event-stream")
+            self.assertEqual(response["Cache-Control"], "no-cache")
+
+            stream = response.streaming_content
+            self.assertEqual(await anext(stream), b"retry: 5000\n\n")
+            self.assertTrue(hub.has_subscribers(self.challenge.pk))
+
+            hub.publish(self.challenge.pk, {"type": "rank", "participant": 7})
+            self.assertEqual(
+                await asyncio.wait_for(anext(stream), 1),
+                b'event: rank\ndata: {"type": "rank", "participant": 7}\n\n',
+            )
+            await stream.aclose()
+
+    async def test_closed_stream_unsubscribes(self):
+        hub = Broadcaster()
+        with mock.patch("steps.views.broadcaster", hub):
+            events = LeaderboardStreamView().events(self.challenge.pk)
+            await anext(events)
+            self.assertTrue(hub.has_subscribers(self.challenge.pk))
+            await events.aclose()
+        self.assertFalse(hub.has_subscribers(self.challenge.pk))
+
+    async def test_unknown_challenge_is_404(self):
+        url = reverse("steps-leaderboard-stream", args=[self.challenge.pk + 1])
+        response = await AsyncClient().get(url)
+        self.assertEqual(response.status_code, 404)
+
+    async def test_wsgi_requests_are_refused(self):
+        request = RequestFactory().get(self.url)
+        response = await LeaderboardStreamView.as_view()(request, challenge_id=self.challenge.pk)
+        self.assertEqual(response.status_code, 501)
@@ -0,0 +1,63 @@
+import re
+from datetime import date, timedelta
+
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.test import AsyncClient, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from steps.middleware import ServerTimingMiddleware
+from steps.models import StepChallenge
+
+
+SERVER_TIMING = re.compile(
+    r'db;dur=(?P<db>[\d.]+);desc="(?P<queries>\d+) queries", '
+    r"render;dur=(?P<render>[\d.]+), total;dur=(?P<total>[\d.]+)"
+)
+
+
+class ServerTimingMiddlewareTest(TestCase):
+    def setUp(self):
+        StepChallenge.objects.create(
+            name="Challenge",
+            start_date=date.today() - timedelta(days=5),
+            end_date=date.today() + timedelta(days=5),
+        )
+
+    @override_settings(STEPS_SERVER_TIMING=True, STEPS_PROFILE_SAMPLE_RATE=0)
+    def test_header_reports_queries_and_render_time(self):
+        response = self.client.get(reverse("steps-home"))
+        match = SERVER_TIMING.fullmatch(response["Server-Timing"])
+        self.assertIsNotNone(match, response["Server-Timing"])
+        self.assertGreater(int(match["queries"]), 0)
+        self.assertGreater(float(match["render"]), 0)
+        self.assertGreaterEqual(float(match["total"]), float(match["db"]))
+
+    @override_settings(STEPS_SERVER_TIMING=True, STEPS_PROFILE_SAMPLE_RATE=0)
+    async def test_header_under_asgi_counts_queries(self):
+        response = await AsyncClient().get(reverse("steps-home"))
+        match = SERVER_TIMING.fullmatch(response["Server-Timing"])
+        self.assertIsNotNone(match, response["Server-Timing"])
+        self.assertGreater(int(match["queries"]), 0)
+
+    @override_settings(STEPS_SERVER_TIMING=False, STEPS_PROFILE_SAMPLE_RATE=1)
+    def test_sampled_request_is_logged_with_url_name(self):
+        with self.assertLogs("steps.profiling", "INFO") as logs:
+            response = self.client.get(reverse("steps-leaderboard"))
+        self.assertNotIn("Server-Timing", response)
+        [line] = logs.output
+        self.assertIn("GET /leaderboard/ steps-leaderboard 200", line)
+        self.assertRegex(line, r"queries=\d+")
+
+    @override_settings(STEPS_SERVER_TIMING=False, STEPS_PROFILE_SAMPLE_RATE=0)
+    def test_disabled_middleware_is_not_used(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            ServerTimingMiddleware(lambda request: HttpResponse())
+
+    @override_settings(STEPS_SERVER_TIMING=False, STEPS_PROFILE_SAMPLE_RATE=0.5)
+    def test_unsampled_requests_skip_measuring(self):
+        middleware = ServerTimingMiddleware(lambda request: HttpResponse())
+        middleware.sample_rate = 0  # Never sampled
+        request = RequestFactory().get("/")
+        middleware(request)
+        self.assertFalse(hasattr(request, "steps_timings"))
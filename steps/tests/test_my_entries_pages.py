@@ -0,0 +1,84 @@
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from steps.models import StepChallenge, Team, Participant, StepEntry
+
+
+@override_settings(STEPS_ENTRIES_PAGE_SIZE=2)
+class MyEntriesPaginationTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="alice", password="p")
+        self.spring = self.enroll("Spring", days_ago=20)
+        self.autumn = self.enroll("Autumn", days_ago=5)
+        # Spring: days 20..18 ago, autumn: days 5..3 ago
+        for participant, start in [(self.spring, 20), (self.autumn, 5)]:
+            for offset in range(3):
+                StepEntry.objects.create(
+                    participant=participant,
+                    challenge=participant.team.challenge,
+                    date=date.today() - timedelta(days=start - offset),
+                    total_steps=1000 * (offset + 1),
+                )
+        self.client.login(username="alice", password="p")
+
+    def enroll(self, name, days_ago):
+        challenge = StepChallenge.objects.create(
+            name=name,
+            start_date=date.today() - timedelta(days=days_ago),
+            end_date=date.today() + timedelta(days=5),
+        )
+        team = Team.objects.create(challenge=challenge, name=name, color="#f00")
+        return Participant.objects.create(user=self.user, team=team)
+
+    def get(self, **params):
+        return self.client.get(reverse("steps-my-entries"), params)
+
+    def days_ago(self, response):
+        return [
+            (date.today() - entry.date).days
+            for entry in response.context["object_list"]
+        ]
+
+    def test_first_page_is_newest_entries(self):
+        response = self.get()
+        self.assertEqual(self.days_ago(response), [3, 4])
+        self.assertIsNone(response.context["previous_cursor"])
+        self.assertIsNotNone(response.context["next_cursor"])
+
+    def test_walk_forward_and_back(self):
+        pages = []
+        response = self.get()
+        while True:
+            pages.append(self.days_ago(response))
+            if not response.context["next_cursor"]:
+                break
+            response = self.get(after=response.context["next_cursor"])
+        self.assertEqual(pages, [[3, 4], [5, 18], [19, 20]])
+
+        response = self.get(before=response.context["previous_cursor"])
+        self.assertEqual(self.days_ago(response), [5, 18])
+        response = self.get(before=response.context["previous_cursor"])
+        self.assertEqual(self.days_ago(response), [3, 4])
+        self.assertIsNone(response.context["previous_cursor"])
+
+    def test_challenge_filter(self):
+        response = self.get(challenge=self.spring.team.challenge_id)
+        self.assertEqual(self.days_ago(response), [18, 19])
+        response = self.get(
+            challenge=self.spring.team.challenge_id,
+            after=response.context["next_cursor"],
+        )
+        self.assertEqual(self.days_ago(response), [20])
+        self.assertIsNone(response.context["next_cursor"])
+
+    def test_malformed_cursor_shows_first_page(self):
+        response = self.get(after="yesterday")
+        self.assertEqual(self.days_ago(response), [3, 4])
+
+    def test_page_queries_do_not_depend_on_history(self):
+        # session, user, page, next-page probe, challenge filter options
+        with self.assertNumQueries(5):
+            self.get()
@@ -0,0 +1,274 @@
+import json
+
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils.timezone import now
+
+from steps.benchmarks import seed
+from steps.models import Participant, StandingSnapshot, StepChallenge, StepEntry
+
+
+class QueryBudgetTestCase(TestCase):
+    """
+    Base class for query-count tests against a large data set.
+
+    ``setUpTestData`` seeds ``SEED`` through ``steps.benchmarks.seed`` once
+    per class, so an N+1 pattern multiplies into hundreds of extra
+    queries instead of hiding behind a handful of fixture rows.
+    Budgets count the view's own queries: requests made with
+    ``login=True`` also pay ``AUTH_QUERIES`` for the session and user.
+    """
+
+    SEED = {"challenges": 2, "teams": 12, "participants": 300, "days": 20}
+    AUTH_QUERIES = 2
+
+    @classmethod
+    def setUpTestData(cls):
+        seed(**cls.SEED)
+        cls.user = User.objects.get(username="bench0")
+        cls.challenge = StepChallenge.objects.get(is_active=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def assertQueryBudget(self, budget, url, data=None, method="get", login=True, **extra):
+        """Request ``url`` and fail unless the view runs exactly ``budget`` queries."""
+        if login:
+            self.client.force_login(self.user)
+        with self.assertNumQueries(budget + (self.AUTH_QUERIES if login else 0)):
+            response = getattr(self.client, method)(url, data, **extra)
+        self.assertLess(response.status_code, 400)
+        return response
+
+
+class HomeViewQueryBudgetTest(QueryBudgetTestCase):
+    """
+    The home page was asked to run three queries at most, whatever the
+    data size. That only holds once the challenge board is cached.
+    Building the board costs four more queries (six logged in, five
+    anonymous without the cache), because it is four independent
+    aggregates. The cache serves them until the next write.
+    """
+
+    url = reverse("steps-home")
+
+    def test_warm_board_cache_runs_three_queries_at_most(self):
+        self.client.get(self.url)  # Warm the challenge board
+        self.assertQueryBudget(1, self.url, login=False)  # Challenge
+        self.assertQueryBudget(2, self.url)  # + participant standing
+
+    def test_cold_board_cache_runs_six_queries_at_most(self):
+        # Challenge, standing, then top participants, teams, daily stats
+        # and recent entries for the board
+        self.assertQueryBudget(6, self.url)
+
+    @override_settings(STEPS_LEADERBOARD_CACHE=False)
+    def test_anonymous_without_cache(self):
+        self.assertQueryBudget(5, self.url, login=False)
+
+
+class LeaderboardQueryBudgetTest(QueryBudgetTestCase):
+    url = reverse("steps-leaderboard")
+
+    def test_first_page(self):
+        # Challenges, last snapshot day, first page of standings, team totals
+        self.assertQueryBudget(4, self.url)
+
+    def test_cached_page(self):
+        self.assertQueryBudget(4, self.url)
+        self.assertQueryBudget(1, self.url)  # Challenges only
+
+    def test_around_me(self):
+        self.assertQueryBudget(7, self.url, {"around": "me"})
+
+    def test_as_of_only_reads_snapshots(self):
+        StandingSnapshot.objects.build(self.challenge)
+        as_of = {"as_of": self.challenge.start_date.isoformat()}
+        # Challenges, last snapshot day, snapshot page, team snapshots
+        self.assertQueryBudget(4, self.url, as_of)
+        self.assertQueryBudget(1, self.url, as_of)
+
+    def test_anonymous_past_challenge(self):
+        past = StepChallenge.objects.get(is_active=False)
+        self.assertQueryBudget(4, self.url, {"challenge": past.pk}, login=False)
+
+    def test_archived_challenge(self):
+        past = StepChallenge.objects.get(is_active=False)
+        past.save()  # Freezes its final standings
+        # Challenge, last snapshot day, first page of final standings,
+        # final team standings
+        self.assertQueryBudget(4, self.url, {"challenge": past.pk}, login=False)
+
+
+class JsonApiQueryBudgetTest(QueryBudgetTestCase):
+    def test_leaderboard_api(self):
+        url = reverse("steps-api-leaderboard", args=[self.challenge.pk])
+        # Version, challenge, first page of standings, team totals
+        etag = self.assertQueryBudget(4, url, login=False)["ETag"]
+        self.assertQueryBudget(1, url, login=False)  # Version, cached body
+        response = self.assertQueryBudget(
+            1, url, login=False, headers={"if-none-match": etag}
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_team_series(self):
+        team = self.user.participant_set.get(team__challenge=self.challenge).team
+        # Version, challenge, team check, per-day sums of the team's deltas
+        response = self.assertQueryBudget(
+            4,
+            reverse("steps-api-series", args=[self.challenge.pk]),
+            {"team": team.pk, "bucket": "week"},
+            login=False,
+        )
+        self.assertEqual(len(response.json()["dates"]), 3)
+
+
+class StepEntryViewsQueryBudgetTest(QueryBudgetTestCase):
+    def test_add_entry_form(self):
+        # Participation, then the latest entries of every challenge
+        self.assertQueryBudget(2, reverse("steps-add-entry"))
+
+    def test_entry_history_page(self):
+        response = self.assertQueryBudget(
+            1,
+            reverse("steps-entry-history"),
+            {"challenge": self.challenge.pk, "before": now().date().isoformat()},
+        )
+        self.assertEqual(len(response.context["entries"]), 10)
+
+    def test_add_entry_submit(self):
+        StepEntry.objects.get(
+            participant__user=self.user,
+            challenge=self.challenge,
+            date=now().date(),
+        ).delete()
+        self.assertQueryBudget(
+            16,  # One neighbours query, then the upsert and what follows it
+            reverse("steps-add-entry"),
+            {
+                "challenge": self.challenge.pk,
+                "date": now().date().isoformat(),
+                "total_steps": 10 ** 6,
+            },
+            method="post",
+        )
+
+    @override_settings(STEPS_WRITE_BEHIND=True)
+    def test_add_entry_submit_write_behind(self):
+        # Participation, the chosen challenge and model validation's
+        # check of it, then the queue INSERT
+        self.assertQueryBudget(
+            4,
+            reverse("steps-add-entry"),
+            {
+                "challenge": self.challenge.pk,
+                "date": now().date().isoformat(),
+                "total_steps": 10 ** 6,
+            },
+            method="post",
+        )
+
+    def test_my_entries(self):
+        # Page of entries with their challenges, challenge filter options
+        self.assertQueryBudget(2, reverse("steps-my-entries"))
+
+    @override_settings(STEPS_ENTRIES_PAGE_SIZE=10)
+    def test_my_entries_older_page(self):
+        response = self.assertQueryBudget(3, reverse("steps-my-entries"))  # + next page probe
+        self.assertQueryBudget(
+            3,
+            reverse("steps-my-entries"),
+            {"after": response.context["next_cursor"]},
+        )
+
+    def test_sync(self):
+        StepEntry.objects.filter(
+            participant__user=self.user, challenge=self.challenge
+        ).order_by("-date")[0].delete()
+        response = self.assertQueryBudget(
+            17,  # Includes the UPDATE of step_delta after the new rows
+            reverse("steps-api-sync"),
+            json.dumps([
+                {
+                    "challenge": self.challenge.pk,
+                    "date": now().date().isoformat(),
+                    "total_steps": 10 ** 6,
+                },
+            ]),
+            method="post",
+            content_type="application/json",
+        )
+        self.assertEqual(response.json()["created"], 1)
+
+    def test_login_page(self):
+        self.assertQueryBudget(0, reverse("steps-login"), login=False)
+
+
+class AdminQueryBudgetTest(QueryBudgetTestCase):
+    """
+    Admin pages for staff. Related objects are joined or fetched once and
+    foreign keys use autocomplete widgets, so no page grows with the
+    number of rows, participants or teams.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.user = User.objects.create_superuser("admin", "admin@example.com", "p")
+
+    def setUp(self):
+        super().setUp()
+        # Change forms look up their content type once per process; start
+        # cold so budgets don't depend on which test ran first
+        ContentType.objects.clear_cache()
+
+    def test_step_entry_changelist(self):
+        # Challenge and team filters, stats check, count, page (joined
+        # participant, user and challenge), date hierarchy bounds and months
+        self.assertQueryBudget(7, reverse("admin:steps_stepentry_changelist"))
+
+    def test_step_entry_change_form(self):
+        entry = StepEntry.objects.first()
+        # Entry, its challenge, participant and user for the title, content
+        # type, then the selected participant, user and challenge widgets
+        self.assertQueryBudget(
+            8, reverse("admin:steps_stepentry_change", args=[entry.pk])
+        )
+
+    def test_participant_changelist(self):
+        # Challenge and team filters, stats check, count, page
+        self.assertQueryBudget(5, reverse("admin:steps_participant_changelist"))
+
+    def test_participant_change_form(self):
+        participant = Participant.objects.first()
+        # Participant and user, content type, then the selected user and
+        # team widgets
+        self.assertQueryBudget(
+            6, reverse("admin:steps_participant_change", args=[participant.pk])
+        )
+
+    def test_team_changelist(self):
+        # Challenge filter, count, page with challenges joined
+        self.assertQueryBudget(4, reverse("admin:steps_team_changelist"))
+
+    def test_challenge_changelist(self):
+        self.assertQueryBudget(3, reverse("admin:steps_stepchallenge_changelist"))
+
+    def test_challenge_change_form(self):
+        # Challenge, its teams (inline), content type
+        self.assertQueryBudget(
+            3, reverse("admin:steps_stepchallenge_change", args=[self.challenge.pk])
+        )
+
+    def test_participant_autocomplete(self):
+        # One page of matching participants with their users
+        response = self.assertQueryBudget(2, reverse("admin:autocomplete"), {
+            "app_label": "steps",
+            "model_name": "stepentry",
+            "field_name": "participant",
+            "term": "Runner1",
+        })
+        self.assertTrue(response.json()["results"])
@@ -0,0 +1,271 @@
+from datetime import date, timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from steps.batch import save_entries, validate_entries
+from steps.models import StandingSnapshot, StepEntry, TeamSnapshot
+
+from .test_standings import StandingsTestMixin
+
+
+def days_ago(days):
+    return date.today() - timedelta(days=days)
+
+
+class SnapshotTestMixin(StandingsTestMixin):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.log(self.alice, 8, 1000)
+        self.log(self.bob, 7, 3000)
+        self.log(self.carol, 6, 2000)
+        self.log(self.alice, 5, 5000)
+        self.log(self.bob, 1, 6000)
+
+    def snapshot(self, day):
+        return dict(
+            (participant_id, (steps, rank))
+            for participant_id, steps, rank in (
+                StandingSnapshot.objects
+                .filter(challenge=self.challenge, date=day)
+                .values_list("participant_id", "total_steps", "rank")
+            )
+        )
+
+    def row_ids(self, day):
+        return set(
+            StandingSnapshot.objects
+            .filter(challenge=self.challenge, date=day)
+            .values_list("pk", flat=True)
+        )
+
+    def team_snapshot(self, day):
+        return list(
+            TeamSnapshot.objects
+            .filter(challenge=self.challenge, date=day)
+            .values_list("team_id", "total_steps", "rank")
+        )
+
+
+class StandingSnapshotTest(SnapshotTestMixin, TestCase):
+    def test_build_covers_every_finished_day(self):
+        self.assertEqual(StandingSnapshot.objects.build(self.challenge), 10)
+        self.assertEqual(
+            StandingSnapshot.objects.filter(challenge=self.challenge)
+            .values("date").distinct().count(),
+            10,
+        )
+        self.assertFalse(
+            StandingSnapshot.objects.filter(date__gte=date.today()).exists()
+        )
+
+        self.assertEqual(self.snapshot(days_ago(9)), {
+            self.alice.pk: (0, 1), self.bob.pk: (0, 1), self.carol.pk: (0, 1),
+        })
+        self.assertEqual(self.snapshot(days_ago(6)), {
+            self.alice.pk: (1000, 3), self.bob.pk: (3000, 1), self.carol.pk: (2000, 2),
+        })
+        self.assertEqual(self.snapshot(days_ago(5)), {
+            self.alice.pk: (5000, 1), self.bob.pk: (3000, 2), self.carol.pk: (2000, 3),
+        })
+        self.assertEqual(self.team_snapshot(days_ago(1)), [
+            (self.red.pk, 11000, 1), (self.blue.pk, 2000, 2),
+        ])
+
+    def test_build_is_incremental(self):
+        self.assertEqual(StandingSnapshot.objects.build(self.challenge, until=days_ago(6)), 5)
+        with self.assertNumQueries(8):
+            # Last built day, participants, its rows, the entries after
+            # it, then two inserts inside a savepoint
+            self.assertEqual(StandingSnapshot.objects.build(self.challenge), 5)
+        with self.assertNumQueries(1):
+            self.assertEqual(StandingSnapshot.objects.build(self.challenge), 0)
+        self.assertEqual(self.snapshot(days_ago(1))[self.bob.pk], (6000, 1))
+
+    def test_backdated_write_refreshes_the_days_it_changed(self):
+        StandingSnapshot.objects.build(self.challenge)
+        untouched = self.row_ids(days_ago(4))
+        self.log(self.carol, 3, 9000)
+        self.assertEqual(
+            StandingSnapshot.objects.filter(challenge=self.challenge)
+            .values("date").distinct().count(),
+            10,
+        )
+        self.assertEqual(self.row_ids(days_ago(4)), untouched)
+        self.assertEqual(self.snapshot(days_ago(3))[self.carol.pk], (9000, 1))
+        self.assertEqual(self.snapshot(days_ago(1))[self.bob.pk], (6000, 2))
+
+    def test_refresh_stops_before_the_next_entry(self):
+        StandingSnapshot.objects.build(self.challenge)
+        untouched = self.row_ids(days_ago(5))
+        self.log(self.alice, 7, 2000)
+        self.assertEqual(self.snapshot(days_ago(6)), {
+            self.alice.pk: (2000, 2), self.bob.pk: (3000, 1), self.carol.pk: (2000, 2),
+        })
+        self.assertEqual(self.row_ids(days_ago(5)), untouched)
+
+    def test_todays_entries_keep_snapshots(self):
+        StandingSnapshot.objects.build(self.challenge)
+        self.log(self.carol, 0, 9000)
+        self.assertEqual(
+            StandingSnapshot.objects.filter(challenge=self.challenge, date=days_ago(1)).count(),
+            3,
+        )
+
+    def test_writes_update_the_rows_like_a_rebuild(self):
+        StandingSnapshot.objects.build(self.challenge)
+        self.log(self.carol, 8, 500)  # Insert before everyone's entries
+        entry = self.log(self.carol, 4, 4000)
+        entry.total_steps = 7000  # Passes alice and bob
+        entry.save()
+        StepEntry.objects.get(participant=self.alice, date=days_ago(5)).delete()
+        entry.date = days_ago(2)
+        entry.save()  # Moves back two days
+
+        in_place = {day: self.snapshot(day) for day in map(days_ago, range(1, 11))}
+        teams_in_place = {day: self.team_snapshot(day) for day in in_place}
+        StandingSnapshot.objects.invalidate(self.challenge.pk)
+        StandingSnapshot.objects.build(self.challenge)
+        self.assertEqual(in_place, {day: self.snapshot(day) for day in in_place})
+        self.assertEqual(teams_in_place, {day: self.team_snapshot(day) for day in in_place})
+
+    def test_write_costs_the_same_queries_with_more_participants(self):
+        StandingSnapshot.objects.build(self.challenge)
+        entry = self.log(self.carol, 4, 4000)
+
+        def queries():
+            entry.total_steps += 100
+            with CaptureQueriesContext(connection) as captured:
+                entry.save()
+            return len(captured.captured_queries)
+
+        few = queries()
+        for number in range(20):
+            self.log(self.make_participant(f"walker{number}", self.blue), 9, 100 * number)
+        StandingSnapshot.objects.invalidate(self.challenge.pk)
+        StandingSnapshot.objects.build(self.challenge)
+        self.assertEqual(queries(), few)
+
+    def test_batch_writes_drop_days_from_the_earliest_entry(self):
+        StandingSnapshot.objects.build(self.challenge)
+        accepted, _ = validate_entries([
+            (0, self.carol.pk, self.challenge.pk, days_ago(4), 2500),
+            (1, self.carol.pk, self.challenge.pk, days_ago(2), 2600),
+        ])
+        save_entries(accepted)
+        self.assertEqual(StandingSnapshot.objects.built_through(self.challenge.pk), days_ago(5))
+
+        StandingSnapshot.objects.build(self.challenge)
+        self.assertEqual(self.snapshot(days_ago(4))[self.carol.pk], (2500, 3))
+        self.assertEqual(self.snapshot(days_ago(2))[self.carol.pk], (2600, 3))
+
+    def test_bulk_delete_drops_days_from_the_earliest_entry(self):
+        StandingSnapshot.objects.build(self.challenge)
+        StepEntry.objects.filter(participant=self.bob).delete()
+        self.assertEqual(StandingSnapshot.objects.built_through(self.challenge.pk), days_ago(8))
+
+        StandingSnapshot.objects.build(self.challenge)
+        self.assertEqual(self.snapshot(days_ago(1)), {
+            self.alice.pk: (5000, 1), self.bob.pk: (0, 3), self.carol.pk: (2000, 2),
+        })
+
+    def test_new_participant_keeps_snapshots(self):
+        StandingSnapshot.objects.build(self.challenge)
+        stored = set(StandingSnapshot.objects.values_list("pk", flat=True))
+        self.make_participant("dave", self.blue)
+        self.assertEqual(set(StandingSnapshot.objects.values_list("pk", flat=True)), stored)
+
+    def test_team_move_drops_days_from_the_first_entry(self):
+        StandingSnapshot.objects.build(self.challenge)
+        untouched = self.row_ids(days_ago(7))
+        self.carol.team = self.red
+        self.carol.save()
+        self.assertEqual(self.row_ids(days_ago(7)), untouched)
+        self.assertEqual(StandingSnapshot.objects.built_through(self.challenge.pk), days_ago(7))
+
+        StandingSnapshot.objects.build(self.challenge)
+        self.assertEqual(self.team_snapshot(days_ago(1)), [(self.red.pk, 13000, 1)])
+
+    def test_team_move_without_entries_moves_every_row(self):
+        dave = self.make_participant("dave", self.blue)
+        StandingSnapshot.objects.build(self.challenge)
+        stored = StandingSnapshot.objects.built_through(self.challenge.pk)
+        dave.team = self.red
+        dave.save()
+        self.assertEqual(StandingSnapshot.objects.built_through(self.challenge.pk), stored)
+        self.assertEqual(
+            set(StandingSnapshot.objects.filter(participant=dave).values_list("team_id", flat=True)),
+            {self.red.pk},
+        )
+
+    def test_team_move_moves_the_rows_before_the_first_entry(self):
+        StandingSnapshot.objects.build(self.challenge)
+        self.carol.team = self.red
+        self.carol.save()
+        self.assertEqual(
+            set(StandingSnapshot.objects.filter(participant=self.carol).values_list("team_id", flat=True)),
+            {self.red.pk},
+        )
+
+    def test_command_builds_and_rebuilds(self):
+        out = StringIO()
+        call_command("snapshot_standings", stdout=out)
+        self.assertIn("built 10 day(s)", out.getvalue())
+
+        out = StringIO()
+        call_command("snapshot_standings", "--rebuild", stdout=out)
+        self.assertIn("built 10 day(s)", out.getvalue())
+
+
+class LeaderboardAsOfTest(SnapshotTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        StandingSnapshot.objects.build(self.challenge)
+
+    def get(self, **params):
+        return self.client.get(
+            reverse("steps-leaderboard"), {"challenge": self.challenge.pk, **params}
+        )
+
+    def test_as_of_shows_that_days_standings(self):
+        response = self.get(as_of=days_ago(6).isoformat())
+        self.assertEqual(response.context["as_of"], days_ago(6))
+        self.assertEqual(
+            [(p.participant_id, p.total_steps, p.rank) for p in response.context["participants"]],
+            [(self.bob.pk, 3000, 1), (self.carol.pk, 2000, 2), (self.alice.pk, 1000, 3)],
+        )
+        self.assertEqual(
+            [(t["team__id"], t["team_steps"], t["rank"]) for t in response.context["teams"]],
+            [(self.red.pk, 4000, 1), (self.blue.pk, 2000, 2)],
+        )
+        self.assertContains(response, "Standings at the end of")
+
+    def test_cached_as_of_page_only_reads_the_challenge(self):
+        self.get(as_of=days_ago(6).isoformat())
+        with self.assertNumQueries(1):
+            self.get(as_of=days_ago(6).isoformat())
+
+    def test_today_or_bad_dates_show_live_standings(self):
+        for value in (date.today().isoformat(), "yesterday", ""):
+            with self.subTest(as_of=value):
+                response = self.get(as_of=value)
+                self.assertIsNone(response.context["as_of"])
+                self.assertEqual(response.context["participants"][0].total_steps, 6000)
+
+    def test_dates_before_the_start_show_the_first_day(self):
+        response = self.get(as_of=days_ago(30).isoformat())
+        self.assertEqual(response.context["as_of"], self.challenge.start_date)
+
+    def test_days_not_built_yet_show_live_standings(self):
+        StandingSnapshot.objects.invalidate(self.challenge.pk)
+        cache.clear()
+        response = self.get(as_of=days_ago(6).isoformat())
+        self.assertIsNone(response.context["as_of"])
+        self.assertNotIn("snapshot_last_day", response.context)
+        self.assertFalse(StandingSnapshot.objects.exists())  # Pages never build
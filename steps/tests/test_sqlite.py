@@ -0,0 +1,99 @@
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connection, connections
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import SimpleTestCase, TransactionTestCase
+
+from steps.management.commands.stress_entries import Command, error_kind, profile_options
+
+
+class ProductionSqliteProfileTest(SimpleTestCase):
+    """The tuned OPTIONS in settings, applied to a real database file."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.wrapper = DatabaseWrapper({
+            **connection.settings_dict,
+            "NAME": os.path.join(directory.name, "profile.sqlite3"),
+            "OPTIONS": settings.DATABASES["default"]["OPTIONS"],
+        }, alias="profile")
+        self.addCleanup(self.wrapper.close)
+
+    def pragma(self, name):
+        with self.wrapper.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def test_every_connection_gets_the_pragmas(self):
+        self.assertEqual(self.pragma("journal_mode"), "wal")
+        self.assertEqual(self.pragma("synchronous"), 1)  # NORMAL
+        self.assertEqual(self.pragma("cache_size"), -64000)
+        self.assertEqual(self.pragma("mmap_size"), 256 * 1024 * 1024)
+        self.assertEqual(self.pragma("busy_timeout"), 20000)
+
+    def test_transactions_take_the_write_lock_up_front(self):
+        self.wrapper.ensure_connection()
+        self.assertEqual(self.wrapper.transaction_mode, "IMMEDIATE")
+
+    def test_connections_are_reused_between_requests(self):
+        database = settings.DATABASES["default"]
+        self.assertGreater(database["CONN_MAX_AGE"], 0)
+        self.assertTrue(database["CONN_HEALTH_CHECKS"])
+
+
+class StressEntriesHelpersTest(SimpleTestCase):
+    def test_profiles(self):
+        self.assertEqual(profile_options("defaults"), {})
+        self.assertEqual(
+            profile_options("production")["transaction_mode"], "IMMEDIATE"
+        )
+
+    def test_lock_errors_are_told_apart(self):
+        self.assertEqual(error_kind(OperationalError("database is locked")), "lock_errors")
+        self.assertEqual(error_kind(OperationalError("no such table")), "other_errors")
+        self.assertEqual(error_kind(ValueError("boom")), "other_errors")
+
+
+class StressEntriesTest(TransactionTestCase):
+    """
+    Concurrent writers through the add-entry form, as stress_entries
+    runs them, against a migrated SQLite file with the production
+    profile. The test database lives in memory, where SQLite's shared
+    cache fails lock waits at once, hence the file.
+    """
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        # Every thread opens its connection from connections.settings
+        memory = connections[DEFAULT_DB_ALIAS]
+        memory_settings = connections.settings[DEFAULT_DB_ALIAS]
+        file_settings = {
+            **memory_settings,
+            "NAME": os.path.join(directory.name, "stress.sqlite3"),
+            "OPTIONS": profile_options("production"),
+        }
+        connections.settings[DEFAULT_DB_ALIAS] = file_settings
+        connections[DEFAULT_DB_ALIAS] = DatabaseWrapper(file_settings, DEFAULT_DB_ALIAS)
+
+        def restore():
+            connections[DEFAULT_DB_ALIAS].close()
+            connections.settings[DEFAULT_DB_ALIAS] = memory_settings
+            connections[DEFAULT_DB_ALIAS] = memory
+
+        self.addCleanup(restore)
+        call_command("migrate", verbosity=0, interactive=False)
+
+    def test_production_profile_stores_every_entry(self):
+        command = Command()
+        users, challenge = command.setup_challenge(writers=4, days=3)
+        result = command.run(users, challenge, days=3)
+
+        self.assertEqual(result["lock_errors"], 0)
+        self.assertEqual(result["other_errors"], 0)
+        self.assertEqual(result["attempted"], 12)
+        self.assertEqual(result["stored"], result["attempted"])
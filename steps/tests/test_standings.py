@@ -0,0 +1,226 @@
+from datetime import date, timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.urls import reverse
+
+from steps.models import (
+    StepChallenge,
+    Team,
+    Participant,
+    ParticipantStanding,
+    StepEntry,
+    rank_totals,
+)
+
+
+class StandingsTestMixin:
+    def setUp(self):
+        self.challenge = StepChallenge.objects.create(
+            name="Challenge",
+            start_date=date.today() - timedelta(days=10),
+            end_date=date.today() + timedelta(days=10),
+            is_active=True,
+        )
+        self.red = Team.objects.create(
+            challenge=self.challenge, name="Red", color="#ff0000"
+        )
+        self.blue = Team.objects.create(
+            challenge=self.challenge, name="Blue", color="#0000ff"
+        )
+        self.alice = self.make_participant("alice", self.red)
+        self.bob = self.make_participant("bob", self.red)
+        self.carol = self.make_participant("carol", self.blue)
+
+    def make_participant(self, username, team):
+        user = User.objects.create_user(username=username, password="p")
+        return Participant.objects.create(user=user, team=team)
+
+    def log(self, participant, days_ago, steps):
+        return StepEntry.objects.create(
+            participant=participant,
+            challenge=self.challenge,
+            date=date.today() - timedelta(days=days_ago),
+            total_steps=steps,
+        )
+
+    def standings(self):
+        return dict(
+            (participant_id, (steps, rank))
+            for participant_id, steps, rank in (
+                ParticipantStanding.objects
+                .filter(challenge=self.challenge)
+                .values_list("participant_id", "total_steps", "rank")
+            )
+        )
+
+    def assertMatchesLive(self):
+        expected = {
+            participant_id: (steps, rank)
+            for participant_id, _, steps, _, rank in rank_totals(
+                ParticipantStanding.objects.live_totals(self.challenge.pk)
+            )
+        }
+        self.assertEqual(self.standings(), expected)
+
+
+class ParticipantStandingMaintenanceTest(StandingsTestMixin, TestCase):
+    def test_new_participants_start_with_zero_steps(self):
+        self.assertEqual(
+            self.standings(),
+            {
+                self.alice.pk: (0, 1),
+                self.bob.pk: (0, 1),
+                self.carol.pk: (0, 1),
+            },
+        )
+
+    def test_entries_update_totals_and_ranks(self):
+        self.log(self.alice, 3, 1000)
+        self.log(self.bob, 2, 5000)
+        self.log(self.alice, 1, 7000)
+        self.assertEqual(
+            self.standings(),
+            {
+                self.alice.pk: (7000, 1),
+                self.bob.pk: (5000, 2),
+                self.carol.pk: (0, 3),
+            },
+        )
+        self.assertMatchesLive()
+
+    def test_ties_share_a_rank(self):
+        self.log(self.alice, 1, 4000)
+        self.log(self.bob, 1, 4000)
+        self.log(self.carol, 1, 2000)
+        self.assertEqual(
+            self.standings(),
+            {
+                self.alice.pk: (4000, 1),
+                self.bob.pk: (4000, 1),
+                self.carol.pk: (2000, 3),
+            },
+        )
+
+    def test_backdated_entry_does_not_replace_latest_total(self):
+        self.log(self.alice, 1, 9000)
+        self.log(self.alice, 5, 3000)
+        standing = ParticipantStanding.objects.get(participant=self.alice)
+        self.assertEqual(standing.total_steps, 9000)
+        self.assertEqual(standing.last_entry_date, date.today() - timedelta(days=1))
+
+    def test_deleting_entry_falls_back_to_previous_total(self):
+        self.log(self.alice, 3, 3000)
+        latest = self.log(self.alice, 1, 9000)
+        self.log(self.bob, 1, 5000)
+        latest.delete()
+        self.assertEqual(self.standings()[self.alice.pk], (3000, 2))
+        self.assertEqual(self.standings()[self.bob.pk], (5000, 1))
+        self.assertMatchesLive()
+
+    def test_deleting_participant_closes_rank_gap(self):
+        self.log(self.alice, 1, 9000)
+        self.log(self.bob, 1, 5000)
+        self.alice.delete()
+        self.assertEqual(self.standings()[self.bob.pk], (5000, 1))
+        self.assertMatchesLive()
+
+    def test_bulk_delete_in_the_admin_refreshes_standings(self):
+        self.log(self.alice, 3, 3000)
+        latest = self.log(self.alice, 1, 9000)
+        other = self.log(self.bob, 1, 5000)
+        self.client.force_login(
+            User.objects.create_superuser("admin", "admin@example.com", "p")
+        )
+        self.client.post(reverse("admin:steps_stepentry_changelist"), {
+            "action": "delete_selected",
+            "_selected_action": [latest.pk, other.pk],
+            "post": "yes",
+        })
+        self.assertEqual(StepEntry.objects.count(), 1)
+        self.assertEqual(self.standings()[self.alice.pk], (3000, 1))
+        self.assertEqual(self.standings()[self.bob.pk], (0, 2))
+        self.assertMatchesLive()
+
+    def test_bulk_update_refreshes_standings(self):
+        entry = self.log(self.alice, 1, 3000)
+        self.log(self.bob, 1, 5000)
+        StepEntry.objects.filter(pk=entry.pk).update(total_steps=6000)
+        self.assertEqual(self.standings()[self.alice.pk], (6000, 1))
+        self.assertMatchesLive()
+
+    def test_deleting_team_closes_rank_gaps(self):
+        self.log(self.alice, 1, 9000)
+        self.log(self.bob, 1, 7000)
+        self.log(self.carol, 1, 5000)
+        self.red.delete()
+        self.assertEqual(self.standings(), {self.carol.pk: (5000, 1)})
+        self.assertMatchesLive()
+
+    def test_bulk_deleting_participants_and_users_closes_rank_gaps(self):
+        self.log(self.alice, 1, 9000)
+        self.log(self.bob, 1, 7000)
+        self.log(self.carol, 1, 5000)
+        Participant.objects.filter(pk=self.alice.pk).delete()
+        self.assertEqual(self.standings()[self.carol.pk], (5000, 2))
+        self.bob.user.delete()
+        self.assertEqual(self.standings(), {self.carol.pk: (5000, 1)})
+        self.assertMatchesLive()
+
+    def test_team_change_to_other_challenge_moves_standing(self):
+        other = StepChallenge.objects.create(
+            name="Other",
+            start_date=date.today(),
+            end_date=date.today() + timedelta(days=5),
+        )
+        other_team = Team.objects.create(challenge=other, name="O", color="#000")
+        self.log(self.alice, 1, 9000)
+        self.alice.team = other_team
+        self.alice.save()
+        self.assertNotIn(self.alice.pk, self.standings())
+        self.assertMatchesLive()
+        self.assertEqual(
+            ParticipantStanding.objects.get(participant=self.alice).challenge,
+            other,
+        )
+
+
+class RebuildStandingsCommandTest(StandingsTestMixin, TestCase):
+    def test_rebuild_restores_corrupted_rows(self):
+        self.log(self.alice, 1, 9000)
+        self.log(self.carol, 1, 5000)
+        ParticipantStanding.objects.filter(participant=self.alice).update(
+            total_steps=1, rank=7
+        )
+        out = StringIO()
+        call_command("rebuild_standings", stdout=out)
+        self.assertIn("standings match live totals", out.getvalue())
+        self.assertMatchesLive()
+
+    def test_check_reports_mismatch(self):
+        ParticipantStanding.objects.filter(participant=self.bob).delete()
+        with self.assertRaises(CommandError):
+            call_command(
+                "rebuild_standings", "--check", stdout=StringIO(), stderr=StringIO()
+            )
+
+
+class LeaderboardReadsStandingsTest(StandingsTestMixin, TestCase):
+    def test_leaderboard_orders_by_rank_and_sums_teams(self):
+        self.log(self.alice, 1, 3000)
+        self.log(self.bob, 1, 4000)
+        self.log(self.carol, 1, 6000)
+        response = self.client.get(
+            reverse("steps-leaderboard"), {"challenge": self.challenge.pk}
+        )
+        participants = list(response.context["participants"])
+        self.assertEqual(
+            [p.participant_id for p in participants],
+            [self.carol.pk, self.bob.pk, self.alice.pk],
+        )
+        teams = list(response.context["teams"])
+        self.assertEqual(teams[0]["team__name"], "Red")
+        self.assertEqual(teams[0]["team_steps"], 7000)
@@ -0,0 +1,165 @@
+from datetime import date, timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.urls import reverse
+
+from steps.batch import save_entries, validate_entries
+from steps.models import StepEntry
+from steps.views import step_series
+
+from .test_standings import StandingsTestMixin
+
+
+class StepDeltaTest(StandingsTestMixin, TestCase):
+    def deltas(self, participant):
+        return list(
+            StepEntry.objects
+            .filter(participant=participant, challenge=self.challenge)
+            .order_by("date")
+            .values_list("total_steps", "step_delta")
+        )
+
+    def test_delta_is_progress_since_previous_entry(self):
+        first = self.log(self.alice, 5, 1000)
+        second = self.log(self.alice, 3, 4000)
+        self.assertEqual((first.step_delta, second.step_delta), (1000, 3000))
+        self.assertEqual(self.deltas(self.alice), [(1000, 1000), (4000, 3000)])
+
+    def test_inserting_an_earlier_day_updates_the_next_entry(self):
+        self.log(self.alice, 5, 1000)
+        self.log(self.alice, 1, 4000)
+        self.log(self.alice, 3, 2500)
+        self.assertEqual(
+            self.deltas(self.alice), [(1000, 1000), (2500, 1500), (4000, 1500)]
+        )
+
+    def test_update_and_delete_keep_neighbours_right(self):
+        self.log(self.alice, 5, 1000)
+        middle = self.log(self.alice, 3, 2500)
+        self.log(self.alice, 1, 4000)
+
+        middle.total_steps = 3000
+        middle.save()
+        self.assertEqual(
+            self.deltas(self.alice), [(1000, 1000), (3000, 2000), (4000, 1000)]
+        )
+
+        middle.date = date.today() - timedelta(days=2)
+        middle.save()
+        self.assertEqual(
+            self.deltas(self.alice), [(1000, 1000), (3000, 2000), (4000, 1000)]
+        )
+
+        middle.delete()
+        self.assertEqual(self.deltas(self.alice), [(1000, 1000), (4000, 3000)])
+
+    def test_bulk_delete_and_update_redo_following_deltas(self):
+        self.log(self.alice, 5, 1000)
+        middle = self.log(self.alice, 3, 2500)
+        last = self.log(self.alice, 1, 4000)
+
+        StepEntry.objects.filter(pk=last.pk).update(total_steps=5000)
+        self.assertEqual(
+            self.deltas(self.alice), [(1000, 1000), (2500, 1500), (5000, 2500)]
+        )
+        StepEntry.objects.filter(pk=middle.pk).delete()
+        self.assertEqual(self.deltas(self.alice), [(1000, 1000), (5000, 4000)])
+
+    def test_batch_inserts_set_deltas_of_new_and_following_rows(self):
+        self.log(self.alice, 5, 1000)
+        self.log(self.alice, 1, 4000)
+        day = date.today() - timedelta(days=3)
+        accepted, rejected = validate_entries([
+            (0, self.alice.pk, self.challenge.pk, day, 3000),
+            (1, self.bob.pk, self.challenge.pk, day, 700),
+        ])
+        self.assertEqual(rejected, [])
+        save_entries(accepted)
+
+        self.assertEqual(
+            self.deltas(self.alice), [(1000, 1000), (3000, 2000), (4000, 1000)]
+        )
+        self.assertEqual(self.deltas(self.bob), [(700, 700)])
+
+    def test_rebuild_standings_checks_and_repairs_deltas(self):
+        entry = self.log(self.alice, 5, 1000)
+        StepEntry.objects.filter(pk=entry.pk).update(step_delta=5)
+
+        with self.assertRaises(CommandError):
+            call_command("rebuild_standings", "--check", stdout=StringIO(), stderr=StringIO())
+
+        out = StringIO()
+        call_command("rebuild_standings", stdout=out, stderr=StringIO())
+        self.assertIn("1 entry deltas", out.getvalue())
+        self.assertEqual(self.deltas(self.alice), [(1000, 1000)])
+
+
+class StepSeriesTest(TestCase):
+    def test_weekly_buckets_follow_challenge_weeks(self):
+        start = date(2026, 1, 1)
+        days = [
+            (start, 100),
+            (start + timedelta(days=6), 50),
+            (start + timedelta(days=7), 30),
+            (start + timedelta(days=15), 20),
+        ]
+        self.assertEqual(step_series(days, start), {
+            "dates": [day for day, _ in days],
+            "deltas": [100, 50, 30, 20],
+            "totals": [100, 150, 180, 200],
+        })
+        self.assertEqual(step_series(days, start, "week"), {
+            "dates": [start, start + timedelta(days=7), start + timedelta(days=14)],
+            "deltas": [150, 30, 20],
+            "totals": [150, 180, 200],
+        })
+
+
+class StepSeriesApiTest(StandingsTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.log(self.alice, 3, 1000)
+        self.log(self.alice, 1, 2500)
+        self.log(self.bob, 1, 400)
+        self.log(self.carol, 2, 9000)
+        self.url = reverse("steps-api-series", args=[self.challenge.pk])
+        self.three_days_ago = (date.today() - timedelta(days=3)).isoformat()
+        self.yesterday = (date.today() - timedelta(days=1)).isoformat()
+
+    def test_participant_series(self):
+        with self.assertNumQueries(4):
+            response = self.client.get(self.url, {"participant": self.alice.pk})
+        self.assertEqual(response.json(), {
+            "challenge": self.challenge.pk,
+            "participant": self.alice.pk,
+            "bucket": "day",
+            "dates": [self.three_days_ago, self.yesterday],
+            "deltas": [1000, 1500],
+            "totals": [1000, 2500],
+        })
+        self.assertIn("ETag", response)
+
+    def test_team_series_sums_members(self):
+        data = self.client.get(self.url, {"team": self.red.pk}).json()
+        self.assertEqual(data["dates"], [self.three_days_ago, self.yesterday])
+        self.assertEqual(data["deltas"], [1000, 1900])
+        self.assertEqual(data["totals"], [1000, 2900])
+
+    def test_bad_parameters_are_400(self):
+        for params in (
+            {},
+            {"participant": self.alice.pk, "team": self.red.pk},
+            {"participant": "x"},
+            {"participant": self.alice.pk, "bucket": "month"},
+        ):
+            with self.subTest(**params):
+                self.assertEqual(self.client.get(self.url, params).status_code, 400)
+
+    def test_owner_outside_the_challenge_is_404(self):
+        response = self.client.get(self.url, {"team": self.blue.pk + 100})
+        self.assertEqual(response.status_code, 404)
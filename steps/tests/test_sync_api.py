@@ -0,0 +1,105 @@
+import json
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from steps.models import (
+    ChallengeDailyStats,
+    StepChallenge,
+    Team,
+    Participant,
+    ParticipantStanding,
+    StepEntry,
+)
+
+
+def day(offset):
+    return (date.today() + timedelta(days=offset)).isoformat()
+
+
+class StepEntrySyncViewTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="alice", password="password123")
+        self.challenge = StepChallenge.objects.create(
+            name="Challenge",
+            start_date=date.today() - timedelta(days=30),
+            end_date=date.today() + timedelta(days=5),
+        )
+        team = Team.objects.create(challenge=self.challenge, name="Red", color="#f00")
+        self.participant = Participant.objects.create(user=self.user, team=team)
+        self.other = StepChallenge.objects.create(
+            name="Other",
+            start_date=date.today() - timedelta(days=30),
+            end_date=date.today(),
+        )
+        self.client.login(username="alice", password="password123")
+
+    def sync(self, payload):
+        return self.client.post(
+            reverse("steps-api-sync"),
+            data=json.dumps(payload),
+            content_type="application/json",
+        )
+
+    def test_requires_authentication(self):
+        self.client.logout()
+        response = self.sync([])
+        self.assertEqual(response.status_code, 401)
+
+    def test_backfill_is_written_in_one_request(self):
+        items = [
+            {"challenge": self.challenge.pk, "date": day(-n), "total_steps": 1000 * (30 - n)}
+            for n in range(30)
+        ]
+        response = self.sync(items)
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual((body["created"], body["rejected"]), (30, 0))
+        self.assertEqual(StepEntry.objects.filter(participant=self.participant).count(), 30)
+        self.assertEqual(
+            ParticipantStanding.objects.get(participant=self.participant).total_steps,
+            30000,
+        )
+
+    def test_query_count_does_not_grow_with_batch_size(self):
+        def payload(days):
+            return [
+                {"challenge": self.challenge.pk, "date": day(-n), "total_steps": 100 * (days - n)}
+                for n in range(days)
+            ]
+
+        with CaptureQueriesContext(connection) as small:
+            self.sync(payload(2))
+        StepEntry.objects.all().delete()
+        ChallengeDailyStats.objects.all().delete()
+        with self.assertNumQueries(len(small)):
+            self.sync(payload(25))
+
+    def test_per_item_results_in_request_order(self):
+        response = self.sync([
+            {"challenge": self.challenge.pk, "date": day(-1), "total_steps": 5000},
+            {"challenge": self.challenge.pk, "date": day(0), "total_steps": 4000},
+            {"challenge": self.other.pk, "date": day(0), "total_steps": 4000},
+            {"challenge": self.challenge.pk},
+        ])
+        results = response.json()["results"]
+        self.assertEqual([r["index"] for r in results], [0, 1, 2, 3])
+        self.assertEqual(results[0]["status"], "created")
+        self.assertIn("cannot be less than your previous entry", results[1]["error"])
+        self.assertIn("not a participant", results[2]["error"])
+        self.assertEqual(results[3]["status"], "rejected")
+
+    def test_rejects_non_array_body(self):
+        response = self.client.post(
+            reverse("steps-api-sync"), data="{}", content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(STEPS_SYNC_MAX_ITEMS=2)
+    def test_rejects_oversized_batch(self):
+        response = self.sync([{}, {}, {}])
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,137 @@
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+from django.urls import reverse
+
+from steps.batch import validate_entries
+from steps.models import (
+    DECREASING_STEPS_ERROR,
+    EXCEEDS_NEXT_ENTRY_ERROR,
+    StepEntry,
+)
+
+from .test_daily_stats import DailyStatsTestMixin
+
+
+def day(days_ago):
+    return date.today() - timedelta(days=days_ago)
+
+
+class StepEntryUpsertTest(DailyStatsTestMixin, TestCase):
+    def upsert(self, participant, days_ago, steps):
+        entry = StepEntry(
+            participant=participant,
+            challenge=self.challenge,
+            date=day(days_ago),
+            total_steps=steps,
+        )
+        return entry, entry.upsert()
+
+    def deltas(self, participant):
+        return list(
+            StepEntry.objects
+            .filter(participant=participant, challenge=self.challenge)
+            .order_by("date")
+            .values_list("total_steps", "step_delta")
+        )
+
+    def test_new_day_is_inserted(self):
+        self.log(self.alice, 3, 1000)
+        entry, created = self.upsert(self.alice, 1, 4000)
+        self.assertTrue(created)
+        self.assertEqual(StepEntry.objects.get(pk=entry.pk).step_delta, 3000)
+        self.assertMatchesLive()
+        self.assertMatchesEntries()
+
+    def test_same_day_replaces_the_stored_entry(self):
+        self.log(self.alice, 5, 1000)
+        stored = self.log(self.alice, 3, 2500)
+        self.log(self.alice, 1, 4000)
+        self.log(self.bob, 3, 700)
+
+        entry, created = self.upsert(self.alice, 3, 3000)
+        self.assertFalse(created)
+        self.assertEqual(entry.pk, stored.pk)
+        self.assertEqual(
+            self.deltas(self.alice), [(1000, 1000), (3000, 2000), (4000, 1000)]
+        )
+        self.assertEqual(self.rollup()[day(3)], (2700, 2))
+        self.assertMatchesLive()
+        self.assertMatchesEntries()
+
+    def test_entries_around_the_day_are_checked(self):
+        self.log(self.alice, 5, 1000)
+        self.log(self.alice, 3, 2500)
+        self.log(self.alice, 1, 4000)
+        for steps, error in ((900, DECREASING_STEPS_ERROR), (4500, EXCEEDS_NEXT_ENTRY_ERROR)):
+            with self.assertRaisesMessage(ValidationError, error):
+                self.upsert(self.alice, 3, steps)
+        self.assertEqual(StepEntry.objects.get(date=day(3)).total_steps, 2500)
+
+    def test_only_for_new_entries(self):
+        entry = self.log(self.alice, 1, 1000)
+        with self.assertRaises(ValueError):
+            entry.upsert()
+
+    def test_correction_costs_no_more_queries_than_an_insert(self):
+        self.log(self.alice, 3, 1000)
+        self.log(self.bob, 3, 1000)
+        # Neighbours, upsert, daily stats read and write, last snapshot
+        # day and the standings refresh, in a savepoint
+        with self.assertNumQueries(14) as new:
+            self.upsert(self.alice, 1, 2000)
+        with self.assertNumQueries(len(new.captured_queries)):
+            self.upsert(self.bob, 3, 1500)
+
+
+class SameDayCorrectionTest(DailyStatsTestMixin, TestCase):
+    def test_entry_form_corrects_the_day(self):
+        self.log(self.alice, 1, 4000)
+        self.client.force_login(self.alice.user)
+        response = self.client.post(reverse("steps-add-entry"), {
+            "challenge": self.challenge.pk,
+            "date": day(1).isoformat(),
+            "total_steps": 4200,
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(StepEntry.objects.get().total_steps, 4200)
+        self.assertMatchesLive()
+
+    def test_entry_form_shows_a_rejected_correction(self):
+        self.log(self.alice, 3, 1000)
+        self.log(self.alice, 1, 4000)
+        self.client.force_login(self.alice.user)
+        response = self.client.post(reverse("steps-add-entry"), {
+            "challenge": self.challenge.pk,
+            "date": day(3).isoformat(),
+            "total_steps": 5000,
+        })
+        self.assertContains(response, EXCEEDS_NEXT_ENTRY_ERROR)
+        self.assertEqual(StepEntry.objects.get(date=day(3)).total_steps, 1000)
+
+    def test_admin_add_replaces_the_day(self):
+        stored = self.log(self.alice, 1, 4000)
+        self.client.force_login(
+            User.objects.create_superuser("admin", "admin@example.com", "p")
+        )
+        response = self.client.post(reverse("admin:steps_stepentry_add"), {
+            "participant": self.alice.pk,
+            "challenge": self.challenge.pk,
+            "date": day(1).isoformat(),
+            "total_steps": 4500,
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(StepEntry.objects.get().pk, stored.pk)
+        self.assertEqual(StepEntry.objects.get().total_steps, 4500)
+        self.assertMatchesEntries()
+
+    def test_batches_check_the_next_stored_entry(self):
+        self.log(self.alice, 1, 4000)
+        accepted, rejected = validate_entries([
+            (0, self.alice.pk, self.challenge.pk, day(3), 5000),
+            (1, self.alice.pk, self.challenge.pk, day(2), 3000),
+        ])
+        self.assertEqual(rejected, [(0, EXCEEDS_NEXT_ENTRY_ERROR)])
+        self.assertEqual([entry.ref for entry in accepted], [1])
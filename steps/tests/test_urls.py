@@ -2,11 +2,18 @@ from django.test import TestCase
 from django.urls import reverse, resolve
 
 from steps.views import (
+    AsyncHomeView,
+    AsyncLeaderboardView,
     HomeView,
     FrontendLoginView,
     StepEntryCreateView,
+    StepEntryHistoryView,
     StepEntryListView,
+    StepEntrySyncView,
     LeaderboardView,
+    LeaderboardApiView,
+    StepSeriesApiView,
+    LeaderboardStreamView,
 )
 
 
@@ -30,6 +37,11 @@ class UrlResolutionTest(TestCase):
         self.assertEqual(url, "/add-entry/")
         self.assertEqual(resolve(url).func.view_class, StepEntryCreateView)
 
+    def test_steps_entry_history_resolves(self):
+        url = reverse("steps-entry-history")
+        self.assertEqual(url, "/add-entry/history/")
+        self.assertEqual(resolve(url).func.view_class, StepEntryHistoryView)
+
     def test_steps_my_entries_resolves(self):
         url = reverse("steps-my-entries")
         self.assertEqual(url, "/my-entries/")
@@ -39,3 +51,31 @@ class UrlResolutionTest(TestCase):
         url = reverse("steps-leaderboard")
         self.assertEqual(url, "/leaderboard/")
         self.assertEqual(resolve(url).func.view_class, LeaderboardView)
+
+    def test_steps_api_sync_resolves(self):
+        url = reverse("steps-api-sync")
+        self.assertEqual(url, "/api/entries/sync/")
+        self.assertEqual(resolve(url).func.view_class, StepEntrySyncView)
+
+    def test_steps_leaderboard_stream_resolves(self):
+        url = reverse("steps-leaderboard-stream", args=[3])
+        self.assertEqual(url, "/leaderboard/3/stream/")
+        self.assertEqual(resolve(url).func.view_class, LeaderboardStreamView)
+
+    def test_steps_async_views_resolve(self):
+        self.assertEqual(reverse("steps-home-async"), "/async/")
+        self.assertEqual(resolve("/async/").func.view_class, AsyncHomeView)
+        self.assertEqual(reverse("steps-leaderboard-async"), "/async/leaderboard/")
+        self.assertEqual(
+            resolve("/async/leaderboard/").func.view_class, AsyncLeaderboardView
+        )
+
+    def test_steps_api_leaderboard_resolves(self):
+        url = reverse("steps-api-leaderboard", args=[3])
+        self.assertEqual(url, "/api/leaderboard/3/")
+        self.assertEqual(resolve(url).func.view_class, LeaderboardApiView)
+
+    def test_steps_api_series_resolves(self):
+        url = reverse("steps-api-series", args=[3])
+        self.assertEqual(url, "/api/series/3/")
+        self.assertEqual(resolve(url).func.view_class, StepSeriesApiView)
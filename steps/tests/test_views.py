@@ -1,7 +1,7 @@
 from datetime import date, timedelta
 
 from django.contrib.auth.models import User
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse
 
 from steps.models import StepChallenge, Team, Participant, StepEntry
@@ -117,6 +117,64 @@ class StepEntryCreateViewTest(TestCase):
         self.assertEqual(response.status_code, 403)
 
 
+@override_settings(STEPS_ENTRY_HISTORY_SIZE=3)
+class StepEntryHistoryTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="alice", password="password123")
+        self.challenge = make_challenge()
+        self.participant = make_participant(self.user, make_team(self.challenge))
+        for days_ago in range(5, 0, -1):
+            StepEntry.objects.create(
+                participant=self.participant,
+                challenge=self.challenge,
+                date=date.today() - timedelta(days=days_ago),
+                total_steps=(10 - days_ago) * 1000,
+            )
+        self.client.login(username="alice", password="password123")
+
+    def test_add_entry_shows_latest_entries_with_load_more(self):
+        response = self.client.get(reverse("steps-add-entry"))
+        [block] = response.context["entry_history"]
+        self.assertEqual(
+            [entry.total_steps for entry in block["entries"]],
+            [9000, 8000, 7000],
+        )
+        self.assertEqual(
+            block["more_url"],
+            reverse("steps-entry-history")
+            + f"?challenge={self.challenge.pk}&before={date.today() - timedelta(days=3)}",
+        )
+        self.assertContains(response, "Load more")
+
+    def test_history_returns_older_rows(self):
+        response = self.client.get(
+            reverse("steps-entry-history"),
+            {
+                "challenge": self.challenge.pk,
+                "before": (date.today() - timedelta(days=3)).isoformat(),
+            },
+        )
+        self.assertEqual(
+            [entry.total_steps for entry in response.context["entries"]],
+            [6000, 5000],
+        )
+        self.assertIsNone(response.context["more_url"])
+        self.assertNotContains(response, "Load more")
+
+    def test_history_only_shows_own_entries(self):
+        User.objects.create_user(username="bob", password="password123")
+        self.client.login(username="bob", password="password123")
+        response = self.client.get(
+            reverse("steps-entry-history"),
+            {"challenge": self.challenge.pk, "before": date.today().isoformat()},
+        )
+        self.assertEqual(response.context["entries"], [])
+
+    def test_history_rejects_bad_parameters(self):
+        response = self.client.get(reverse("steps-entry-history"), {"before": "x"})
+        self.assertEqual(response.status_code, 400)
+
+
 class StepEntryListViewTest(TestCase):
     def setUp(self):
         self.user = User.objects.create_user(
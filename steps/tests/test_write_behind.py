@@ -0,0 +1,176 @@
+from datetime import date, timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils.timezone import now
+
+from steps.batch import drain_submissions
+from steps.models import (
+    DATE_OUTSIDE_CHALLENGE_ERROR,
+    DECREASING_STEPS_ERROR,
+    EXCEEDS_NEXT_ENTRY_ERROR,
+    ParticipantStanding,
+    PendingSubmission,
+    StepEntry,
+)
+
+from .test_standings import StandingsTestMixin
+
+
+def day(offset):
+    return date.today() + timedelta(days=offset)
+
+
+@override_settings(STEPS_WRITE_BEHIND=True)
+class WriteBehindFormTest(StandingsTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.alice.user)
+
+    def submit(self, offset, steps):
+        return self.client.post(reverse("steps-add-entry"), {
+            "challenge": self.challenge.pk,
+            "date": day(offset).isoformat(),
+            "total_steps": steps,
+        })
+
+    def test_submission_is_queued_not_saved(self):
+        response = self.submit(-1, 5000)
+        submission = PendingSubmission.objects.get()
+        self.assertRedirects(
+            response, f"/add-entry/?submission={submission.pk}", fetch_redirect_response=False
+        )
+        self.assertEqual(
+            (submission.participant, submission.date, submission.total_steps, submission.status),
+            (self.alice, day(-1), 5000, "pending"),
+        )
+        self.assertFalse(StepEntry.objects.exists())
+
+        page = self.client.get(response.url)
+        self.assertContains(
+            page, reverse("steps-api-submission", args=[submission.pk])
+        )
+
+    def test_cheap_rules_are_checked_at_once(self):
+        response = self.submit(30, 5000)
+        self.assertContains(response, DATE_OUTSIDE_CHALLENGE_ERROR)
+        self.assertFalse(PendingSubmission.objects.exists())
+
+    @override_settings(STEPS_WRITE_BEHIND=False)
+    def test_off_by_default(self):
+        self.submit(-1, 5000)
+        self.assertTrue(StepEntry.objects.exists())
+        self.assertFalse(PendingSubmission.objects.exists())
+
+
+class DrainSubmissionsTest(StandingsTestMixin, TestCase):
+    def queue(self, participant, offset, steps):
+        return PendingSubmission.objects.create(
+            participant=participant,
+            challenge=self.challenge,
+            date=day(offset),
+            total_steps=steps,
+        )
+
+    def test_drain_applies_entry_rules_and_records_outcomes(self):
+        self.log(self.bob, 5, 3000)
+        self.log(self.carol, 1, 2000)
+        first = self.queue(self.alice, -2, 4000)
+        later = self.queue(self.alice, -1, 6000)
+        lower = self.queue(self.bob, -3, 1000)  # Below the stored 3000 before it
+        above = self.queue(self.carol, -3, 2500)  # Above the stored 2000 after it
+        again = self.queue(self.alice, -2, 4500)  # Corrects the first one
+
+        self.assertEqual(drain_submissions(), (3, 2))
+
+        for submission in (first, later, lower, above, again):
+            submission.refresh_from_db()
+            self.assertIsNotNone(submission.processed_at)
+        self.assertEqual(first.status, "created")
+        self.assertEqual(later.entry.step_delta, 1500)
+        self.assertEqual((lower.status, lower.error), ("rejected", DECREASING_STEPS_ERROR))
+        self.assertEqual((above.status, above.error), ("rejected", EXCEEDS_NEXT_ENTRY_ERROR))
+        self.assertEqual(again.status, "created")
+        self.assertEqual(again.entry, first.entry)
+        self.assertEqual(again.entry.total_steps, 4500)
+
+        standing = ParticipantStanding.objects.get(participant=self.alice)
+        self.assertEqual((standing.total_steps, standing.rank), (6000, 1))
+        self.assertMatchesLive()
+        self.assertEqual(drain_submissions(), (0, 0))
+
+    def test_batches_are_taken_oldest_first(self):
+        for offset in range(-6, 0):
+            self.queue(self.carol, offset, 1000 * (offset + 7))
+        self.assertEqual(drain_submissions(batch_size=4), (4, 0))
+        self.assertEqual(
+            PendingSubmission.objects.filter(status="pending").count(), 2
+        )
+        self.assertEqual(drain_submissions(batch_size=4), (2, 0))
+
+    def test_same_day_submissions_correct_the_stored_entry(self):
+        self.log(self.alice, 2, 3000)
+        self.log(self.alice, 1, 5000)
+        fixed = self.queue(self.alice, -2, 3500)
+        too_high = self.queue(self.alice, -2, 6000)
+        self.assertEqual(drain_submissions(), (1, 1))
+        fixed.refresh_from_db()
+        too_high.refresh_from_db()
+        self.assertEqual(fixed.entry.total_steps, 3500)
+        self.assertEqual(too_high.error, EXCEEDS_NEXT_ENTRY_ERROR)
+        self.assertEqual(StepEntry.objects.filter(participant=self.alice).count(), 2)
+        self.assertMatchesLive()
+
+    def test_query_count_does_not_grow_with_the_batch(self):
+        def queue_days(participant, first, last):
+            for steps, offset in enumerate(range(first, last + 1), start=1):
+                self.queue(participant, offset, 1000 * steps)
+
+        # Entries are validated and written per batch (standings are
+        # still refreshed per participant)
+        queue_days(self.alice, -10, -9)
+        with self.assertNumQueries(22):
+            drain_submissions()
+        queue_days(self.bob, -8, -1)
+        with self.assertNumQueries(22):
+            drain_submissions()
+
+    def test_command_drains_and_purges(self):
+        self.queue(self.alice, -1, 1000)
+        old = self.queue(self.bob, -1, 1000)
+        PendingSubmission.objects.filter(pk=old.pk).update(
+            status="created", processed_at=now() - timedelta(days=8)
+        )
+        out = StringIO()
+        call_command("drain_submissions", stdout=out)
+        self.assertIn("Created 1, rejected 0", out.getvalue())
+        self.assertIn("Deleted 1 processed submissions", out.getvalue())
+        self.assertEqual(StepEntry.objects.filter(participant=self.alice).count(), 1)
+
+
+class SubmissionStatusViewTest(StandingsTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.submission = PendingSubmission.objects.create(
+            participant=self.alice,
+            challenge=self.challenge,
+            date=day(-1),
+            total_steps=5000,
+        )
+        self.url = reverse("steps-api-submission", args=[self.submission.pk])
+
+    def test_pending_then_created(self):
+        self.client.force_login(self.alice.user)
+        self.assertEqual(self.client.get(self.url).json()["status"], "pending")
+        drain_submissions()
+        body = self.client.get(self.url).json()
+        self.assertEqual(body["status"], "created")
+        self.assertEqual(body["entry"], StepEntry.objects.get().pk)
+        self.assertIsNone(body["error"])
+
+    def test_only_the_owner_can_see_it(self):
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+        self.client.force_login(self.bob.user)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
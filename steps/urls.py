@@ -1,15 +1,25 @@
 from django.urls import path
 from django.contrib.auth import views as auth_views
 from . import views
-from .views import FrontendLoginView, LeaderboardView, StepEntryCreateView, StepEntryListView, HomeView
+from .views import AsyncHomeView, AsyncLeaderboardView, ChallengeExportView, FrontendLoginView, LeaderboardApiView, StepSeriesApiView, LeaderboardStreamView, LeaderboardView, StepEntryCreateView, StepEntryHistoryView, StepEntryListView, StepEntrySyncView, SubmissionStatusView, HomeView
 
 
 urlpatterns = [
     path('', HomeView.as_view(), name='steps-home'),
     path("leaderboard/", LeaderboardView.as_view(), name="steps-leaderboard"),
+    path("leaderboard/<int:challenge_id>/stream/", LeaderboardStreamView.as_view(), name="steps-leaderboard-stream"),
+    path("async/", AsyncHomeView.as_view(), name="steps-home-async"),
+    path("async/leaderboard/", AsyncLeaderboardView.as_view(), name="steps-leaderboard-async"),
     path("login/", FrontendLoginView.as_view(), name="steps-login"),
     path("logout/", auth_views.LogoutView.as_view(next_page="/login"), name="steps-logout"),
     path("add-entry/", StepEntryCreateView.as_view(), name="steps-add-entry"),
+    path("add-entry/history/", StepEntryHistoryView.as_view(), name="steps-entry-history"),
     path("my-entries/", StepEntryListView.as_view(), name="steps-my-entries"),
+    path("api/leaderboard/<int:challenge_id>/", LeaderboardApiView.as_view(), name="steps-api-leaderboard"),
+    path("api/series/<int:challenge_id>/", StepSeriesApiView.as_view(), name="steps-api-series"),
+    path("api/entries/sync/", StepEntrySyncView.as_view(), name="steps-api-sync"),
+    path("api/submissions/<int:submission_id>/", SubmissionStatusView.as_view(), name="steps-api-submission"),
+    path("export/<int:challenge_id>/standings.csv", ChallengeExportView.as_view(), {"kind": "standings"}, name="steps-export-standings"),
+    path("export/<int:challenge_id>/entries.csv", ChallengeExportView.as_view(), {"kind": "entries"}, name="steps-export-entries"),
 
 ]
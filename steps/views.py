@@ -1,15 +1,43 @@
-from django.shortcuts import render
+import asyncio
+import json
+from datetime import date, timedelta
+
+from django.conf import settings
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, HttpResponseRedirect, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, render
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.urls import reverse
 from django.contrib.auth.views import LoginView
-from .forms import BulmaLoginForm, StepEntryForm
+from .forms import BulmaLoginForm, StepEntryForm, StepSubmissionForm
 from django.views.generic import CreateView, ListView
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.core.exceptions import PermissionDenied
-from .models import StepEntry, Participant, StepChallenge
+from django.core.exceptions import PermissionDenied, ValidationError
+from .models import (
+    ChallengeDailyStats,
+    FinalStanding,
+    FinalTeamStanding,
+    LeaderboardVersion,
+    StepEntry,
+    Participant,
+    ParticipantStanding,
+    PendingSubmission,
+    StandingSnapshot,
+    StepChallenge,
+    Team,
+    TeamSnapshot,
+)
+from . import caching as leaderboard_cache
+from .batch import save_entries, validate_entries
+from .exports import export_response
+from .live import broadcaster
 from django.utils.timezone import now
-from collections import defaultdict
-from django.views.generic import TemplateView
-from django.db.models import OuterRef, Subquery, Sum, Max
-from django.db.models.functions import Coalesce
+from django.views.generic import TemplateView, View
+from django.db.models import Count, F, Q, Sum, Window
+from django.db.models.functions import Rank, RowNumber
+from django.utils.functional import cached_property
 
 
 challenges = [
@@ -50,12 +78,7 @@ class HomeView(TemplateView):
         # --------------------
         # Current active challenge
         # --------------------
-        current_challenge = (
-            StepChallenge.objects
-            .filter(is_active=True)
-            .order_by("-start_date")
-            .first()
-        )
+        current_challenge = current_challenge_query().first()
         context["current_challenge"] = current_challenge
         if not current_challenge:
             return context  # No active challenge → template handles empty state
@@ -66,97 +89,149 @@ class HomeView(TemplateView):
         context.update(get_challenge_days(current_challenge))
 
         # --------------------
-        # Participant (if logged in & enrolled)
+        # Participant & their latest total (if logged in & enrolled),
+        # read from their standing row in one query
         # --------------------
-        participant = None
+        my_standing = None
         if user.is_authenticated:
-            participant = (
-                Participant.objects
-                .filter(user=user, team__challenge=current_challenge)
-                .select_related("team", "user")
-                .first()
-            )
-        context["participant"] = participant
-
-        # --------------------
-        # Latest personal entry
-        # --------------------
-        context["latest_entry"] = (
-            StepEntry.objects
-            .filter(participant=participant)
-            .order_by("-date")
-            .first()
-            if participant
-            else None
-        )
+            my_standing = self.my_standing_query(current_challenge, user).first()
+        context["participant"] = my_standing.participant if my_standing else None
+        context["my_standing"] = my_standing
 
         # --------------------
-        # 🔹 Subquery to get latest step total per participant
+        # Leaderboards, stats & activity (cached until the next write)
         # --------------------
-        latest_entry_subquery = (
-            StepEntry.objects
-            .filter(
-                participant=OuterRef("pk"),
-                challenge=current_challenge
+        context.update(
+            leaderboard_cache.get_or_compute(
+                current_challenge.pk,
+                "home",
+                lambda: self.get_board(current_challenge),
             )
-            .order_by("-date")
-            .values("total_steps")[:1]
         )
 
-        # --------------------
-        # Top participants (Top 3)
-        # --------------------
-        participants = (
-            Participant.objects
-            .filter(team__challenge=current_challenge)
-            .annotate(latest_steps=Coalesce(Subquery(latest_entry_subquery), 0))
-            .select_related("user", "team")
-            .order_by("-latest_steps")
-        )
-        context["top_participants"] = participants[:3]
+        return context
 
-        # --------------------
-        # Top teams (Top 3)
-        # --------------------
-        teams = (
-            participants
-            .values("team__id", "team__name", "team__color")
-            .annotate(team_total=Sum("latest_steps"))
-            .order_by("-team_total")
+    def my_standing_query(self, challenge, user):
+        return (
+            ParticipantStanding.objects
+            .filter(challenge=challenge, participant__user=user)
+            .select_related("participant__user", "participant__team__challenge")
         )
-        context["top_teams"] = teams[:3]
+
+    def get_board(self, challenge):
+        """Challenge-wide part of the page, identical for every visitor."""
+        return self.build_board(challenge, {
+            name: list(queryset)
+            for name, queryset in self.board_queries(challenge).items()
+        })
+
+    def board_queries(self, challenge):
+        """The board's queries, none of which depends on another's result."""
+        standings = ParticipantStanding.objects.filter(challenge=challenge)
+        return {
+            # Top participants (Top 3) from the standings table
+            "top_participants": standings.rows().ranked()[:3],
+            # Every team's total; member counts give the participant
+            # total without another query
+            "teams": (
+                standings
+                .values("team__id", "team__name", "team__color")
+                .annotate(team_total=Sum("total_steps"), members=Count("id"))
+                .order_by("-team_total", "team__id")
+            ),
+            # Quick stats & daily activity from the per-day rollup
+            "days": (
+                ChallengeDailyStats.objects
+                .filter(challenge=challenge)
+                .values_list("date", "step_delta", "entry_count")
+            ),
+            # Recent activity (latest 5)
+            "recent_entries": (
+                StepEntry.objects
+                .filter(challenge=challenge)
+                .annotate(
+                    first_name=F("participant__user__first_name"),
+                    username=F("participant__user__username"),
+                )
+                .order_by("-date")
+                .values_list(
+                    "pk", "first_name", "username", "total_steps", "date", named=True
+                )[:5]
+            ),
+        }
+
+    def build_board(self, challenge, rows):
+        """Assemble the board from the evaluated ``board_queries()``."""
+        teams, days = rows["teams"], rows["days"]
 
         # --------------------
         # Quick stats
         # --------------------
-        total_steps = (
-            StepEntry.objects
-            .filter(participant__team__challenge=current_challenge)
-            .aggregate(total=Coalesce(Sum("total_steps"), 0))["total"]
-        )
-        participant_count = Participant.objects.filter(team__challenge=current_challenge).count()
-        entry_count = StepEntry.objects.filter(participant__team__challenge=current_challenge).count()
+        total_steps = sum(step_delta for _, step_delta, _ in days)
+        participant_count = sum(team["members"] for team in teams)
+        entry_count = sum(count for _, _, count in days)
         avg_steps = int(total_steps / participant_count) if participant_count else 0
 
-        context["quick_stats"] = {
-            "total_steps": total_steps,
-            "participant_count": participant_count,
-            "entry_count": entry_count,
-            "avg_steps": avg_steps,
+        return {
+            "top_participants": rows["top_participants"],
+            "top_teams": teams[:3],
+            "quick_stats": {
+                "total_steps": total_steps,
+                "participant_count": participant_count,
+                "entry_count": entry_count,
+                "avg_steps": avg_steps,
+            },
+            "daily_activity": get_daily_activity(challenge, days),
+            "recent_entries": rows["recent_entries"],
         }
 
-        # --------------------
-        # Recent activity (latest 5)
-        # --------------------
-        context["recent_entries"] = (
-            StepEntry.objects
-            .filter(participant__team__challenge=current_challenge)
-            .select_related("participant__user", "participant__team")
-            .order_by("-date")[:5]
+
+class AsyncHomeView(HomeView):
+    """
+    HomeView on the async ORM, for the ASGI server.
+
+    The visitor's standing and the board's four queries are awaited
+    together without blocking the event loop, but the async ORM runs
+    them one at a time on a single thread (sync_to_async with
+    thread_sensitive=True), so they do not overlap. The page and the
+    cache entries are the same as HomeView's.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        context = await self.aget_context_data(**kwargs)
+        return self.render_to_response(context)
+
+    async def aget_context_data(self, **kwargs):
+        context = super(HomeView, self).get_context_data(**kwargs)
+        user = self.request.user = await self.request.auser()
+
+        current_challenge = await current_challenge_query().afirst()
+        context["current_challenge"] = current_challenge
+        if not current_challenge:
+            return context
+
+        context.update(get_challenge_days(current_challenge))
+
+        my_standing, board = await asyncio.gather(
+            self.my_standing_query(current_challenge, user).afirst()
+            if user.is_authenticated else resolved(None),
+            leaderboard_cache.aget_or_compute(
+                current_challenge.pk,
+                "home",
+                lambda: self.aget_board(current_challenge),
+            ),
         )
+        context["participant"] = my_standing.participant if my_standing else None
+        context["my_standing"] = my_standing
+        context.update(board)
 
         return context
 
+    async def aget_board(self, challenge):
+        queries = self.board_queries(challenge)
+        rows = await asyncio.gather(*map(alist, queries.values()))
+        return self.build_board(challenge, dict(zip(queries, rows)))
+
 
 class FrontendLoginView(LoginView):
     template_name = "steps/login.html"
@@ -170,24 +245,51 @@ class StepEntryCreateView(LoginRequiredMixin, CreateView):
     template_name = "steps/stepentry_form.html"
     success_url = "/add-entry/"
 
-    def get_active_challenges(self):
-        return (
-            StepChallenge.objects
-            .filter(
-                is_active=True,
-                teams__participants__user=self.request.user
-            )
-            .distinct()
-            .order_by("-start_date")
+    @cached_property
+    def participation(self):
+        """
+        The user's participants in every challenge they joined, with team
+        and challenge, newest challenge first. Loaded once per request.
+        """
+        return list(
+            Participant.objects
+            .filter(user=self.request.user)
+            .select_related("user", "team__challenge")
+            .order_by("-team__challenge__start_date", "pk")
         )
 
+    def get_active_challenges(self):
+        challenges = []
+        for participant in self.participation:
+            challenge = participant.team.challenge
+            if challenge.is_active and challenge not in challenges:
+                challenges.append(challenge)
+        return challenges
+
+    def get_participant(self, challenge):
+        for participant in self.participation:
+            if participant.team.challenge_id == challenge.pk:
+                return participant
+        return None
+
+    def get_form_class(self):
+        # ⏳ Write-behind: queue the entry; drain_submissions saves it
+        if getattr(settings, "STEPS_WRITE_BEHIND", False):
+            return StepSubmissionForm
+        return super().get_form_class()
+
+    def get_success_url(self):
+        if isinstance(self.object, PendingSubmission):
+            return f"{self.success_url}?submission={self.object.pk}"
+        return super().get_success_url()
+
     def get_initial(self):
         initial = super().get_initial()
         challenges = self.get_active_challenges()
 
         # Preselect most recent challenge
-        if challenges.count() > 1:
-            initial["challenge"] = challenges.first()
+        if len(challenges) > 1:
+            initial["challenge"] = challenges[0]
 
         # Preselect today's date
         initial["date"] = now().date()
@@ -199,80 +301,348 @@ class StepEntryCreateView(LoginRequiredMixin, CreateView):
 
         challenges = self.get_active_challenges()
         context["active_challenges"] = challenges
-        context["single_challenge"] = challenges.count() == 1
+        context["single_challenge"] = len(challenges) == 1
 
-        context["past_entries"] = (
-            StepEntry.objects
-            .filter(participant__user=self.request.user)
-            .select_related("challenge")
-            .order_by("-date")
-        )
-
-        # 🔹 Group past entries by challenge
-        entries_by_challenge = defaultdict(list)
-
-        past_entries = (
-            StepEntry.objects
-            .filter(participant__user=self.request.user)
-            .select_related(
-                "challenge",
-                "participant__team"
+        # ⏳ Just queued in write-behind mode: the page polls its status
+        submission = self.request.GET.get("submission", "")
+        if submission.isdigit():
+            context["submission_url"] = reverse(
+                "steps-api-submission", args=[int(submission)]
             )
-            .order_by("-date")
-        )
-
-        for entry in past_entries:
-            entries_by_challenge[entry.challenge].append(entry)
 
-        context["entries_by_challenge"] = dict(entries_by_challenge)
+        # 🔹 Latest entries per challenge; older ones load on demand
+        context["entry_history"] = self.get_entry_history()
+        context["past_entries"] = [
+            entry
+            for block in context["entry_history"]
+            for entry in block["entries"]
+        ]
 
         # single challenge participant info
         if context["single_challenge"]:
-            challenge = challenges.first()
+            challenge = challenges[0]
+            context["current_challenge"] = challenge
             context.update(get_challenge_days(challenge))
+            context["participant"] = self.get_participant(challenge)
 
-            participant = Participant.objects.select_related(
-                "user", "team"
-            ).get(
-                user=self.request.user,
-                team__challenge=challenge
-            )
+        return context
 
-            context["participant"] = participant
+    def get_entry_history(self):
+        """
+        The ``STEPS_ENTRY_HISTORY_SIZE`` latest entries of each challenge,
+        fetched in one query however long the user's history is.
+        """
+        size = getattr(settings, "STEPS_ENTRY_HISTORY_SIZE", 10)
+        entries = (
+            StepEntry.objects
+            .filter(participant__user=self.request.user)
+            .select_related("challenge", "participant__team")
+            .annotate(position=Window(
+                RowNumber(),
+                partition_by=[F("challenge_id")],
+                order_by=F("date").desc(),
+            ))
+            .filter(position__lte=size + 1)  # One extra to tell if there are more
+            .order_by("-challenge__start_date", "challenge_id", "-date")
+        )
 
-        return context
+        history = []
+        for entry in entries:
+            if not history or history[-1]["challenge"] != entry.challenge:
+                history.append({
+                    "challenge": entry.challenge,
+                    "team": entry.participant.team,
+                    "entries": [],
+                    "more_url": None,
+                })
+            block = history[-1]
+            if len(block["entries"]) < size:
+                block["entries"].append(entry)
+            else:
+                block["more_url"] = history_url(entry.challenge_id, block["entries"][-1])
+        return history
 
     def form_valid(self, form):
         challenge = form.cleaned_data["challenge"]
 
         # 🔒 OPTIONAL SAFETY CHECK
-        # If only one active challenge exists, enforce it
-        active_challenges = StepChallenge.objects.filter(is_active=True)
+        # If the user is in only one active challenge, enforce it
+        active_challenges = self.get_active_challenges()
 
-        if active_challenges.count() == 1:
-            challenge = active_challenges.first()
+        if len(active_challenges) == 1:
+            challenge = active_challenges[0]
             form.instance.challenge = challenge
 
-        try:
-            participant = Participant.objects.get(
-                user=self.request.user,
-                team__challenge=challenge
-            )
-        except Participant.DoesNotExist:
+        participant = self.get_participant(challenge)
+        if participant is None:
             raise PermissionDenied("You are not a participant in this challenge.")
 
         form.instance.participant = participant
 
-        return super().form_valid(form)
+        if isinstance(form.instance, PendingSubmission):
+            return super().form_valid(form)
+
+        # ✏️ A second value for the same day corrects the first
+        try:
+            form.instance.upsert()
+        except ValidationError as exc:
+            form.add_error(None, exc)
+            return self.form_invalid(form)
+        self.object = form.instance
+        return HttpResponseRedirect(self.get_success_url())
+
+
+class StepEntryHistoryView(LoginRequiredMixin, View):
+    """
+    Next page of a challenge's entry history on the add-entry page.
+
+    Returns table rows (plus a new "load more" row if needed) for the
+    user's entries in ``challenge`` dated before ``before``.
+    """
+
+    http_method_names = ["get"]
+
+    def get(self, request, *args, **kwargs):
+        try:
+            challenge_id = int(request.GET["challenge"])
+            before = date.fromisoformat(request.GET["before"])
+        except (KeyError, ValueError):
+            return HttpResponseBadRequest("Expected 'challenge' and 'before'.")
+
+        size = getattr(settings, "STEPS_ENTRY_HISTORY_SIZE", 10)
+        entries = list(
+            StepEntry.objects
+            .filter(
+                participant__user=request.user,
+                challenge_id=challenge_id,
+                date__lt=before,
+            )
+            .order_by("-date")[:size + 1]
+        )
+        more_url = None
+        if len(entries) > size:
+            entries = entries[:size]
+            more_url = history_url(challenge_id, entries[-1])
+
+        return render(
+            request,
+            "steps/includes/entry_history_rows.html",
+            {"entries": entries, "more_url": more_url},
+        )
+
+
+class StepEntrySyncView(View):
+    """
+    JSON endpoint for clients that sync many days at once.
+
+    Accepts a JSON array of ``{"challenge", "date", "total_steps"}`` items
+    for the logged-in user, validates them as one batch with the entry
+    form's rules and writes the valid ones in a single transaction.
+    Responds with a result per item, in request order. Session-authenticated,
+    so clients must send the CSRF token (``X-CSRFToken`` header).
+    """
+
+    http_method_names = ["post"]
+
+    def post(self, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({"error": "Authentication required."}, status=401)
+
+        try:
+            items = json.loads(request.body)
+        except ValueError:
+            return JsonResponse({"error": "Request body must be JSON."}, status=400)
+        if not isinstance(items, list):
+            return JsonResponse({"error": "Expected a JSON array of entries."}, status=400)
+
+        max_items = getattr(settings, "STEPS_SYNC_MAX_ITEMS", 500)
+        if len(items) > max_items:
+            return JsonResponse(
+                {"error": f"At most {max_items} entries per request."}, status=400
+            )
+
+        # The user's participant in each challenge they are enrolled in
+        enrolled = dict(
+            Participant.objects
+            .filter(user=request.user)
+            .values_list("team__challenge_id", "pk")
+        )
+
+        results = [None] * len(items)
+        rows = []
+        for index, item in enumerate(items):
+            try:
+                challenge_id = int(item["challenge"])
+                row = (
+                    index,
+                    enrolled.get(challenge_id),
+                    challenge_id,
+                    date.fromisoformat(str(item["date"])),
+                    int(item["total_steps"]),
+                )
+            except (KeyError, TypeError, ValueError):
+                results[index] = {
+                    "status": "rejected",
+                    "error": "Each entry needs challenge, date (YYYY-MM-DD) and total_steps.",
+                }
+                continue
+            if row[1] is None:
+                results[index] = {
+                    "status": "rejected",
+                    "error": "You are not a participant in this challenge.",
+                }
+                continue
+            rows.append(row)
+
+        accepted, rejected = validate_entries(rows)
+        save_entries(accepted)
+
+        for entry in accepted:
+            results[entry.ref] = {"status": "created", "id": entry.pk}
+        for index, reason in rejected:
+            results[index] = {"status": "rejected", "error": reason}
+
+        return JsonResponse({
+            "created": len(accepted),
+            "rejected": len(items) - len(accepted),
+            "results": [
+                {"index": index, **result} for index, result in enumerate(results)
+            ],
+        })
+
+
+class SubmissionStatusView(View):
+    """
+    Status of one of the user's queued submissions (write-behind mode),
+    for clients to poll until it is ``created`` or ``rejected``.
+    """
+
+    http_method_names = ["get", "head"]
+
+    def get(self, request, submission_id):
+        if not request.user.is_authenticated:
+            return JsonResponse({"error": "Authentication required."}, status=401)
+
+        submission = (
+            PendingSubmission.objects
+            .filter(pk=submission_id, participant__user=request.user)
+            .values(
+                "id",
+                "status",
+                "challenge_id",
+                "date",
+                "total_steps",
+                "entry_id",
+                "error",
+                "submitted_at",
+                "processed_at",
+            )
+            .first()
+        )
+        if submission is None:
+            return JsonResponse({"error": "No such submission."}, status=404)
+
+        response = JsonResponse({
+            "id": submission["id"],
+            "status": submission["status"],
+            "challenge": submission["challenge_id"],
+            "date": submission["date"],
+            "total_steps": submission["total_steps"],
+            "entry": submission["entry_id"],
+            "error": submission["error"] or None,
+            "submitted_at": submission["submitted_at"],
+            "processed_at": submission["processed_at"],
+        })
+        response["Cache-Control"] = "no-cache"
+        return response
 
 
 class StepEntryListView(LoginRequiredMixin, ListView):
+    """
+    The user's entries, newest first, one keyset page at a time.
+
+    ``?challenge=`` narrows the list to one challenge; ``?after=`` and
+    ``?before=`` are cursors from the previous page, so each page costs
+    the same however many entries the user has.
+    """
+
     model = StepEntry
     template_name = "steps/my_entries.html"
 
     def get_queryset(self):
         # Show only the logged-in participant's entries
-        return StepEntry.objects.filter(participant__user=self.request.user)
+        entries = (
+            StepEntry.objects
+            .filter(participant__user=self.request.user)
+            .select_related("challenge")
+        )
+        challenge_id = self.get_challenge_id()
+        if challenge_id:
+            entries = entries.filter(challenge_id=challenge_id)
+        return entries
+
+    def get_challenge_id(self):
+        try:
+            return int(self.request.GET.get("challenge", ""))
+        except ValueError:
+            return None
+
+    def get(self, request, *args, **kwargs):
+        self.object_list, self.cursors = self.get_page(
+            self.get_queryset(),
+            after=parse_entry_cursor(request.GET.get("after")),
+            before=parse_entry_cursor(request.GET.get("before")),
+        )
+        context = self.get_context_data()
+        return self.render_to_response(context)
+
+    def get_page(self, entries, after=None, before=None):
+        """
+        One page of ``entries`` as an evaluated queryset, newest first,
+        plus the cursors of the neighbouring pages.
+        """
+        size = getattr(settings, "STEPS_ENTRIES_PAGE_SIZE", 50)
+
+        if before:
+            newer = list(
+                entries.newer_than(*before).values_list("date", "id")[:size + 1]
+            )
+            has_previous = len(newer) > size
+            newer = newer[:size]
+            if newer:
+                # Everything between the cursor and the newest row of the page
+                top_date, top_id = newer[-1]
+                page = entries.newer_than(*before).filter(
+                    Q(date__lt=top_date) | Q(date=top_date, id__lte=top_id)
+                ).newest()
+            else:
+                page = entries.none()
+            rows = list(page)
+            has_next = True
+        else:
+            page = (entries.older_than(*after) if after else entries.newest())[:size]
+            rows = list(page)
+            has_previous = after is not None
+            has_next = len(rows) == size and entries.older_than(
+                rows[-1].date, rows[-1].pk
+            ).exists()
+
+        return page, {
+            "previous_cursor": make_entry_cursor(rows[0]) if rows and has_previous else None,
+            "next_cursor": make_entry_cursor(rows[-1]) if rows and has_next else None,
+        }
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context.update(self.cursors)
+        context["challenges"] = (
+            StepChallenge.objects
+            .filter(teams__participants__user=self.request.user)
+            .distinct()
+            .order_by("-start_date")
+        )
+        context["selected_challenge"] = self.get_challenge_id()
+        return context
 
 
 class LeaderboardView(TemplateView):
@@ -281,16 +651,12 @@ class LeaderboardView(TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        # All challenges user participated in (empty for anonymous)
+        # All challenges user participated in (empty for anonymous),
+        # loaded once and reused for the selection below
         if self.request.user.is_authenticated:
-            challenges = (
-                StepChallenge.objects
-                .filter(teams__participants__user=self.request.user)
-                .distinct()
-                .order_by("-start_date")
-            )
+            challenges = list(self.challenges_query(self.request.user))
         else:
-            challenges = StepChallenge.objects.none()
+            challenges = []
 
         context["challenges"] = challenges
 
@@ -298,9 +664,11 @@ class LeaderboardView(TemplateView):
         challenge_id = self.request.GET.get("challenge")
 
         if challenge_id:
-            challenge = StepChallenge.objects.get(id=challenge_id)
+            challenge = next(
+                (c for c in challenges if str(c.pk) == challenge_id), None
+            ) or StepChallenge.objects.get(id=challenge_id)
         else:
-            challenge = challenges.filter(is_active=True).first() or challenges.first()
+            challenge = self.default_challenge(challenges)
 
         context["challenge"] = challenge
 
@@ -310,44 +678,529 @@ class LeaderboardView(TemplateView):
         if challenge.is_active:
             context.update(get_challenge_days(challenge))
 
-        # 🔹 Subquery to get latest entry per participant
-        latest_entry = (
-            StepEntry.objects
-            .filter(
-                participant=OuterRef("pk"),
-                challenge=challenge
-            )
-            .order_by("-date")
-            .values("total_steps")[:1]
+        # 🕰 A past day's standings come from the daily snapshots
+        snapshot_range = self.get_snapshot_range(challenge)
+        as_of = self.get_as_of(snapshot_range)
+        context.update(snapshot_range, as_of=as_of)
+        standings = self.standings_query(challenge, as_of)
+
+        # First page + teams: identical for every visitor, so cached
+        board = leaderboard_cache.get_or_compute(
+            challenge.pk,
+            f"leaderboard:{as_of}" if as_of else "leaderboard",
+            lambda: self.get_board(challenge, standings, as_of),
         )
+        context.update(board)
 
-        # 🧍 Participant leaderboard
-        participants = (
-            Participant.objects
-            .filter(team__challenge=challenge)
-            .annotate(latest_steps=Subquery(latest_entry))
-            .select_related("user", "team")
-            .order_by("-latest_steps")
+        # 🧍 Other windows of the participant leaderboard, never the whole table
+        if self.request.GET.get("around") == "me" and self.request.user.is_authenticated:
+            context.update(self.get_rows_around_me(standings))
+        else:
+            after = parse_cursor(self.request.GET.get("after"))
+            before = parse_cursor(self.request.GET.get("before"))
+            if after or before:
+                context.update(self.get_page(standings, after=after, before=before))
+
+        return context
+
+    def challenges_query(self, user):
+        return (
+            StepChallenge.objects
+            .filter(teams__participants__user=user)
+            .distinct()
+            .order_by("-start_date")
+        )
+
+    def default_challenge(self, challenges):
+        """The user's active challenge, else their latest one."""
+        return next(
+            (c for c in challenges if c.is_active),
+            challenges[0] if challenges else None,
         )
 
-        context["participants"] = participants
+    def get_as_of(self, snapshot_range):
+        """
+        The past day asked for with ``?as_of=YYYY-MM-DD``, moved into
+        the snapshotted days; None for the live standings (also for
+        today and days not built yet).
+        """
+        try:
+            as_of = date.fromisoformat(self.request.GET.get("as_of", ""))
+        except ValueError:
+            return None
+        if not snapshot_range or as_of > snapshot_range["snapshot_last_day"]:
+            return None
+        return max(as_of, snapshot_range["snapshot_first_day"])
+
+    def get_snapshot_range(self, challenge):
+        """
+        Bounds of the "as of" date picker: the days snapshot_standings
+        has built, empty before its first run. Pages only read snapshots.
+        """
+        last_day = leaderboard_cache.get_or_compute(
+            challenge.pk,
+            "snapshot_last_day",
+            lambda: StandingSnapshot.objects.built_through(challenge.pk),
+        )
+        return self.build_snapshot_range(challenge, last_day)
+
+    def build_snapshot_range(self, challenge, last_day):
+        if last_day is None:
+            return {}
+        return {"snapshot_first_day": challenge.start_date, "snapshot_last_day": last_day}
+
+    def standings_query(self, challenge, as_of=None, extra=()):
+        if as_of:
+            standings = StandingSnapshot.objects.filter(challenge=challenge, date=as_of)
+        elif challenge.archived_at:
+            # 🏁 Closed challenges are served from their frozen final standings
+            standings = FinalStanding.objects.filter(challenge=challenge)
+        else:
+            standings = ParticipantStanding.objects.filter(challenge=challenge)
+        return standings.rows(*extra)
+
+    def get_board(self, challenge, standings, as_of=None):
+        """First page of participants and all teams."""
+        return {
+            **self.get_page(standings),
+            "teams": list(self.teams_query(challenge, as_of)),
+        }
+
+    def get_page(self, standings, after=None, before=None):
+        """One keyset page of participants, with cursors to its neighbours."""
+        queryset = self.page_query(standings, after, before)
+        return self.build_page(list(queryset), after, before)
+
+    def page_query(self, standings, after=None, before=None):
+        # One row more than a page tells whether there is another page
+        size = getattr(settings, "STEPS_LEADERBOARD_PAGE_SIZE", 50)
+        if before:
+            return standings.before(*before)[:size + 1]
+        queryset = standings.after(*after) if after else standings.ranked()
+        return queryset[:size + 1]
+
+    def build_page(self, rows, after=None, before=None):
+        size = getattr(settings, "STEPS_LEADERBOARD_PAGE_SIZE", 50)
+
+        if before:
+            has_previous = len(rows) > size
+            rows = rows[:size][::-1]
+            has_next = True
+        else:
+            has_next = len(rows) > size
+            rows = rows[:size]
+            has_previous = after is not None
+
+        return {
+            "participants": rows,
+            "previous_cursor": make_cursor(rows[0]) if rows and has_previous else None,
+            "next_cursor": make_cursor(rows[-1]) if rows and has_next else None,
+        }
+
+    def get_rows_around_me(self, standings):
+        """The user's own row with a few neighbours on each side."""
+        me = standings.filter(participant__user=self.request.user).first()
+        if me is None:
+            return self.get_page(standings)
 
-        # 🏆 Team leaderboard
-        teams = (
-            participants
+        above, below = self.neighbour_queries(standings, me)
+        return self.build_rows_around(me, list(above), list(below))
+
+    def neighbour_queries(self, standings, me):
+        around = getattr(settings, "STEPS_LEADERBOARD_AROUND", 5)
+        return (
+            standings.before(me.total_steps, me.participant_id)[:around + 1],
+            standings.after(me.total_steps, me.participant_id)[:around + 1],
+        )
+
+    def build_rows_around(self, me, above, below):
+        around = getattr(settings, "STEPS_LEADERBOARD_AROUND", 5)
+        rows = above[:around][::-1] + [me] + below[:around]
+
+        return {
+            "participants": rows,
+            "my_standing": me,
+            "previous_cursor": make_cursor(rows[0]) if len(above) > around else None,
+            "next_cursor": make_cursor(rows[-1]) if len(below) > around else None,
+        }
+
+    def teams_query(self, challenge, as_of=None):
+        if as_of or challenge.archived_at:
+            ranked_teams = (
+                TeamSnapshot.objects.filter(challenge=challenge, date=as_of)
+                if as_of
+                else FinalTeamStanding.objects.filter(challenge=challenge)
+            )
+            return (
+                ranked_teams
+                .values("team__id", "team__name", "team__color", "rank")
+                .annotate(team_steps=F("total_steps"))
+                .order_by("rank", "team__id")
+            )
+
+        # Few teams per challenge, so ranking them in SQL is cheap
+        return (
+            ParticipantStanding.objects
+            .filter(challenge=challenge)
             .values(
                 "team__id",
                 "team__name",
                 "team__color",
             )
-            .annotate(team_steps=Sum("latest_steps"))
-            .order_by("-team_steps")
+            .annotate(
+                team_steps=Sum("total_steps"),
+                rank=Window(Rank(), order_by=Sum("total_steps").desc()),
+            )
+            .order_by("-team_steps", "team__id")
         )
 
-        context["teams"] = teams
+
+class AsyncLeaderboardView(LeaderboardView):
+    """
+    LeaderboardView on the async ORM, for the ASGI server.
+
+    Looks up the user's challenges and a requested challenge, then the
+    cached board (page and teams) and any other requested window of
+    rows. Each group is awaited together without blocking the event
+    loop, though the async ORM still runs the queries one at a time on
+    a single thread.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        context = await self.aget_context_data(**kwargs)
+        return self.render_to_response(context)
+
+    async def aget_context_data(self, **kwargs):
+        context = super(LeaderboardView, self).get_context_data(**kwargs)
+        user = self.request.user = await self.request.auser()
+
+        challenge_id = self.request.GET.get("challenge")
+        challenges, requested = await asyncio.gather(
+            alist(self.challenges_query(user)) if user.is_authenticated else resolved([]),
+            StepChallenge.objects.aget(id=challenge_id) if challenge_id else resolved(None),
+        )
+        context["challenges"] = challenges
+
+        challenge = requested or self.default_challenge(challenges)
+        context["challenge"] = challenge
+
+        if not challenge:
+            return context
+
+        if challenge.is_active:
+            context.update(get_challenge_days(challenge))
+
+        snapshot_range = await self.aget_snapshot_range(challenge)
+        as_of = self.get_as_of(snapshot_range)
+        context.update(snapshot_range, as_of=as_of)
+        standings = self.standings_query(challenge, as_of)
+
+        if self.request.GET.get("around") == "me" and user.is_authenticated:
+            window = self.aget_rows_around_me(standings)
+        else:
+            after = parse_cursor(self.request.GET.get("after"))
+            before = parse_cursor(self.request.GET.get("before"))
+            window = (
+                self.aget_page(standings, after=after, before=before)
+                if after or before else resolved({})
+            )
+
+        board, window = await asyncio.gather(
+            leaderboard_cache.aget_or_compute(
+                challenge.pk,
+                f"leaderboard:{as_of}" if as_of else "leaderboard",
+                lambda: self.aget_board(challenge, standings, as_of),
+            ),
+            window,
+        )
+        context.update(board)
+        context.update(window)
 
         return context
 
+    async def aget_snapshot_range(self, challenge):
+        last_day = await leaderboard_cache.aget_or_compute(
+            challenge.pk,
+            "snapshot_last_day",
+            sync_to_async(lambda: StandingSnapshot.objects.built_through(challenge.pk)),
+        )
+        return self.build_snapshot_range(challenge, last_day)
+
+    async def aget_board(self, challenge, standings, as_of=None):
+        rows, teams = await asyncio.gather(
+            alist(self.page_query(standings)), alist(self.teams_query(challenge, as_of))
+        )
+        return {**self.build_page(rows), "teams": teams}
+
+    async def aget_page(self, standings, after=None, before=None):
+        rows = await alist(self.page_query(standings, after, before))
+        return self.build_page(rows, after, before)
+
+    async def aget_rows_around_me(self, standings):
+        me = await standings.filter(participant__user=self.request.user).afirst()
+        if me is None:
+            return await self.aget_page(standings)
+
+        above, below = await asyncio.gather(
+            *map(alist, self.neighbour_queries(standings, me))
+        )
+        return self.build_rows_around(me, above, below)
+
+
+def board_json_response(request, challenge_id, name, compute):
+    """
+    JSON response with a challenge's cached ``name`` value, validated
+    by its LeaderboardVersion row: ETag is the version, Last-Modified
+    when it last changed. The row is shared by every server process, and
+    the cache key includes it, so no process answers 304 or serves a
+    body from before another process's write.
+    """
+    version, changed_at = LeaderboardVersion.objects.current(challenge_id)
+    etag = f'"leaderboard-{challenge_id}-{version}"'
+    last_modified = int(changed_at.timestamp()) if changed_at else None
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = JsonResponse(
+            leaderboard_cache.get_or_compute(challenge_id, f"{name}:v{version}", compute)
+        )
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    response["Cache-Control"] = "no-cache"  # Always revalidate
+    return response
+
+
+class LeaderboardApiView(LeaderboardView):
+    """
+    JSON leaderboard of one challenge, for dashboards that poll it.
+
+    A conditional GET for an unchanged leaderboard gets 304 Not Modified
+    after a single primary-key lookup (see board_json_response()).
+    Otherwise the body (top page of participants and all teams) is
+    served from the leaderboard cache.
+    """
+
+    http_method_names = ["get", "head"]
+
+    def get(self, request, challenge_id):
+        return board_json_response(
+            request, challenge_id, "api", lambda: self.get_payload(challenge_id)
+        )
+
+    def get_payload(self, challenge_id):
+        challenge = get_object_or_404(StepChallenge, pk=challenge_id)
+        standings = self.standings_query(challenge, extra=["last_entry_date"])
+        page = self.build_page(list(self.page_query(standings)))
+        return {
+            "challenge": {
+                "id": challenge.pk,
+                "name": challenge.name,
+                "start_date": challenge.start_date,
+                "end_date": challenge.end_date,
+                "is_active": challenge.is_active,
+            },
+            "participants": [
+                {
+                    "rank": standing.rank,
+                    "participant": standing.participant_id,
+                    "name": f"{standing.first_name} {standing.last_name}".strip(),
+                    "team": standing.team_id,
+                    "total_steps": standing.total_steps,
+                    "last_entry_date": standing.last_entry_date,
+                }
+                for standing in page["participants"]
+            ],
+            "teams": [
+                {
+                    "rank": team["rank"],
+                    "id": team["team__id"],
+                    "name": team["team__name"],
+                    "color": team["team__color"],
+                    "total_steps": team["team_steps"],
+                }
+                for team in self.teams_query(challenge)
+            ],
+        }
+
+
+class StepSeriesApiView(View):
+    """
+    Steps over time of one participant or team in a challenge, as
+    compact parallel arrays::
+
+        {"dates": [...], "deltas": [...], "totals": [...]}
+
+    Pass ``participant=<id>`` or ``team=<id>``, and ``bucket=week`` for
+    one point per challenge week instead of per day. Built from the
+    stored per-entry ``step_delta``, cached and validated like the JSON
+    leaderboard.
+    """
+
+    http_method_names = ["get", "head"]
+    buckets = ("day", "week")
+
+    def get(self, request, challenge_id):
+        bucket = request.GET.get("bucket", "day")
+        if bucket not in self.buckets:
+            return JsonResponse({"error": "bucket must be day or week."}, status=400)
+
+        kinds = [kind for kind in ("participant", "team") if kind in request.GET]
+        if len(kinds) != 1:
+            return JsonResponse(
+                {"error": "Pass either participant or team."}, status=400
+            )
+        kind = kinds[0]
+        try:
+            owner_id = int(request.GET[kind])
+        except ValueError:
+            return JsonResponse({"error": f"{kind} must be an id."}, status=400)
+
+        return board_json_response(
+            request,
+            challenge_id,
+            f"series:{kind}:{owner_id}:{bucket}",
+            lambda: self.get_series(challenge_id, kind, owner_id, bucket),
+        )
+
+    def get_series(self, challenge_id, kind, owner_id, bucket):
+        challenge = get_object_or_404(StepChallenge, pk=challenge_id)
+        if kind == "participant":
+            owners = Participant.objects.filter(team__challenge=challenge)
+            entries = StepEntry.objects.filter(participant_id=owner_id)
+        else:
+            owners = Team.objects.filter(challenge=challenge)
+            entries = StepEntry.objects.filter(participant__team_id=owner_id)
+        if not owners.filter(pk=owner_id).exists():
+            raise Http404(f"No such {kind} in this challenge.")
+
+        # One row per day; a team's members are summed in SQL
+        days = (
+            entries
+            .filter(challenge=challenge)
+            .values("date")
+            .annotate(delta=Sum("step_delta"))
+            .order_by("date")
+            .values_list("date", "delta")
+        )
+        return {
+            "challenge": challenge.pk,
+            kind: owner_id,
+            "bucket": bucket,
+            **step_series(days, challenge.start_date, bucket),
+        }
+
+
+class ChallengeExportView(LoginRequiredMixin, View):
+    """
+    CSV download of a challenge's standings or all of its step entries,
+    for staff. Streamed in chunks (see steps/exports.py); add
+    ``?gzip=1`` for a compressed ``.csv.gz``.
+    """
+
+    http_method_names = ["get"]
+
+    def get(self, request, challenge_id, kind):
+        if not request.user.is_staff:
+            raise PermissionDenied("Only staff can export challenge data.")
+        challenge = get_object_or_404(StepChallenge, pk=challenge_id)
+        return export_response(
+            kind, [challenge], compress=request.GET.get("gzip") == "1"
+        )
+
+
+class LeaderboardStreamView(View):
+    """
+    Server-sent events with the rank changes of one challenge.
+
+    Every saved entry pushes a ``rank`` event (new total and rank of its
+    participant, plus the rank shift of everyone it overtook or fell
+    behind); bulk writes push ``reset``, telling the page to reload.
+    Needs the ASGI server: an endless stream would tie up a WSGI worker.
+    """
+
+    async def get(self, request, challenge_id):
+        if not isinstance(request, ASGIRequest):
+            return HttpResponse(
+                "Live updates need the ASGI server.", status=501, content_type="text/plain"
+            )
+        if not await StepChallenge.objects.filter(pk=challenge_id).aexists():
+            raise Http404("No such challenge.")
+
+        response = StreamingHttpResponse(
+            self.events(challenge_id), content_type="text/event-stream"
+        )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"  # Don't let nginx buffer the stream
+        return response
+
+    async def events(self, challenge_id):
+        keepalive = getattr(settings, "STEPS_LIVE_KEEPALIVE", 15)
+        queue = broadcaster.subscribe(challenge_id)
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), keepalive)
+                except asyncio.TimeoutError:
+                    # Comment line: keeps proxies from closing an idle stream
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            broadcaster.unsubscribe(challenge_id, queue)
+
+
+def current_challenge_query():
+    """The active challenge shown on the home page (latest start wins)."""
+    return StepChallenge.objects.filter(is_active=True).order_by("-start_date")
+
+
+async def alist(queryset):
+    """Evaluate a queryset on the async ORM."""
+    return [row async for row in queryset]
+
+
+async def resolved(value):
+    """Awaitable of a ready value, for optional parts of asyncio.gather()."""
+    return value
+
+
+def make_cursor(standing):
+    """Opaque keyset position of a standings row: "<steps>.<participant id>"."""
+    return f"{standing.total_steps}.{standing.participant_id}"
+
+
+def parse_cursor(value):
+    """Inverse of make_cursor(); None for a missing or malformed cursor."""
+    try:
+        total_steps, participant_id = (int(part) for part in value.split("."))
+    except (AttributeError, ValueError):
+        return None
+    return total_steps, participant_id
+
+
+def make_entry_cursor(entry):
+    """Opaque keyset position of a step entry: "<date>.<entry id>"."""
+    return f"{entry.date.isoformat()}.{entry.pk}"
+
+
+def parse_entry_cursor(value):
+    """Inverse of make_entry_cursor(); None for a missing or malformed cursor."""
+    try:
+        day, entry_id = value.split(".")
+        return date.fromisoformat(day), int(entry_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def history_url(challenge_id, last_entry):
+    """URL of the entry history page that follows ``last_entry``."""
+    return (
+        f"{reverse('steps-entry-history')}"
+        f"?challenge={challenge_id}&before={last_entry.date.isoformat()}"
+    )
+
 
 def get_challenge_days(challenge):
     """
@@ -369,3 +1222,52 @@ def get_challenge_days(challenge):
         "days_left": max(days_left, 0),
         "progress_percent": progress_percent
     }
+
+
+def step_series(days, start_date, bucket="day"):
+    """
+    Parallel ``dates``/``deltas``/``totals`` lists from ``(date, delta)``
+    rows in date order. Weekly buckets are labelled with the first day
+    of their challenge week (counted from ``start_date``) and carry the
+    total at the end of the week.
+    """
+    dates, deltas, totals = [], [], []
+    total = 0
+    for day, delta in days:
+        total += delta
+        if bucket == "week":
+            day = start_date + timedelta(days=(day - start_date).days // 7 * 7)
+        if dates and dates[-1] == day:
+            deltas[-1] += delta
+            totals[-1] = total
+        else:
+            dates.append(day)
+            deltas.append(delta)
+            totals.append(total)
+    return {"dates": dates, "deltas": deltas, "totals": totals}
+
+
+def get_daily_activity(challenge, days):
+    """
+    Bars for the home page activity chart.
+
+    ``days`` are ``(date, step_delta, entry_count)`` rows from
+    ChallengeDailyStats. Returns one dict per challenge day up to today,
+    with quiet days filled in and ``percent`` relative to the busiest day.
+    """
+    by_date = {day: (step_delta, count) for day, step_delta, count in days}
+    last_day = min(challenge.end_date, now().date())
+    busiest = max((step_delta for step_delta, _ in by_date.values()), default=0)
+
+    activity = []
+    day = challenge.start_date
+    while day <= last_day:
+        step_delta, count = by_date.get(day, (0, 0))
+        activity.append({
+            "date": day,
+            "steps": step_delta,
+            "entries": count,
+            "percent": int(step_delta * 100 / busiest) if busiest > 0 else 0,
+        })
+        day += timedelta(days=1)
+    return activity